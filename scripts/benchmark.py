@@ -0,0 +1,242 @@
+import gc
+import multiprocessing
+import os
+import pickle
+import sys
+import tempfile
+import timeit
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import fields, is_dataclass
+from pathlib import Path
+from typing import Any, Callable, Iterable
+
+import jsonc
+
+from shadow_compass import parser, snapshot, sudanjson
+from shadow_compass.game_config import GameConfig
+from shadow_compass.game_db import GameDb
+from shadow_compass.parser import parse_value
+from shadow_compass.schema.card import Card
+from shadow_compass.schema.event import Event
+from shadow_compass.schema.loot import Loot
+from shadow_compass.schema.rite import Rite
+from shadow_compass.store import EntityStore, write_store
+
+GAME_PATH = Path('resources') / 'game'
+ADDITIONAL_LOCALISATIONS_PATH = Path('resources') / 'additional_i18n.json'
+CONFIG_PATH = GAME_PATH / 'config'
+REPEAT = 5
+
+
+class LinearMultiDict:
+    # Multi-dict implementation prior to indexing, kept as a baseline
+    def __init__(self, data: Iterable[tuple[Any, Any]]) -> None:
+        self.data = tuple(data)
+
+    def __getitem__(self, key: Any) -> Any:
+        for k, v in self.data:
+            if k == key:
+                return v
+        raise KeyError(key)
+
+    def __contains__(self, key: Any) -> bool:
+        for k, _ in self.data:
+            if k == key:
+                return True
+        return False
+
+    def keys(self) -> Iterable[Any]:
+        for k, _ in self.data:
+            yield k
+
+
+def main() -> int:
+    benchmarks = {
+        'game_db': benchmark_game_db,
+        'jsonc': benchmark_jsonc,
+        'memory': benchmark_memory,
+        'multi_dict': benchmark_multi_dict,
+        'parse': benchmark_parse,
+        'snapshot': benchmark_snapshot,
+        'store': benchmark_store,
+    }
+    names = sys.argv[1:] or list(benchmarks)
+    for name in names:
+        print(f'== {name}')
+        benchmarks[name]()
+    return 0
+
+
+def benchmark_game_db() -> None:
+    config = GameConfig.from_directory(GAME_PATH)
+    _report('from_config', lambda: GameDb.from_config(config, ADDITIONAL_LOCALISATIONS_PATH), number=3)
+    gc.collect()
+    tracemalloc.start()
+    game_db = GameDb.from_config(config, ADDITIONAL_LOCALISATIONS_PATH)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(f'  {game_db.graph!r} {size / 2**10:.1f} KiB retained')
+
+
+def benchmark_jsonc() -> None:
+    paths = [
+        CONFIG_PATH / 'cards.json',
+        *sorted((CONFIG_PATH / 'event').iterdir()),
+        *sorted((CONFIG_PATH / 'rite').iterdir()),
+    ]
+    texts = [path.read_text(encoding='utf-8') for path in paths]
+    for path, text in zip(paths, texts):
+        reference = _normalise(sudanjson.loads(text, fast=False))
+        if _normalise(sudanjson.loads(text)) != reference:
+            raise AssertionError(f'Fast loader output differs for {path}')
+    print(f'{len(paths)} files decoded identically')
+    for label, fast in (('jsonc', False), ('fast', True)):
+        _report(label, lambda fast=fast: [sudanjson.loads(text, fast=fast) for text in texts], number=1)
+
+
+def benchmark_memory() -> None:
+    for label, intern in (('plain', False), ('interned', True)):
+        # Each measurement runs in a fresh process, so that RSS is not shared between them
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as executor:
+            objects, rss, pickle_size = executor.submit(_measure_game_config, intern).result()
+        print(f'  {label:<12} {objects:>9} objects {rss / 2**20:9.1f} MiB RSS {pickle_size / 2**20:9.1f} MiB pickled')
+
+
+def benchmark_multi_dict() -> None:
+    for directory, entity_cls in (('rite', Rite), ('event', Event)):
+        objects = [_load_pairs(path) for path in sorted((CONFIG_PATH / directory).iterdir())]
+        prop_names = [f.name for f in fields(entity_cls)]
+        print(f'{directory}: {len(objects)} objects, {max(len(o) for o in objects)} keys max')
+        for label, factory in (
+            ('linear', LinearMultiDict),
+            ('indexed', sudanjson.MultiDict),
+            ('adaptive', sudanjson._multi_dict_or_dict),
+        ):
+            _report(
+                label,
+                lambda objects=objects, names=prop_names, factory=factory: _access_entities(objects, names, factory),
+            )
+
+
+def benchmark_parse() -> None:
+    for entity_cls, objects in (
+        (Card, list(_load(CONFIG_PATH / 'cards.json').values())),
+        (Event, [_load(path) for path in sorted((CONFIG_PATH / 'event').iterdir())]),
+        (Loot, [_load(path) for path in sorted((CONFIG_PATH / 'loot').iterdir())]),
+        (Rite, [_load(path) for path in sorted((CONFIG_PATH / 'rite').iterdir())]),
+    ):
+        _report(
+            f'{entity_cls.__name__} x{len(objects)}',
+            lambda entity_cls=entity_cls, objects=objects: [parse_value(o, entity_cls) for o in objects],
+            number=3,
+        )
+    parser.parse_stats.clear()
+    GameConfig.from_directory(GAME_PATH)
+    for stat in ('union_arms_skipped', 'union_fallbacks'):
+        print(f'  {stat:<20} {parser.parse_stats[stat]:>9}')
+
+
+def benchmark_snapshot() -> None:
+    config = GameConfig.from_directory(GAME_PATH)
+    if snapshot.loads(snapshot.dumps(config)) != config:
+        raise AssertionError('Snapshot does not round-trip')
+    formats = [('pickle', pickle.dumps(config, protocol=5), pickle.loads)]
+    for compression in (None, 'zlib', 'lzma'):
+        formats.append((f'snap {compression or "raw"}', snapshot.dumps(config, compression), snapshot.loads))
+    for label, data, loads in formats:
+        # Timed with the garbage collector enabled, as it is when loading the cache for real
+        _report(
+            f'{label:<10} {len(data) / 2**10:8.1f} KiB',
+            lambda loads=loads, data=data: loads(data),
+            number=5,
+            setup='gc.enable()',
+        )
+
+
+def benchmark_store() -> None:
+    config = GameConfig.from_directory(GAME_PATH)
+    card_id = next(iter(config.cards))
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        store_path = Path(tmp_dir) / 'config.store'
+        write_store(config, store_path)
+        print(f'  {store_path.stat().st_size / 2**10:.1f} KiB for {sum(len(c) for c in vars(config).values())} records')
+        data = snapshot.dumps(config)
+        _report('snapshot', lambda: snapshot.loads(data).cards[card_id], 5)
+        with EntityStore(store_path) as store:
+            if store.cards[card_id] != config.cards[card_id]:
+                raise AssertionError('Stored card differs')
+            _report('store open', lambda: EntityStore(store_path).close(), 100)
+            _report('store get', lambda: store.cards[card_id], 1000)
+
+
+def _load(path: Path) -> Any:
+    return sudanjson.loads(path.read_text(encoding='utf-8'))
+
+
+def _load_pairs(path: Path) -> list[tuple[str, Any]]:
+    return jsonc.loads(path.read_text(encoding='utf-8').lstrip('\ufeff'), object_pairs_hook=lambda pairs: pairs)
+
+
+def _measure_game_config(intern: bool) -> tuple[int, int, int]:
+    if intern:
+        config = GameConfig.from_directory(GAME_PATH)
+    else:
+        with parser.disable_interning():
+            config = GameConfig.from_directory(GAME_PATH)
+    gc.collect()
+    return _count_objects(config), _get_rss(), len(pickle.dumps(config, pickle.HIGHEST_PROTOCOL))
+
+
+def _count_objects(root: Any) -> int:
+    seen = set()
+    pending = [root]
+    while pending:
+        obj = pending.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        if is_dataclass(obj):
+            pending.extend(getattr(obj, f.name) for f in fields(obj))
+        elif isinstance(obj, (tuple, list)):
+            pending.extend(obj)
+        elif isinstance(obj, dict):
+            pending.extend(obj.keys())
+            pending.extend(obj.values())
+    return len(seen)
+
+
+def _get_rss() -> int:
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+
+def _normalise(data: Any) -> Any:
+    # Makes decoded values comparable, including container and number types
+    if isinstance(data, sudanjson.MultiDict):
+        return 'MultiDict', tuple((k, _normalise(v)) for k, v in data.items())
+    elif isinstance(data, dict):
+        return 'dict', tuple((k, _normalise(v)) for k, v in data.items())
+    elif isinstance(data, list):
+        return 'list', tuple(_normalise(v) for v in data)
+    return type(data).__name__, data
+
+
+def _access_entities(objects: list[list[tuple[str, Any]]], prop_names: list[str], factory: Callable) -> None:
+    # Mirrors the lookups performed by the parser for each entity
+    for pairs in objects:
+        data = factory(pairs)
+        props = set(data.keys())
+        for prop_name in prop_names:
+            if prop_name in data:
+                props.remove(prop_name)
+                _ = data[prop_name]
+
+
+def _report(label: str, func: Callable[[], Any], number: int = 20, setup: str = 'pass') -> None:
+    best = min(timeit.repeat(func, setup, number=number, repeat=REPEAT, globals={'gc': gc})) / number
+    print(f'  {label:<12} {best * 1000:9.3f} ms')
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,336 @@
+import re
+import subprocess
+import sys
+from collections.abc import Iterable
+from dataclasses import fields, is_dataclass, replace
+from enum import Enum
+from pathlib import Path
+from re import _constants, _parser  # ty: ignore[unresolved-import]
+from types import NoneType, UnionType
+from typing import Any, get_args, get_origin, get_type_hints
+
+from jinja2 import ChoiceLoader, DictLoader, TemplateError
+from jinja2.environment import TemplateModule
+
+from shadow_compass.exporter.html import LANGUAGES, HtmlExporter
+from shadow_compass.exporter.manifest import PageReads
+from shadow_compass.exporter.minify import minify
+from shadow_compass.exporter.renderers import (
+    FragmentRenderer,
+    RenderContext,
+    change_renderers,
+    condition_renderers,
+    effect_renderers,
+    element_renderers,
+)
+from shadow_compass.game_config import GameConfig
+from shadow_compass.game_db import GameDb
+from shadow_compass.parser import _parse_condition, _parse_effect
+from shadow_compass.prop import get_prop_metadata
+from shadow_compass.schema.common import CustomSchema
+from shadow_compass.schema.condition import Condition, conditions
+from shadow_compass.schema.effect import CardChange, Effect, effects
+from shadow_compass.schema.formula import FormulaElement
+
+# Renders the conditions, effects and formulas found in the game data, along with samples of every registered class,
+# through both the template macros the renderers replaced and the renderers themselves, and reports any sample whose
+# minified markup or recorded inputs differ. The macros are read from the commit before the one which removed them,
+# unless the path to a copy of them is given.
+
+GAME_PATH = Path('resources') / 'game'
+ADDITIONAL_LOCALISATIONS_PATH = Path('resources') / 'additional_i18n.json'
+MACROS_PATH = 'shadow_compass/templates/_macros.html'
+ROOT = '../../'
+ABSTRACT_CLASSES = (Condition, Effect, CardChange, FormulaElement)
+REPEATS = (_constants.MAX_REPEAT, _constants.MIN_REPEAT, _constants.POSSESSIVE_REPEAT)
+CATEGORY_CHARS = {_constants.CATEGORY_DIGIT: '1', _constants.CATEGORY_WORD: 'a', _constants.CATEGORY_SPACE: ' '}
+# Matches the repr of an object held by the macros, such as that of a generator which a link was made to
+OBJECT_REPR_PATTERN = re.compile(r'<[\w.]+ object \w+ at 0x[\da-f]+>')
+# Stands in for any character outside a negated set, as none of them exclude it
+OTHER_CHAR = '魅'
+
+
+def main() -> int:
+    macros = Path(sys.argv[1]).read_text(encoding='utf-8') if len(sys.argv) > 1 else _load_removed_macros()
+    config = GameConfig.from_directory(GAME_PATH)
+    game_db = GameDb.from_config(config, ADDITIONAL_LOCALISATIONS_PATH)
+    exporter = HtmlExporter(game_db)
+    env = exporter._get_env()
+    assert env.loader is not None
+    env.loader = ChoiceLoader([DictLoader({'_removed_macros.html': macros}), env.loader])
+
+    samples = [*_collect_samples(config), *_parse_samples(), *_build_samples()]
+    covered = {type(value) for _, value in samples for value in _walk(value)}
+    registered = {*condition_renderers, *effect_renderers, *change_renderers, *element_renderers}
+    print(f'Checking {len(samples)} samples in {len(LANGUAGES)} languages')
+
+    failures = 0
+    for lang in LANGUAGES:
+        # The macros read the language and root from the context of the page they are imported by
+        macros_module = env.get_template('_removed_macros.html').make_module({'lang': lang, 'root': ROOT})
+        context = exporter.renderer.get_context(lang, ROOT)
+        for kind, value in samples:
+            failure = _compare(exporter.renderer, macros_module, context, kind, value)
+            if failure is not None and kind in ('conditions', 'effects'):
+                # Narrowed down to the items which differ, which are easier to read than the whole list
+                item_kind = kind[:-1]
+                item_failures = [_compare(exporter.renderer, macros_module, context, item_kind, item) for item in value]
+                failure = '\n'.join(f for f in item_failures if f is not None) or failure
+            if failure is not None:
+                failures += 1
+                print(f'[{lang}] {kind} {_describe(value)}\n{failure}\n')
+
+    for cls in sorted(registered - covered, key=lambda c: c.__name__):
+        failures += 1
+        print(f'No sample of {cls.__name__} was rendered')
+    print(f'{len(registered & covered)} of {len(registered)} registered classes rendered, {failures} failures')
+    return 1 if failures else 0
+
+
+def _load_removed_macros() -> str:
+    commits = _git('log', '-S', '{%- macro condition(cond) %}', '--format=%H', '--', MACROS_PATH).split()
+    return _git('show', f'{commits[0]}^:{MACROS_PATH}')
+
+
+def _git(*args: str) -> str:
+    return subprocess.run(('git', *args), capture_output=True, check=True, encoding='utf-8').stdout
+
+
+def _compare(
+    renderer: FragmentRenderer, macros_module: TemplateModule, context: RenderContext, kind: str, value: Any
+) -> str | None:
+    # Each kind of fragment is rendered by the macro and the helper of the same name
+    results = []
+    for render_func in (getattr(macros_module, kind), getattr(context, kind)):
+        page_reads = renderer.reads
+        renderer.reads = PageReads()
+        try:
+            # Wrapped in inline content, so that the whitespace at either end is kept by the minifier
+            markup = minify(f'<li>.{render_func(value)}.</li>').decode('utf-8')
+        except (TemplateError, AttributeError, KeyError, TypeError, ValueError) as e:
+            # Reported as the markup, so that a sample which only one of them fails to render is told apart
+            markup = f'{type(e).__name__}: {e}'
+        finally:
+            reads, renderer.reads = renderer.reads, page_reads
+        # Entries recorded under the address of an object can never exist, and differ on every render
+        entries = sorted(entry for entry in reads.entries if not OBJECT_REPR_PATTERN.search(entry))
+        results.append((markup, entries, sorted(reads.loc_ids)))
+    (macro_markup, *macro_reads), (fragment_markup, *fragment_reads) = results
+    if macro_markup != fragment_markup:
+        return f'  macro:    {macro_markup}\n  renderer: {fragment_markup}'
+    if macro_reads != fragment_reads:
+        return f'  macro reads:    {macro_reads}\n  renderer reads: {fragment_reads}'
+    return None
+
+
+def _collect_samples(config: GameConfig) -> Iterable[tuple[str, Any]]:
+    # Every distinct list of conditions or effects held by the entities, which are rendered the same way as the pages do
+    seen = set()
+    pending: list[Any] = [
+        entity
+        for collection in (config.cards, config.events, config.loots, config.overs, config.quests, config.rites,
+                           config.upgrades)
+        for entity in collection.values()
+    ]
+    while pending:
+        value = pending.pop()
+        if id(value) in seen:
+            continue
+        seen.add(id(value))
+        if isinstance(value, tuple):
+            if value and all(isinstance(item, Condition) for item in value):
+                yield 'conditions', value
+            elif value and all(isinstance(item, Effect) for item in value):
+                yield 'effects', value
+            pending.extend(value)
+        elif isinstance(value, dict):
+            pending.extend(value.values())
+        elif is_dataclass(value) and not isinstance(value, type):
+            pending.extend(
+                getattr(value, f.name) for f in fields(value)
+                if not ((metadata := get_prop_metadata(f)) and metadata.computed)
+            )
+
+
+def _parse_samples() -> Iterable[tuple[str, Any]]:
+    # A sample of every registered condition and effect, parsed from a key matching its pattern the same way as the game
+    # data is, so that fields which have a parser of their own hold what it returns rather than what they are hinted as
+    leaves: dict[type, tuple[str, Any]] = {
+        abstract_cls: _find_parsed_leaf(registry, renderers)
+        for abstract_cls, registry, renderers in (
+            (Condition, conditions, condition_renderers), (Effect, effects, effect_renderers)
+        )
+    }
+    for kind, registry, parse in (('condition', conditions, _parse_condition), ('effect', effects, _parse_effect)):
+        for pattern, cls in registry:
+            if issubclass(cls, CustomSchema):
+                # Parsed from data of their own shape, which the type hints do not describe
+                continue
+            key = _example_key(pattern)
+            value_field = next((f for f in fields(cls) if f.name == 'value'), None)
+            metadata = get_prop_metadata(value_field) if value_field else None
+            if metadata and metadata.assert_equals is not None:
+                values: Iterable[Any] = (metadata.assert_equals,)
+            else:
+                values = _example_values(get_type_hints(cls).get('value', NoneType), leaves)
+            for value in values:
+                try:
+                    sample = parse(key, value)
+                except ValueError:
+                    # Formulas are made of tokens which no single pattern describes, and are sampled by _build_samples
+                    continue
+                if type(sample) is cls:
+                    yield kind, sample
+
+
+def _find_parsed_leaf(registry: Iterable[tuple[str, type]], renderers: Iterable[type]) -> tuple[str, Any]:
+    # The key and value of the leaf class, which the lists of conditions or effects held by the samples are made of
+    leaf_cls = _find_leaf(renderers)
+    pattern = next(pattern for pattern, cls in registry if cls is leaf_cls)
+    return _example_key(pattern), next(iter(_example_values(get_type_hints(leaf_cls)['value'], {})))
+
+
+def _example_key(pattern: str) -> str:
+    # A short key matched by the pattern, taking the first alternative of each branch. The parsed form of a pattern is
+    # only exposed by the modules the re package is built on, which have no stubs.
+    return _emit(_parser.parse(pattern), 0)
+
+
+def _emit(items: Any, index: int) -> str:
+    chars = []
+    for op, arg in items:
+        if op is _constants.LITERAL:
+            chars.append(chr(arg))
+        elif op is _constants.ANY:
+            chars.append('x')
+        elif op is _constants.IN:
+            chars.append(_choose(arg, index))
+        elif op is _constants.SUBPATTERN:
+            chars.append(_emit(arg[-1], index))
+        elif op in REPEATS:
+            # Unbounded repeats are long enough to hold each character of a set once, such as the separators of a list
+            low, high, item = arg
+            count = max(low, min(high, 3 if high == _constants.MAXREPEAT else 1))
+            chars.extend(_emit(item, i) for i in range(count))
+        elif op is _constants.BRANCH:
+            chars.append(_emit(arg[1][0], index))
+        elif op not in (_constants.AT, _constants.ASSERT, _constants.ASSERT_NOT):
+            raise ValueError(f'Unsupported pattern element {op}')
+    return ''.join(chars)
+
+
+def _choose(items: Any, index: int) -> str:
+    if items[0][0] is _constants.NEGATE:
+        return OTHER_CHAR
+    chars = [
+        chr(arg) if op is _constants.LITERAL else chr(arg[0]) if op is _constants.RANGE else CATEGORY_CHARS[arg]
+        for op, arg in items
+    ]
+    return chars[index % len(chars)]
+
+
+def _example_values(type_: Any, leaves: dict[type, tuple[str, Any]]) -> Iterable[Any]:
+    # A JSON value for each type the field may hold
+    for arm in get_args(type_) if isinstance(type_, UnionType) else (type_,):
+        yield _example_value(arm, leaves)
+
+
+def _example_value(type_: Any, leaves: dict[type, tuple[str, Any]]) -> Any:
+    args = get_args(type_)
+    if get_origin(type_) is tuple:
+        return dict([leaves[args[0]]]) if args[0] in leaves else [_example_value(args[0], leaves)] * 2
+    elif type_ is NoneType:
+        return None
+    elif isinstance(type_, type) and issubclass(type_, Enum):
+        return next(iter(type_)).value
+    return {bool: True, int: 1, float: 1.5, str: 'sample'}[type_]
+
+
+def _build_samples() -> Iterable[tuple[str, Any]]:
+    # A sample of every registered class, along with a variant for each other type its fields may hold
+    leaves: dict[type, type] = {
+        Condition: _find_leaf(condition_renderers),
+        Effect: _find_leaf(effect_renderers),
+        CardChange: _find_leaf(change_renderers),
+        FormulaElement: _find_leaf(element_renderers),
+    }
+    for kind, renderers in (('condition', condition_renderers), ('effect', effect_renderers)):
+        for cls in renderers:
+            for sample in _build_variants(cls, leaves):
+                yield kind, sample
+    for cls in element_renderers:
+        for sample in _build_variants(cls, leaves):
+            yield 'formula', (sample,)
+    host_cls = next(cls for cls in effect_renderers if _mentions(get_type_hints(cls).values(), CardChange))
+    for cls in change_renderers:
+        for sample in _build_variants(host_cls, {**leaves, CardChange: cls}):
+            yield 'effect', sample
+
+
+def _build_variants(cls: Any, leaves: dict[type, type]) -> Iterable[Any]:
+    sample = _build(cls, leaves)
+    yield sample
+    hints = get_type_hints(cls)
+    for f in fields(cls):
+        metadata = get_prop_metadata(f)
+        if not f.init or metadata and (metadata.computed or metadata.assert_equals is not None):
+            continue
+        if isinstance(hints[f.name], UnionType):
+            for arm in get_args(hints[f.name])[1:]:
+                yield replace(sample, **{f.name: _build(arm, leaves)})
+
+
+def _build(type_: Any, leaves: dict[type, type]) -> Any:
+    args = get_args(type_)
+    if isinstance(type_, UnionType):
+        return _build(args[0], leaves)
+    elif get_origin(type_) is tuple:
+        return tuple(_build(args[0], leaves) for _ in range(2)) if args[-1] is Ellipsis else \
+            tuple(_build(arg, leaves) for arg in args)
+    elif get_origin(type_) is dict:
+        return {_build(args[0], leaves): _build(args[1], leaves)}
+    elif type_ is NoneType:
+        return None
+    elif isinstance(type_, type) and issubclass(type_, Enum):
+        return next(iter(type_))
+    elif is_dataclass(type_):
+        cls = leaves.get(type_, type_)
+        hints = get_type_hints(cls)
+        kwargs = {}
+        for f in fields(cls):
+            metadata = get_prop_metadata(f)
+            if not f.init or metadata and metadata.computed:
+                continue
+            kwargs[f.name] = metadata.assert_equals if metadata and metadata.assert_equals is not None else \
+                _build(hints[f.name], leaves)
+        return cls(**kwargs)
+    return {bool: True, int: 1, float: 1.5, str: 'sample'}[type_]
+
+
+def _find_leaf(registry: Iterable[type]) -> type:
+    # The first registered class holding no other condition, effect, change or element
+    return next(cls for cls in registry if not _mentions(get_type_hints(cls).values(), *ABSTRACT_CLASSES))
+
+
+def _mentions(types: Iterable[Any], *classes: type) -> bool:
+    return any(type_ in classes or _mentions(get_args(type_), *classes) for type_ in types)
+
+
+def _walk(value: Any) -> Iterable[Any]:
+    yield value
+    if isinstance(value, tuple):
+        for item in value:
+            yield from _walk(item)
+    elif is_dataclass(value) and not isinstance(value, type):
+        for f in fields(value):
+            yield from _walk(getattr(value, f.name))
+
+
+def _describe(value: Any) -> str:
+    if isinstance(value, tuple):
+        return f'({", ".join(type(item).__name__ for item in value)})'
+    return type(value).__name__
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,10 +1,13 @@
 import logging
-import pickle
+import os
 import sys
 from pathlib import Path
 
+from jinja2 import FileSystemBytecodeCache
+
+from shadow_compass import cache
 from shadow_compass.exporter.html import HtmlExporter
-from shadow_compass.game_config import GameConfig
+from shadow_compass.exporter.minify import MinifyCache
 from shadow_compass.game_db import GameDb
 
 logger = logging.getLogger(__name__)
@@ -14,8 +17,14 @@ ADDITIONAL_LOCALISATIONS_PATH = RESOURCES_PATH / 'additional_i18n.json'
 GAME_PATH = RESOURCES_PATH / 'game'
 
 OUTPUT_PATH = Path('output')
-CACHE_PATH = OUTPUT_PATH/'cache.pickle'
+CACHE_PATH = OUTPUT_PATH/'config.snapshot'
+DB_CACHE_PATH = OUTPUT_PATH/'game_db.snapshot'
+PARSE_CACHE_PATH = OUTPUT_PATH/'parse_cache'
 EXPORT_PATH = OUTPUT_PATH/'export_html'
+EXPORT_WORKERS = os.cpu_count() or 1
+EXPORT_MANIFEST_PATH = OUTPUT_PATH/'html.manifest'
+MINIFY_CACHE_PATH = OUTPUT_PATH/'minify_cache'
+TEMPLATE_CACHE_PATH = OUTPUT_PATH/'template_cache'
 
 
 def main() -> int:
@@ -24,30 +33,41 @@ def main() -> int:
     if not OUTPUT_PATH.exists():
         OUTPUT_PATH.mkdir(parents=True)
 
-    game_config = load_game_config()
-    game_db = GameDb.from_config(game_config, ADDITIONAL_LOCALISATIONS_PATH)
-    render(game_db, OUTPUT_PATH / 'html')
+    game_db = load_game_db()
+    render(game_db, OUTPUT_PATH / 'html', EXPORT_WORKERS, EXPORT_MANIFEST_PATH, MINIFY_CACHE_PATH, TEMPLATE_CACHE_PATH)
 
     return 0
 
 
-def load_game_config() -> GameConfig:
-    if not CACHE_PATH.exists():
-        logger.info('Parsing game files for game config')
-        config = GameConfig.from_directory(GAME_PATH)
-        with open(CACHE_PATH, 'wb') as f:
-            pickle.dump(config, f, pickle.HIGHEST_PROTOCOL)
-        return config
-    else:
-        logger.info('Loading game config from cache')
-        with open(CACHE_PATH, 'rb') as f:
-            return pickle.load(f)
+def load_game_db() -> GameDb:
+    return cache.load_game_db(
+        GAME_PATH,
+        ADDITIONAL_LOCALISATIONS_PATH,
+        CACHE_PATH,
+        DB_CACHE_PATH,
+        parse_cache_path=PARSE_CACHE_PATH,
+    )
 
 
-def render(game_db: GameDb, output_path: Path) -> None:
+def render(
+    game_db: GameDb,
+    output_path: Path,
+    workers: int = 1,
+    manifest_path: Path | None = None,
+    minify_cache_path: Path | None = None,
+    template_cache_path: Path | None = None,
+) -> None:
     logger.info(f'Exporting HTML to {output_path}')
-    exporter = HtmlExporter(game_db)
-    exporter.export(output_path)
+    bytecode_cache = None
+    if template_cache_path is not None:
+        template_cache_path.mkdir(parents=True, exist_ok=True)
+        bytecode_cache = FileSystemBytecodeCache(str(template_cache_path))
+    exporter = HtmlExporter(
+        game_db,
+        MinifyCache(minify_cache_path) if minify_cache_path is not None else None,
+        bytecode_cache,
+    )
+    exporter.export(output_path, workers, manifest_path)
 
 
 if __name__ == "__main__":
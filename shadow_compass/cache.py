@@ -0,0 +1,174 @@
+import hashlib
+import logging
+import os
+import pickle
+from functools import partial
+from pathlib import Path
+from typing import Any, Iterable, Callable
+
+from shadow_compass import snapshot
+from shadow_compass.game_config import GameConfig
+from shadow_compass.game_db import GameDb
+from shadow_compass.resources import IMAGES_PATH
+
+logger = logging.getLogger(__name__)
+
+CACHE_VERSION = 1
+PACKAGE_PATH = Path(__file__).parent
+# Sources which determine how game files are parsed, so a change to any of them invalidates cached configs
+SCHEMA_SOURCE_PATHS = (
+    PACKAGE_PATH / 'schema',
+    PACKAGE_PATH / 'dispatch.py',
+    PACKAGE_PATH / 'game_config.py',
+    PACKAGE_PATH / 'parser.py',
+    PACKAGE_PATH / 'prop.py',
+    PACKAGE_PATH / 'snapshot.py',
+    PACKAGE_PATH / 'sudanjson.py',
+)
+# Sources which determine how the game database is linked from the config, and how its links are stored
+GAME_DB_SOURCE_PATHS = (
+    PACKAGE_PATH / 'game_db.py',
+    PACKAGE_PATH / 'loc.py',
+    PACKAGE_PATH / 'reference_graph.py',
+    PACKAGE_PATH / 'resources.py',
+    PACKAGE_PATH / 'snapshot.py',
+)
+
+
+def compute_fingerprint(paths: Iterable[Path], hash_contents: bool = False) -> str:
+    digest = hashlib.sha256(f'v{CACHE_VERSION}'.encode())
+    for path in paths:
+        for file_path in sorted(path.rglob('*')) if path.is_dir() else (path,):
+            if file_path.is_dir() or file_path.suffix == '.pyc':
+                continue
+            stat = file_path.stat()
+            name = (Path(path.name) / file_path.relative_to(path)).as_posix()
+            digest.update(f'{name}\0{stat.st_size}\0{stat.st_mtime_ns}\0'.encode())
+            if hash_contents:
+                digest.update(hashlib.sha256(file_path.read_bytes()).digest())
+    return digest.hexdigest()
+
+
+def compute_directories_fingerprint(path: Path) -> str:
+    # Adding, removing or renaming a file changes the mtime of the directory holding it, so the directories alone tell
+    # whether the names of the files they hold are the same, without statting every file
+    digest = hashlib.sha256(f'v{CACHE_VERSION}'.encode())
+    for dir_path, dir_names, _ in os.walk(path):
+        dir_names.sort()
+        stat = os.stat(dir_path)
+        name = Path(dir_path).relative_to(path).as_posix()
+        digest.update(f'{name}\0{stat.st_mtime_ns}\0'.encode())
+    return digest.hexdigest()
+
+
+def get_game_fingerprint(game_path: Path, hash_contents: bool = False) -> str:
+    return compute_fingerprint(
+        (game_path / 'config', game_path / 'i18n', *SCHEMA_SOURCE_PATHS),
+        hash_contents,
+    )
+
+
+def get_game_db_fingerprint(
+    config_fingerprint: str,
+    additional_localisations_path: Path,
+    hash_contents: bool = False,
+) -> str:
+    sources_fingerprint = compute_fingerprint((additional_localisations_path, *GAME_DB_SOURCE_PATHS), hash_contents)
+    images_fingerprint = compute_directories_fingerprint(IMAGES_PATH)
+    return hashlib.sha256(f'{config_fingerprint}\0{sources_fingerprint}\0{images_fingerprint}'.encode()).hexdigest()
+
+
+def load_cached(cache_path: Path, fingerprint: str, loads: Callable[[bytes], Any] = pickle.loads) -> Any | None:
+    if not cache_path.exists():
+        return None
+    try:
+        with open(cache_path, 'rb') as f:
+            # The fingerprint is stored ahead of the value, so that a stale value is never unpickled
+            if pickle.load(f) != fingerprint:
+                logger.info(f'Cache {cache_path} is out of date')
+                return None
+            return loads(f.read())
+    except (OSError, EOFError, pickle.UnpicklingError, snapshot.SnapshotError) as e:
+        logger.warning(f'Failed to read cache {cache_path}: {e}')
+        return None
+
+
+def save_cached(
+    cache_path: Path,
+    fingerprint: str,
+    value: Any,
+    dumps: Callable[[Any], bytes] = partial(pickle.dumps, protocol=pickle.HIGHEST_PROTOCOL),
+) -> None:
+    tmp_path = cache_path.with_name(cache_path.name + '.tmp')
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(fingerprint, f, pickle.HIGHEST_PROTOCOL)
+        f.write(dumps(value))
+    os.replace(tmp_path, cache_path)
+
+
+class ParseCache:
+    # Parsed entities for each collection, stored in their own file alongside the stamps of the game files they came from
+    path: Path
+    fingerprint: str
+
+    def __init__(self, path: Path, fingerprint: str | None = None) -> None:
+        self.path = path
+        # Only the schema sources, since the game files themselves are checked one by one
+        self.fingerprint = fingerprint if fingerprint is not None else compute_fingerprint(SCHEMA_SOURCE_PATHS)
+
+    def load(self, name: str) -> Any | None:
+        return load_cached(self.path / f'{name}.pickle', self.fingerprint)
+
+    def save(self, name: str, value: Any) -> None:
+        self.path.mkdir(parents=True, exist_ok=True)
+        save_cached(self.path / f'{name}.pickle', self.fingerprint, value)
+
+
+def load_game_config(
+    game_path: Path,
+    cache_path: Path,
+    hash_contents: bool = False,
+    workers: int = 1,
+    parse_cache_path: Path | None = None,
+    fingerprint: str | None = None,
+) -> GameConfig:
+    if fingerprint is None:
+        fingerprint = get_game_fingerprint(game_path, hash_contents)
+    config = load_cached(cache_path, fingerprint, snapshot.loads)
+    if config is not None:
+        logger.info('Loading game config from cache')
+        return config
+    logger.info('Parsing game files for game config')
+    parse_cache = ParseCache(parse_cache_path) if parse_cache_path is not None else None
+    config = GameConfig.from_directory(game_path, workers=workers, parse_cache=parse_cache)
+    save_cached(cache_path, fingerprint, config, snapshot.dumps)
+    return config
+
+
+def load_game_db(
+    game_path: Path,
+    additional_localisations_path: Path,
+    cache_path: Path,
+    db_cache_path: Path,
+    hash_contents: bool = False,
+    workers: int = 1,
+    parse_cache_path: Path | None = None,
+) -> GameDb:
+    config_fingerprint = get_game_fingerprint(game_path, hash_contents)
+    fingerprint = get_game_db_fingerprint(config_fingerprint, additional_localisations_path, hash_contents)
+    # The cached database holds its entries, so the config is only loaded when the database has to be built again
+    links = load_cached(db_cache_path, fingerprint, snapshot.loads)
+    if links is not None:
+        logger.info('Loading game database from cache')
+        return GameDb.from_links(links)
+    config = load_game_config(
+        game_path,
+        cache_path,
+        hash_contents,
+        workers,
+        parse_cache_path,
+        fingerprint=config_fingerprint,
+    )
+    game_db = GameDb.from_config(config, additional_localisations_path)
+    save_cached(db_cache_path, fingerprint, game_db.get_links(), snapshot.dumps)
+    return game_db
@@ -0,0 +1,212 @@
+from __future__ import annotations
+
+import operator
+from array import array
+from typing import Any, Callable, Iterable, Self, TYPE_CHECKING
+
+from shadow_compass.schema.enums import CardDisplayType, CardRarity, CardType
+
+if TYPE_CHECKING:
+    from shadow_compass.game_db import CardEntry
+
+# Cards stored as parallel typed arrays, with one row per card, which are queried through bitmaps rather than by
+# walking the cards. Each bitmap is an integer with a bit set for every matching row, so that combining predicates is
+# a single bitwise operation over all the rows at once.
+#
+#     table.where(rare >= CardRarity.GOLD, tag('xxx') >= 2)
+
+_CARD_TYPES = tuple(CardType)
+_DISPLAY_TYPES = tuple(CardDisplayType)
+# Decodes the values stored in each column
+_DECODERS: dict[str, Callable[[int], Any]] = {
+    'card_id': int,
+    'rare': CardRarity,
+    'card_type': _CARD_TYPES.__getitem__,
+    'display_type': lambda code: _DISPLAY_TYPES[code] if code >= 0 else None,
+    'vanishing': int,
+    'is_only': bool,
+}
+
+
+class Predicate:
+    # Evaluates to the bitmap of the rows it matches
+    evaluate: Callable[[CardTable], int]
+
+    def __init__(self, evaluate: Callable[[CardTable], int]) -> None:
+        self.evaluate = evaluate
+
+    def __and__(self, other: Predicate) -> Predicate:
+        return Predicate(lambda table: self.evaluate(table) & other.evaluate(table))
+
+    def __or__(self, other: Predicate) -> Predicate:
+        return Predicate(lambda table: self.evaluate(table) | other.evaluate(table))
+
+    def __invert__(self) -> Predicate:
+        return Predicate(lambda table: table.all_rows & ~self.evaluate(table))
+
+
+class Column:
+    name: str
+    tag: str | None
+
+    def __init__(self, name: str, tag: str | None = None) -> None:
+        self.name = name
+        self.tag = tag
+
+    def __eq__(self, value: Any) -> Predicate:  # ty: ignore[invalid-method-override]
+        return self._compare(operator.eq, value)
+
+    def __ne__(self, value: Any) -> Predicate:  # ty: ignore[invalid-method-override]
+        return self._compare(operator.ne, value)
+
+    def __lt__(self, value: Any) -> Predicate:
+        return self._compare(operator.lt, value)
+
+    def __le__(self, value: Any) -> Predicate:
+        return self._compare(operator.le, value)
+
+    def __gt__(self, value: Any) -> Predicate:
+        return self._compare(operator.gt, value)
+
+    def __ge__(self, value: Any) -> Predicate:
+        return self._compare(operator.ge, value)
+
+    def __repr__(self) -> str:
+        return f'<Column {self.name}>' if self.tag is None else f'<Column tag={self.tag}>'
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def _compare(self, op: Callable[[Any, Any], bool], value: Any) -> Predicate:
+        return Predicate(lambda table: table.get_rows(self, op, value))
+
+
+card_id = Column('card_id')
+rare = Column('rare')
+card_type = Column('card_type')
+display_type = Column('display_type')
+vanishing = Column('vanishing')
+is_only = Column('is_only')
+
+
+def tag(name: str) -> Column:
+    # Cards without the tag have a value of 0
+    return Column('tag', name)
+
+
+class CardTable:
+    card_id: array
+    rare: array
+    card_type: array
+    display_type: array
+    vanishing: array
+    is_only: array
+    # Sparse tag matrix, holding the rows which have each tag along with its values
+    tags: dict[str, tuple[array, array]]
+    all_rows: int
+    _bitmaps: dict[tuple[str, str | None], dict[Any, int]]
+
+    def __init__(
+        self,
+        card_id: array,
+        rare: array,
+        card_type: array,
+        display_type: array,
+        vanishing: array,
+        is_only: array,
+        tags: dict[str, tuple[array, array]],
+    ) -> None:
+        self.card_id = card_id
+        self.rare = rare
+        self.card_type = card_type
+        self.display_type = display_type
+        self.vanishing = vanishing
+        self.is_only = is_only
+        self.tags = tags
+        self.all_rows = (1 << len(card_id)) - 1
+        self._bitmaps = {}
+
+    @classmethod
+    def from_entries(cls, entries: Iterable[CardEntry]) -> Self:
+        table = cls(array('q'), array('b'), array('b'), array('b'), array('l'), array('b'), {})
+        for row, entry in enumerate(entries):
+            card = entry.card
+            table.card_id.append(card.id)
+            table.rare.append(card.rare)
+            table.card_type.append(_CARD_TYPES.index(card.type))
+            table.display_type.append(
+                _DISPLAY_TYPES.index(entry.display_type) if entry.display_type is not None else -1
+            )
+            table.vanishing.append(card.card_vanishing)
+            table.is_only.append(card.is_only)
+            for tag_name, value in card.tag.items():
+                rows, values = table.tags.setdefault(tag_name, (array('l'), array('q')))
+                rows.append(row)
+                values.append(value)
+        table.all_rows = (1 << len(table)) - 1
+        return table
+
+    def __len__(self) -> int:
+        return len(self.card_id)
+
+    def __repr__(self) -> str:
+        return f'<CardTable rows={len(self)} tags={len(self.tags)}>'
+
+    def where(self, *predicates: Predicate) -> list[int]:
+        # Returns the IDs of the cards matching all the predicates, in the order of the table
+        card_ids = self.card_id
+        return [card_ids[row] for row in _iter_rows(self._evaluate(predicates), len(card_ids))]
+
+    def count(self, *predicates: Predicate) -> int:
+        return self._evaluate(predicates).bit_count()
+
+    def get_rows(self, column: Column, op: Callable[[Any, Any], bool], value: Any) -> int:
+        rows = 0
+        for column_value, bitmap in self._get_bitmaps(column).items():
+            if op(column_value, value):
+                rows |= bitmap
+        return rows
+
+    def _evaluate(self, predicates: tuple[Predicate, ...]) -> int:
+        rows = self.all_rows
+        for predicate in predicates:
+            rows &= predicate.evaluate(self)
+        return rows
+
+    def _get_bitmaps(self, column: Column) -> dict[Any, int]:
+        # Built the first time a column is queried, with one bitmap for each of its distinct values
+        key = (column.name, column.tag)
+        bitmaps = self._bitmaps.get(key)
+        if bitmaps is not None:
+            return bitmaps
+
+        rows_by_value: dict[Any, list[int]] = {}
+        if column.tag is None:
+            decode = _DECODERS[column.name]
+            for row, code in enumerate(getattr(self, column.name)):
+                rows_by_value.setdefault(code, []).append(row)
+            bitmaps = {decode(code): _to_bitmap(rows, len(self)) for code, rows in rows_by_value.items()}
+        else:
+            tag_rows, tag_values = self.tags.get(column.tag, ((), ()))
+            for row, value in zip(tag_rows, tag_values):
+                rows_by_value.setdefault(value, []).append(row)
+            bitmaps = {value: _to_bitmap(rows, len(self)) for value, rows in rows_by_value.items()}
+            untagged = self.all_rows & ~_to_bitmap(tag_rows, len(self))
+            if untagged:
+                bitmaps[0] = bitmaps.get(0, 0) | untagged
+        self._bitmaps[key] = bitmaps
+        return bitmaps
+
+
+def _to_bitmap(rows: Iterable[int], count: int) -> int:
+    data = bytearray((count + 7) // 8)
+    for row in rows:
+        data[row >> 3] |= 1 << (row & 7)
+    return int.from_bytes(data, 'little')
+
+
+def _iter_rows(bitmap: int, count: int) -> Iterable[int]:
+    for i, byte in enumerate(bitmap.to_bytes((count + 7) // 8, 'little')):
+        if byte:
+            for bit in range(8):
+                if byte >> bit & 1:
+                    yield i * 8 + bit
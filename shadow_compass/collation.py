@@ -0,0 +1,43 @@
+import unicodedata
+from typing import Callable
+
+# Sort keys for the text of each language, which fold the differences that readers of that language do not expect to
+# affect the order. The text itself is always appended, so that only identical texts compare as equal.
+#
+# Han characters are left in code point order, which follows their radicals and strokes, as there is no pinyin or
+# stroke count data to sort them by.
+
+CollationKey = tuple[str, str]
+
+_HIRAGANA_OFFSET = ord('ぁ') - ord('ァ')
+# Katakana which have a matching hiragana
+_KATAKANA_TO_HIRAGANA = {code: code + _HIRAGANA_OFFSET for code in range(ord('ァ'), ord('ヶ') + 1)}
+
+
+def _fold_latin(text: str) -> str:
+    # Case and accents
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ''.join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+
+
+def _fold_chinese(text: str) -> str:
+    # Full-width forms and the case of any Latin text
+    return unicodedata.normalize('NFKC', text).casefold()
+
+
+def _fold_japanese(text: str) -> str:
+    # Half-width forms, katakana and the case of any Latin text
+    return unicodedata.normalize('NFKC', text).translate(_KATAKANA_TO_HIRAGANA).casefold()
+
+
+_FOLDS: dict[str, Callable[[str], str]] = {
+    'en': _fold_latin,
+    'ja': _fold_japanese,
+    'zhCN': _fold_chinese,
+    'zhTW': _fold_chinese,
+}
+
+
+def get_collation_key(text: str, lang: str) -> CollationKey:
+    fold = _FOLDS.get(lang)
+    return (fold(text) if fold else text), text
@@ -0,0 +1,98 @@
+import re
+from typing import Any, Generic, TypeVar
+
+T = TypeVar('T')
+
+REGEX_SPECIAL_CHARS = '.^$*+?{}[]|()'
+REGEX_QUANTIFIERS = '*+?{'
+
+
+class _TrieNode(Generic[T]):
+    children: dict[str, '_TrieNode[T]']
+    entries: list[tuple[int, re.Pattern, T]]
+
+    def __init__(self) -> None:
+        self.children = {}
+        self.entries = []
+
+
+class KeyDispatcher(Generic[T]):
+    # Patterns are bucketed in a trie by literal prefix, so a key is only matched against the patterns it could match
+    root: _TrieNode[T]
+    count: int
+    matches: dict[str, tuple[tuple[T, dict[str, Any]], ...]]
+
+    def __init__(self) -> None:
+        self.root = _TrieNode()
+        self.count = 0
+        self.matches = {}
+
+    def register(self, pattern: str, target: T) -> None:
+        node = self.root
+        for char in _get_literal_prefix(pattern):
+            node = node.children.setdefault(char, _TrieNode())
+        node.entries.append((self.count, re.compile(rf'^{pattern}$'), target))
+        self.count += 1
+        self.matches.clear()
+
+    def match(self, key: str) -> tuple[tuple[T, dict[str, Any]], ...]:
+        matches = self.matches.get(key)
+        if matches is None:
+            candidates = list(self.root.entries)
+            node = self.root
+            for char in key:
+                node = node.children.get(char)
+                if node is None:
+                    break
+                candidates.extend(node.entries)
+            # Candidates are tried in registration order, as they would be in a linear scan
+            candidates.sort(key=lambda entry: entry[0])
+            matches = tuple(
+                (target, match.groupdict())
+                for _, regex, target in candidates
+                if (match := regex.match(key))
+            )
+            self.matches[key] = matches
+        return matches
+
+
+def _get_literal_prefix(pattern: str) -> str:
+    prefix = []
+    depth = 0
+    in_class = False
+    i = 0
+    n = len(pattern)
+    # Top-level alternations have no common prefix
+    while i < n:
+        char = pattern[i]
+        if char == '\\':
+            i += 1
+        elif in_class:
+            in_class = char != ']'
+        elif char == '[':
+            in_class = True
+        elif char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif char == '|' and depth == 0:
+            return ''
+        i += 1
+
+    i = 0
+    while i < n:
+        char = pattern[i]
+        if char == '\\':
+            if i + 1 >= n or pattern[i + 1].isalnum():
+                break
+            char = pattern[i + 1]
+            i += 2
+        elif char in REGEX_SPECIAL_CHARS:
+            if char in REGEX_QUANTIFIERS and prefix:
+                # The preceding literal is optional or repeated
+                prefix.pop()
+            break
+        else:
+            i += 1
+        prefix.append(char)
+    return ''.join(prefix)
@@ -1,15 +1,24 @@
 import logging
+import multiprocessing
+import os
 import shutil
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Iterable, Any
 
-import minify_html
-from jinja2 import Environment, PackageLoader, select_autoescape, pass_context
+from jinja2 import BytecodeCache, Environment, PackageLoader, select_autoescape, pass_context
 from jinja2.runtime import Context, make_logging_undefined
 from markupsafe import Markup, escape
 
+from shadow_compass.exporter.manifest import InputDigests, PageReads, PageRecord, get_export_fingerprint, \
+    load_manifest, save_manifest
+from shadow_compass.exporter.minify import MinifyCache, minify
+from shadow_compass.exporter.renderers import FragmentRenderer
 from shadow_compass.game_db import GameDb, Loc, Entry
 from shadow_compass.resources import IMAGES_PATH, RESOURCES_PATH
+from shadow_compass.schema.condition import Condition
+from shadow_compass.schema.effect import Effect
 
 logger = logging.getLogger(__name__)
 
@@ -20,81 +29,257 @@ RESOURCES = (
     'script.js',
     'style.css',
 )
+# Collections of entries with a page each, along with the name of their templates
+COLLECTIONS = (
+    ('cards', 'card'),
+    ('endings', 'ending'),
+    ('events', 'event'),
+    ('loots', 'loot'),
+    ('objectives', 'objective'),
+    ('rites', 'rite'),
+    ('tags', 'tag'),
+    ('upgrades', 'upgrade'),
+)
+# Number of entry pages rendered by a worker at a time when exporting in parallel
+CHUNK_SIZE = 50
 
 Undefined = make_logging_undefined(logger)
 
 
+@dataclass
+class ExportStats:
+    rendered: int = 0
+    minify_hits: int = 0
+    write_skips: int = 0
+    # Minify cache keys of the pages which were written or skipped
+    minify_keys: set[str] = field(default_factory=set)
+
+    def update(self, other: 'ExportStats') -> None:
+        self.rendered += other.rendered
+        self.minify_hits += other.minify_hits
+        self.write_skips += other.write_skips
+        self.minify_keys.update(other.minify_keys)
+
+
 class HtmlExporter:
     game_db: GameDb
-
-    def __init__(self, game_db: GameDb):
+    minify_cache: MinifyCache | None
+    bytecode_cache: BytecodeCache | None
+    # Inputs read by the page being rendered, which the filters add to
+    reads: PageReads
+    # Renders the links, conditions and effects of the pages, each only once per language and root
+    renderer: FragmentRenderer
+    _env: Environment | None
+    _digests: InputDigests | None
+
+    def __init__(
+        self,
+        game_db: GameDb,
+        minify_cache: MinifyCache | None = None,
+        bytecode_cache: BytecodeCache | None = None,
+    ):
         self.game_db = game_db
-
-    def export(self, output_path: Path):
-        logger.info('Clearing output directory')
-        if output_path.exists():
-            for sub_path in output_path.iterdir():
-                if sub_path.is_dir():
-                    shutil.rmtree(sub_path)
-                else:
-                    sub_path.unlink()
+        self.minify_cache = minify_cache
+        self.bytecode_cache = bytecode_cache
+        self.reads = PageReads()
+        self.renderer = FragmentRenderer(game_db, self.reads)
+        self._env = None
+        self._digests = None
+
+    def export(self, output_path: Path, workers: int = 1, manifest_path: Path | None = None):
+        # With a manifest, only the pages whose inputs changed since the last export are rendered
+        fingerprint = ''
+        manifest = None
+        if manifest_path is not None:
+            fingerprint = get_export_fingerprint(self.game_db)
+            if output_path.exists():
+                manifest = load_manifest(manifest_path, fingerprint)
+        incremental = manifest is not None
+        if incremental:
+            logger.info(f'Exporting incrementally over {len(manifest)} pages')
         else:
-            output_path.mkdir(parents=True)
+            # Pages are only recorded when there is a manifest to record them in
+            manifest = {} if manifest_path is not None else None
+        output_path.mkdir(parents=True, exist_ok=True)
 
         logger.info('Copying resources')
         for path, contents in self._get_resources():
-            file_path = output_path / path
-            if not file_path.parent.exists():
-                file_path.parent.mkdir(parents=True, exist_ok=True)
-            file_path.write_bytes(contents)
+            _write_if_changed(output_path / path, contents)
 
-        shutil.copytree(IMAGES_PATH, output_path / 'images')
+        shutil.copytree(IMAGES_PATH, output_path / 'images', copy_function=_copy_if_changed, dirs_exist_ok=True)
 
-        for language in LANGUAGES:
-            logger.info(f'Processing pages for {language}')
-            for path, contents in self.get_pages(language):
-                self._write_page(output_path / language / path, contents)
+        if workers > 1:
+            results = self._export_units_parallel(output_path, manifest, workers)
+        else:
+            results = []
+            for language in LANGUAGES:
+                logger.info(f'Processing pages for {language}')
+                for unit in self._get_units(language):
+                    results.append(self.export_unit(output_path, manifest, *unit))
+        pages: dict[str, PageRecord] = {}
+        stats = ExportStats()
+        for unit_pages, unit_stats in results:
+            pages.update(unit_pages)
+            stats.update(unit_stats)
+        if incremental:
+            logger.info(f'Rendered {stats.rendered} of {len(pages)} pages')
+        else:
+            logger.info(f'Rendered {stats.rendered} pages')
 
         self._write_page(
             output_path / 'index.html',
-            self._build_env(DEFAULT_LANGUAGE, root='./').get_template('index.html').render(key=''),
+            self._render_page(DEFAULT_LANGUAGE, 'index.html', './', {'key': ''}),
+            stats,
         )
+        # Along with the index at the root
+        output_pages = stats.rendered + 1
+        logger.info(f'Minified {output_pages - stats.minify_hits} pages, skipped {stats.minify_hits} from the cache')
+        logger.info(f'Wrote {output_pages - stats.write_skips} pages, skipped {stats.write_skips} which were unchanged')
+        if self.minify_cache is not None and not incremental:
+            removed = self.minify_cache.prune(stats.minify_keys)
+            logger.info(f'Removed {removed} unused pages from the minify cache')
+
+        # Rather than clearing the output directory beforehand, which would rewrite every file even when unchanged
+        removed = self._remove_stale_files(output_path)
+        logger.info(f'Removed {removed} stale files')
+
+        if manifest_path is not None:
+            save_manifest(manifest_path, fingerprint, pages)
 
     def get_pages(self, lang: str) -> Iterable[tuple[str, str]]:
-        lang_index_env = self._build_env(lang, root='../')
-        lang_entries_index_env = self._build_env(lang, root='../../')
-        lang_entries_view_env = self._build_env(lang, root='../../../')
-
-        yield 'index.html', lang_index_env.get_template('index.html').render(key='')
-
-        for entries, key, entry_name  in (
-            (self.game_db.cards.values(), 'cards', 'card'),
-            (self.game_db.endings.values(), 'endings', 'ending'),
-            (self.game_db.events.values(), 'events', 'event'),
-            (self.game_db.loots.values(), 'loots', 'loot'),
-            (self.game_db.objectives.values(), 'objectives', 'objective'),
-            (self.game_db.rites.values(), 'rites', 'rite'),
-            (self.game_db.tags.values(), 'tags', 'tag'),
-            (self.game_db.upgrades.values(), 'upgrades', 'upgrade'),
-        ):
-            logger.info(f'Rendering {key} pages')
-            yield f'{key}/index.html', lang_entries_index_env.get_template(f'{entry_name}_index.html').render(key=key)
-            for entry in entries:
-                yield f'{entry.key}/index.html', lang_entries_view_env.get_template(f'{entry_name}_view.html').render(
-                    key=entry.key,
-                    **{entry_name: entry},
-                )
-
-    def _build_env(self, lang: str, root: str) -> Environment:
+        for unit in self._get_units(lang):
+            if unit[2] is None and unit[1] is not None:
+                logger.info(f'Rendering {unit[1]} pages')
+            yield from self.render_unit(*unit)
+
+    def render_unit(self, lang: str, key: str | None, ids: list[Any] | None = None) -> Iterable[tuple[str, str]]:
+        for path, template, root, variables in self._get_unit_pages(lang, key, ids):
+            yield path, self._render_page(lang, template, root, variables)
+
+    def export_unit(
+        self,
+        output_path: Path,
+        manifest: dict[str, PageRecord] | None,
+        lang: str,
+        key: str | None,
+        ids: list[Any] | None = None,
+    ) -> tuple[dict[str, PageRecord], ExportStats]:
+        # Returns the record of every page of the unit when there is a manifest, along with what had to be done for them
+        pages = {}
+        stats = ExportStats()
+        for path, template, root, variables in self._get_unit_pages(lang, key, ids):
+            page_path = f'{lang}/{path}'
+            record = manifest.get(page_path) if manifest is not None else None
+            if (
+                record is not None
+                and (output_path / page_path).exists()
+                and self._get_digests().is_current(lang, record)
+            ):
+                pages[page_path] = record
+                continue
+            contents = self._render_page(lang, template, root, variables)
+            if key is not None:
+                if ids is None:
+                    self.reads.collections.add(key)
+                else:
+                    self.reads.entries.add(variables['key'])
+                    self.reads.references.add(variables['key'])
+            self._write_page(output_path / page_path, contents, stats)
+            if manifest is not None:
+                pages[page_path] = self._get_digests().record(lang, template, self.reads)
+            stats.rendered += 1
+        return pages, stats
+
+    def _get_units(self, lang: str) -> Iterable[tuple[str, str | None, list[Any] | None]]:
+        # A unit is either the index of a language, the index of one of its collections or some of the entries in it
+        yield lang, None, None
+        for key, _ in COLLECTIONS:
+            yield lang, key, None
+            ids = list(getattr(self.game_db, key))
+            for i in range(0, len(ids), CHUNK_SIZE):
+                yield lang, key, ids[i:i + CHUNK_SIZE]
+
+    def _get_unit_pages(
+        self,
+        lang: str,
+        key: str | None,
+        ids: list[Any] | None,
+    ) -> Iterable[tuple[str, str, str, dict[str, Any]]]:
+        # The path, template, root and variables of each page of a unit
+        if key is None:
+            yield 'index.html', 'index.html', '../', {'key': ''}
+            return
+        entry_name = dict(COLLECTIONS)[key]
+        if ids is None:
+            yield f'{key}/index.html', f'{entry_name}_index.html', '../../', {'key': key}
+            return
+        entries = getattr(self.game_db, key)
+        for entry_id in ids:
+            entry = entries[entry_id]
+            variables = {'key': entry.key, entry_name: entry}
+            yield f'{entry.key}/index.html', f'{entry_name}_view.html', '../../../', variables
+
+    def _render_page(self, lang: str, template: str, root: str, variables: dict[str, Any]) -> str:
+        # Every language and root share the same compiled templates, which are given both when rendering
+        self.reads.clear()
+        return self._get_env().get_template(template).render(lang=lang, root=root, **variables)
+
+    def _export_units_parallel(
+        self,
+        output_path: Path,
+        manifest: dict[str, PageRecord] | None,
+        workers: int,
+    ) -> list[tuple[dict[str, PageRecord], ExportStats]]:
+        # Each worker renders, minifies and writes the pages of the units it is given, so that only their records are
+        # sent back. Forked workers inherit the game database and manifest rather than unpickling their own copies.
+        units = [unit for language in LANGUAGES for unit in self._get_units(language)]
+        logger.info(f'Processing pages in {len(units)} units across {workers} workers')
+        mp_context = multiprocessing.get_context('fork') if 'fork' in multiprocessing.get_all_start_methods() else None
+        init_args = (self.game_db, self.minify_cache, self.bytecode_cache, manifest)
+        with ProcessPoolExecutor(workers, mp_context, _init_worker, init_args) as executor:
+            futures = [executor.submit(_export_unit, output_path, *unit) for unit in units]
+            return [future.result() for future in futures]
+
+    def _remove_stale_files(self, output_path: Path) -> int:
+        # Removes the files of the output directory which were not exported, such as the pages of deleted entries
+        exported = {'index.html', *RESOURCES}
+        exported.update(f'images/{p.relative_to(IMAGES_PATH).as_posix()}' for p in IMAGES_PATH.rglob('*'))
+        for language in LANGUAGES:
+            for unit in self._get_units(language):
+                exported.update(f'{language}/{path}' for path, _, _, _ in self._get_unit_pages(*unit))
+        removed = 0
+        # Deepest first, so that directories are emptied before being checked
+        for path in sorted(output_path.rglob('*'), key=lambda p: len(p.parts), reverse=True):
+            if path.is_dir():
+                if not any(path.iterdir()):
+                    path.rmdir()
+            elif path.relative_to(output_path).as_posix() not in exported:
+                path.unlink()
+                removed += 1
+        return removed
+
+    def _get_digests(self) -> InputDigests:
+        if self._digests is None:
+            self._digests = InputDigests(self.game_db, self._get_env())
+        return self._digests
+
+    def _get_env(self) -> Environment:
+        if self._env is None:
+            self._env = self._build_env()
+        return self._env
+
+    def _build_env(self) -> Environment:
+        # With a bytecode cache, templates compiled by a previous export are loaded rather than compiled again
         env = Environment(
             loader=PackageLoader('shadow_compass'),
             autoescape=select_autoescape(),
             auto_reload=False,
             undefined=Undefined,
+            bytecode_cache=self.bytecode_cache,
         )
         env.globals['game'] = self.game_db
-        env.globals['lang'] = lang
-        env.globals['root'] = root
+        env.globals['reads'] = self.reads
+        env.globals['renderer'] = self.renderer
         env.globals['log'] = logger.warning
         env.filters['a'] = _a
         env.filters['c'] = _c
@@ -106,20 +291,26 @@ class HtmlExporter:
         env.filters['u'] = _u
         env.filters['_'] = _translate
         env.filters['_sort'] = _translatesort
+        env.filters['conditions'] = _conditions
+        env.filters['effects'] = _effects
         env.filters['gametext'] = _gametext
         env.filters['slotnum'] = _slotnum
         return env
 
-    @staticmethod
-    def _write_page(file_path: Path, contents):
-        contents = minify_html.minify(
-            contents,
-            minify_css=True,
-            minify_js=True,
-        )
-        if not file_path.parent.exists():
-            file_path.parent.mkdir(parents=True, exist_ok=True)
-        file_path.write_text(contents, encoding='utf-8')
+    def _write_page(self, file_path: Path, contents: str, stats: ExportStats):
+        if self.minify_cache is not None:
+            key = self.minify_cache.get_key(contents)
+            stats.minify_keys.add(key)
+            minified = self.minify_cache.load(key)
+            if minified is None:
+                minified = minify(contents)
+                self.minify_cache.save(key, minified)
+            else:
+                stats.minify_hits += 1
+        else:
+            minified = minify(contents)
+        if not _write_if_changed(file_path, minified):
+            stats.write_skips += 1
 
     @staticmethod
     def _get_resources() -> Iterable[tuple[str, bytes]]:
@@ -127,67 +318,132 @@ class HtmlExporter:
             yield resource, (RESOURCES_PATH / resource).read_bytes()
 
 
+_worker_exporter: HtmlExporter | None = None
+_worker_manifest: dict[str, PageRecord] | None = None
+
+
+def _init_worker(
+    game_db: GameDb,
+    minify_cache: MinifyCache | None,
+    bytecode_cache: BytecodeCache | None,
+    manifest: dict[str, PageRecord] | None,
+) -> None:
+    global _worker_exporter, _worker_manifest
+    _worker_exporter = HtmlExporter(game_db, minify_cache, bytecode_cache)
+    _worker_manifest = manifest
+
+
+def _export_unit(
+    output_path: Path,
+    lang: str,
+    key: str | None,
+    ids: list[Any] | None,
+) -> tuple[dict[str, PageRecord], ExportStats]:
+    # Set up by _init_worker in every worker process before any unit is submitted to it
+    assert _worker_exporter is not None
+    return _worker_exporter.export_unit(output_path, _worker_manifest, lang, key, ids)
+
+
+def _write_if_changed(file_path: Path, contents: bytes) -> bool:
+    # Files are left untouched when unchanged, so that their modification time only changes along with their contents
+    try:
+        if file_path.stat().st_size == len(contents) and file_path.read_bytes() == contents:
+            return False
+    except FileNotFoundError:
+        pass
+    if not file_path.parent.exists():
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+    file_path.write_bytes(contents)
+    return True
+
+
+def _copy_if_changed(src: str, dst: str) -> None:
+    # Images copied by a previous export keep the size and modification time of their source
+    src_stat = os.stat(src)
+    try:
+        dst_stat = os.stat(dst)
+    except FileNotFoundError:
+        pass
+    else:
+        if dst_stat.st_size == src_stat.st_size and dst_stat.st_mtime_ns == src_stat.st_mtime_ns:
+            return
+    shutil.copy2(src, dst)
+
+
 @pass_context
 def _a(ctx: Context, entry: Any) -> Markup:
     if isinstance(entry, Undefined):
         return Markup('???')
     elif isinstance(entry, Entry):
-        return Markup(f'<a href="{ctx['root']}{escape(_lang(ctx))}/{escape(entry.key)}/">{escape(_translate(ctx, entry.label))}</a>')
+        renderer: FragmentRenderer = ctx['renderer']
+        return renderer.link(ctx['lang'], ctx['root'], entry)
     raise ValueError(f'Unexpected entry type: {type(entry)}')
 
 
 @pass_context
 def _c(ctx: Context, card_id: int) -> Markup:
-    game: GameDb = ctx['game']
-    return _a(ctx, game.cards.get(card_id) or Undefined(f'Card {card_id}'))
+    return _link_to(ctx, 'cards', card_id)
 
 
 @pass_context
 def _e(ctx: Context, event_id: int) -> Markup:
-    game: GameDb = ctx['game']
-    return _a(ctx, game.events.get(event_id) or Undefined(f'Event {event_id}'))
+    return _link_to(ctx, 'events', event_id)
 
 
 @pass_context
 def _l(ctx: Context, loot_id: int) -> Markup:
-    game: GameDb = ctx['game']
-    return _a(ctx, game.loots.get(loot_id) or Undefined(f'Loot {loot_id}'))
+    return _link_to(ctx, 'loots', loot_id)
 
 
 @pass_context
 def _o(ctx: Context, ending_id: int) -> Markup:
-    game: GameDb = ctx['game']
-    return _a(ctx, game.endings.get(ending_id) or Undefined(f'Ending {ending_id}'))
+    return _link_to(ctx, 'endings', ending_id)
 
 
 @pass_context
 def _r(ctx: Context, rite_id: int) -> Markup:
-    game: GameDb = ctx['game']
-    return _a(ctx, game.rites.get(rite_id) or Undefined(f'Rite {rite_id}'))
+    return _link_to(ctx, 'rites', rite_id)
 
 
 @pass_context
 def _t(ctx: Context, tag: str) -> Markup:
-    game: GameDb = ctx['game']
-    return _a(ctx, game.tags.get(tag) or Undefined(f'Tag {tag}'))
+    return _link_to(ctx, 'tags', tag)
 
 
 @pass_context
 def _u(ctx: Context, upgrade_id: int) -> Markup:
-    game: GameDb = ctx['game']
-    return _a(ctx, game.upgrades.get(upgrade_id) or Undefined(f'Upgrade {upgrade_id}'))
+    return _link_to(ctx, 'upgrades', upgrade_id)
+
+
+def _link_to(ctx: Context, collection: str, entry_id: Any) -> Markup:
+    renderer: FragmentRenderer = ctx['renderer']
+    return renderer.link_to(ctx['lang'], ctx['root'], collection, entry_id)
 
 
 @pass_context
 def _translate(ctx: Context, loc: Loc) -> str:
-    game: GameDb = ctx['game']
-    return game.trans(loc, _lang(ctx))
+    renderer: FragmentRenderer = ctx['renderer']
+    return renderer.translate(_lang(ctx), loc)
 
 
 @pass_context
 def _translatesort(ctx: Context, entries: Iterable[Entry]) -> list[Entry]:
     game: GameDb = ctx['game']
-    return game.sort(entries, _lang(ctx))
+    sorted_entries = game.sort(entries, _lang(ctx))
+    ctx['reads'].entries.update(entry.key for entry in sorted_entries)
+    return sorted_entries
+
+
+@pass_context
+def _conditions(ctx: Context, conds: Iterable[Condition]) -> Markup:
+    renderer: FragmentRenderer = ctx['renderer']
+    return renderer.get_context(ctx['lang'], ctx['root']).conditions(conds)
+
+
+@pass_context
+def _effects(ctx: Context, effs: Iterable[Effect]) -> Markup:
+    renderer: FragmentRenderer = ctx['renderer']
+    return renderer.get_context(ctx['lang'], ctx['root']).effects(effs)
 
 
 def _gametext(text: str) -> Markup:
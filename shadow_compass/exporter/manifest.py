@@ -0,0 +1,218 @@
+import hashlib
+import logging
+from dataclasses import dataclass, field, fields, is_dataclass
+from enum import Enum
+from pathlib import Path
+from typing import Any
+
+from jinja2 import Environment, meta
+
+from shadow_compass.cache import GAME_DB_SOURCE_PATHS, PACKAGE_PATH, SCHEMA_SOURCE_PATHS, compute_fingerprint, \
+    load_cached, save_cached
+from shadow_compass.game_db import Entry, GameDb
+from shadow_compass.reference_graph import Relation
+
+logger = logging.getLogger(__name__)
+
+# Records what each exported page was rendered from, so that a later export only renders the pages whose inputs changed.
+#
+# Each page lists the entries it read, including those it only linked to or sorted, along with the collections whose
+# members it listed and the loc IDs it translated. Its digest covers the current value of each of those inputs and of
+# the templates it was rendered from, and is compared against the digest of the same inputs on the next export.
+#
+# The entity of an entry is tracked apart from the lists of linked entries it holds, including its back-references.
+# Pages which only link to an entry read its entity, while the page of the entry itself also reads its lists. A rite
+# which starts referring to a card then renders the page of that card again, but not every page linking to it.
+
+# Sources which determine how pages are rendered from their inputs, so a change to any of them invalidates every page
+EXPORT_SOURCE_PATHS = (
+    PACKAGE_PATH / 'exporter',
+    PACKAGE_PATH / 'card_table.py',
+    PACKAGE_PATH / 'collation.py',
+    PACKAGE_PATH / 'reference_graph.py',
+    PACKAGE_PATH / 'resources.py',
+    *GAME_DB_SOURCE_PATHS,
+    *SCHEMA_SOURCE_PATHS,
+)
+
+
+@dataclass
+class PageReads:
+    # Inputs read while rendering the current page
+    entries: set[str] = field(default_factory=set)
+    references: set[str] = field(default_factory=set)
+    collections: set[str] = field(default_factory=set)
+    loc_ids: set[str] = field(default_factory=set)
+
+    def clear(self) -> None:
+        self.entries.clear()
+        self.references.clear()
+        self.collections.clear()
+        self.loc_ids.clear()
+
+
+@dataclass(frozen=True)
+class PageRecord:
+    template: str
+    entries: tuple[str, ...]
+    references: tuple[str, ...]
+    collections: tuple[str, ...]
+    loc_ids: tuple[str, ...]
+    digest: str
+
+
+def get_export_fingerprint(game_db: GameDb) -> str:
+    digest = hashlib.sha256(compute_fingerprint(EXPORT_SOURCE_PATHS).encode())
+    for resource in sorted(game_db.image_resources):
+        digest.update(f'{resource}\0'.encode())
+    return digest.hexdigest()
+
+
+def load_manifest(path: Path, fingerprint: str) -> dict[str, PageRecord] | None:
+    return load_cached(path, fingerprint)
+
+
+def save_manifest(path: Path, fingerprint: str, pages: dict[str, PageRecord]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    save_cached(path, fingerprint, pages)
+
+
+class InputDigests:
+    # Digests of the current value of each input, computed the first time a page reads it
+    game_db: GameDb
+    env: Environment
+    _entries: dict[str, Entry]
+    _entry_digests: dict[str, str]
+    _reference_digests: dict[str, str]
+    _collection_digests: dict[str, str]
+    _template_digests: dict[str, str]
+    _template_sources: dict[str, tuple[str, list[str]]]
+
+    def __init__(self, game_db: GameDb, env: Environment) -> None:
+        self.game_db = game_db
+        self.env = env
+        self._entries = {entry.key: entry for entry in game_db.entries}
+        self._entry_digests = {}
+        self._reference_digests = {}
+        self._collection_digests = {}
+        self._template_digests = {}
+        self._template_sources = {}
+
+    def record(self, lang: str, template: str, reads: PageReads) -> PageRecord:
+        entries = tuple(sorted(reads.entries))
+        references = tuple(sorted(reads.references))
+        collections = tuple(sorted(reads.collections))
+        loc_ids = tuple(sorted(reads.loc_ids))
+        digest = self.get_page_digest(lang, template, entries, references, collections, loc_ids)
+        return PageRecord(template, entries, references, collections, loc_ids, digest)
+
+    def is_current(self, lang: str, record: PageRecord) -> bool:
+        digest = self.get_page_digest(
+            lang, record.template, record.entries, record.references, record.collections, record.loc_ids
+        )
+        return digest == record.digest
+
+    def get_page_digest(
+        self,
+        lang: str,
+        template: str,
+        entries: tuple[str, ...],
+        references: tuple[str, ...],
+        collections: tuple[str, ...],
+        loc_ids: tuple[str, ...],
+    ) -> str:
+        digest = hashlib.sha256(f'{lang}\0{self._get_template_digest(template)}\0'.encode())
+        for key in entries:
+            digest.update(f'{key}\0{self._get_entry_digest(key)}\0'.encode())
+        for key in references:
+            digest.update(f'{key}\0{self._get_reference_digest(key)}\0'.encode())
+        for key in collections:
+            digest.update(f'{key}\0{self._get_collection_digest(key)}\0'.encode())
+        loc_table = self.game_db.loc_table
+        for loc_id in loc_ids:
+            # Untranslated loc IDs fall back to the text of their entities, which are covered by the entries
+            digest.update(f'{loc_id}\0{loc_table.get(loc_id, lang)}\0'.encode())
+        return digest.hexdigest()
+
+    def _get_entry_digest(self, key: str) -> str:
+        entry_digest = self._entry_digests.get(key)
+        if entry_digest is None:
+            entry = self._entries.get(key)
+            # Pages which looked up a missing entry are rendered again once it exists
+            value = None if entry is None else _describe_entry(entry, references=False)
+            entry_digest = self._entry_digests[key] = hashlib.sha256(repr(value).encode()).hexdigest()
+        return entry_digest
+
+    def _get_reference_digest(self, key: str) -> str:
+        reference_digest = self._reference_digests.get(key)
+        if reference_digest is None:
+            entry = self._entries.get(key)
+            value = None if entry is None else _describe_entry(entry, references=True)
+            reference_digest = self._reference_digests[key] = hashlib.sha256(repr(value).encode()).hexdigest()
+        return reference_digest
+
+    def _get_collection_digest(self, key: str) -> str:
+        collection_digest = self._collection_digests.get(key)
+        if collection_digest is None:
+            entry_keys = '\0'.join(entry.key for entry in getattr(self.game_db, key).values())
+            collection_digest = self._collection_digests[key] = hashlib.sha256(entry_keys.encode()).hexdigest()
+        return collection_digest
+
+    def _get_template_digest(self, name: str) -> str:
+        # Covers the template along with every template it extends, includes or imports
+        template_digest = self._template_digests.get(name)
+        if template_digest is None:
+            digest = hashlib.sha256()
+            pending = [name]
+            seen = set()
+            while pending:
+                template_name = pending.pop()
+                if template_name in seen:
+                    continue
+                seen.add(template_name)
+                source, referenced_names = self._get_template_source(template_name)
+                digest.update(f'{template_name}\0{source}\0'.encode())
+                pending.extend(referenced_names)
+            template_digest = self._template_digests[name] = digest.hexdigest()
+        return template_digest
+
+    def _get_template_source(self, name: str) -> tuple[str, list[str]]:
+        # Each template is only parsed once, as the same ones are shared by most of the others
+        template_source = self._template_sources.get(name)
+        if template_source is None:
+            assert self.env.loader is not None
+            source, _, _ = self.env.loader.get_source(self.env, name)
+            referenced_names = [n for n in meta.find_referenced_templates(self.env.parse(source)) if n is not None]
+            template_source = self._template_sources[name] = (source, referenced_names)
+        return template_source
+
+
+def _describe_entry(entry: Entry, references: bool) -> Any:
+    # Either the entity of the entry or its lists of linked entries, which are the only lists it holds
+    value = [type(entry).__name__]
+    for f in fields(entry):
+        if f.name not in ('graph', 'node'):
+            field_value = getattr(entry, f.name)
+            if isinstance(field_value, list) == references:
+                value.append((f.name, _describe(field_value)))
+    if references:
+        for relation in Relation:
+            value.append((relation.name, [source.key for source in entry.graph.get_sources(relation, entry.node)]))
+    return value
+
+
+def _describe(value: Any) -> Any:
+    # Every field of the entities is described rather than relying on their repr, which only shows their ID
+    if isinstance(value, Entry):
+        return value.key
+    elif isinstance(value, Enum):
+        return type(value).__name__, value.value
+    elif is_dataclass(value):
+        return type(value).__name__, [_describe(getattr(value, f.name)) for f in fields(value)]
+    elif isinstance(value, dict):
+        return [(_describe(k), _describe(v)) for k, v in value.items()]
+    elif isinstance(value, (list, tuple)):
+        return [_describe(v) for v in value]
+    elif isinstance(value, (set, frozenset)):
+        return sorted(repr(_describe(v)) for v in value)
+    return value
@@ -0,0 +1,69 @@
+import hashlib
+import logging
+import os
+from importlib import metadata
+from pathlib import Path
+from typing import Iterable
+
+import minify_html
+
+logger = logging.getLogger(__name__)
+
+# Minified pages stored under a digest of the HTML they were minified from, so that a page whose HTML did not change is
+# not minified again. Each entry is a file of its own, which lets the workers of a parallel export share the cache.
+
+MINIFY_OPTIONS = {
+    'minify_css': True,
+    'minify_js': True,
+}
+
+
+def minify(contents: str) -> bytes:
+    return minify_html.minify(contents, **MINIFY_OPTIONS).encode('utf-8')
+
+
+class MinifyCache:
+    path: Path
+    # Mixed into every digest, so that entries minified by another version or with other options are never used
+    _salt: bytes
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        try:
+            version = metadata.version('minify_html')
+        except metadata.PackageNotFoundError:
+            version = ''
+        self._salt = f'{version}\0{sorted(MINIFY_OPTIONS.items())}\0'.encode()
+
+    def get_key(self, contents: str) -> str:
+        return hashlib.sha256(self._salt + contents.encode('utf-8')).hexdigest()
+
+    def load(self, key: str) -> bytes | None:
+        try:
+            return self._get_entry_path(key).read_bytes()
+        except FileNotFoundError:
+            return None
+
+    def save(self, key: str, minified: bytes) -> None:
+        entry_path = self._get_entry_path(key)
+        entry_path.parent.mkdir(parents=True, exist_ok=True)
+        # Written under a name of its own first, as another worker may be saving the same page
+        tmp_path = entry_path.with_name(f'{entry_path.name}.{os.getpid()}.tmp')
+        tmp_path.write_bytes(minified)
+        os.replace(tmp_path, entry_path)
+
+    def prune(self, keys: Iterable[str]) -> int:
+        # Removes every entry other than the given ones, which would otherwise build up with each changed page. Only
+        # done after every page was rendered, since the pages skipped by an incremental export use none of them.
+        kept = set(keys)
+        removed = 0
+        if not self.path.exists():
+            return removed
+        for entry_path in self.path.glob('*/*'):
+            if entry_path.name not in kept:
+                entry_path.unlink(missing_ok=True)
+                removed += 1
+        return removed
+
+    def _get_entry_path(self, key: str) -> Path:
+        return self.path / key[:2] / key
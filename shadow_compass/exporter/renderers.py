@@ -0,0 +1,1053 @@
+import logging
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, TypeVar
+
+from markupsafe import Markup, escape
+
+from shadow_compass.exporter.manifest import PageReads
+from shadow_compass.game_db import Entry, GameDb
+from shadow_compass.loc import Loc
+from shadow_compass.schema import condition, effect, formula
+from shadow_compass.schema.enums import Comparator
+
+logger = logging.getLogger(__name__)
+
+# Markup of the conditions, effects and formulas shown on the pages, rendered in Python rather than by a template macro
+# dispatching on the class of each one.
+#
+# Each class has a renderer of its own, registered under it. The same conditions and effects are shared by many entries,
+# so the markup of each one is only rendered once per language and root, along with the inputs it read, which are added
+# to those of every page it is shown on.
+#
+# Each fragment starts and ends with whitespace wherever the macros it replaces did. The pages are minified, which
+# collapses any run of whitespace into a single space, so only where the whitespace is matters rather than how much.
+
+T = TypeVar('T')
+RenderFunc = Callable[['RenderContext', Any], str]
+
+condition_renderers: dict[type[condition.Condition], RenderFunc] = {}
+effect_renderers: dict[type[effect.Effect], RenderFunc] = {}
+change_renderers: dict[type[effect.CardChange], RenderFunc] = {}
+element_renderers: dict[type[formula.FormulaElement], RenderFunc] = {}
+
+
+def renderer(
+    renderers: dict[Any, RenderFunc], *classes: type[T]
+) -> Callable[[Callable[['RenderContext', T], str]], Callable[['RenderContext', T], str]]:
+    # Registers a renderer for each of the classes, which takes any of them
+    def decorator(func: Callable[['RenderContext', T], str]) -> Callable[['RenderContext', T], str]:
+        for cls in classes:
+            renderers[cls] = func
+        return func
+    return decorator
+
+
+@dataclass(frozen=True)
+class Fragment:
+    # The object is kept alive along with its markup, so that its ID is never reused by another one
+    value: Any
+    markup: Markup
+    entries: frozenset[str]
+    loc_ids: frozenset[str]
+
+
+class FragmentRenderer:
+    game_db: GameDb
+    # Inputs read by the page being rendered, or by the fragment being rendered for it
+    reads: PageReads
+    # Markup of each link, along with the entry and loc ID it was built from
+    links: dict[tuple[Any, ...], tuple[Markup, str, str | None]]
+    _fragments: dict[tuple[str, int, str, str], Fragment]
+    _contexts: dict[tuple[str, str], 'RenderContext']
+
+    def __init__(self, game_db: GameDb, reads: PageReads) -> None:
+        self.game_db = game_db
+        self.reads = reads
+        self.links = {}
+        self._fragments = {}
+        self._contexts = {}
+
+    def get_context(self, lang: str, root: str) -> 'RenderContext':
+        context = self._contexts.get((lang, root))
+        if context is None:
+            context = self._contexts[lang, root] = RenderContext(self, lang, root)
+        return context
+
+    def link(self, lang: str, root: str, entry: Entry) -> Markup:
+        return self._read_link((lang, root, entry.key), lang, root, entry, entry.key)
+
+    def link_to(self, lang: str, root: str, collection: str, entry_id: Any) -> Markup:
+        # Looked up by ID only once per language and root, including for IDs which have no entry
+        key = (lang, root, collection, entry_id)
+        link = self.links.get(key)
+        if link is not None:
+            markup, entry_key, loc_id = link
+            self._record_link(entry_key, loc_id)
+            return markup
+        entry = getattr(self.game_db, collection).get(entry_id)
+        # Missing entries are recorded under the key they would have, so that the page is rendered again once they exist
+        return self._read_link(key, lang, root, entry, entry.key if entry is not None else f'{collection}/{entry_id}')
+
+    def translate(self, lang: str, loc: Loc) -> str:
+        self.reads.loc_ids.add(loc.loc_id)
+        return self.game_db.trans(loc, lang)
+
+    def render(self, kind: str, lang: str, root: str, value: Any, render_func: RenderFunc) -> Markup:
+        # Keyed by kind as well, as the same empty tuple may hold either conditions or effects
+        key = (kind, id(value), lang, root)
+        fragment = self._fragments.get(key)
+        if fragment is None:
+            page_reads = self.reads
+            self.reads = PageReads()
+            try:
+                markup = Markup(render_func(self.get_context(lang, root), value))
+            finally:
+                fragment_reads, self.reads = self.reads, page_reads
+            fragment = self._fragments[key] = Fragment(
+                value, markup, frozenset(fragment_reads.entries), frozenset(fragment_reads.loc_ids)
+            )
+        self.reads.entries.update(fragment.entries)
+        self.reads.loc_ids.update(fragment.loc_ids)
+        return fragment.markup
+
+    def _read_link(self, key: tuple[Any, ...], lang: str, root: str, entry: Entry | None, entry_key: str) -> Markup:
+        # Links are the same wherever they appear, so each one is only built once per language and root
+        link = self.links.get(key)
+        if link is None:
+            if entry is None:
+                link = Markup('???'), entry_key, None
+            else:
+                label = entry.label
+                text = self.game_db.trans(label, lang)
+                markup = Markup(f'<a href="{root}{escape(lang)}/{escape(entry_key)}/">{escape(text)}</a>')
+                link = markup, entry_key, label.loc_id
+            self.links[key] = link
+        markup, entry_key, loc_id = link
+        self._record_link(entry_key, loc_id)
+        return markup
+
+    def _record_link(self, entry_key: str, loc_id: str | None) -> None:
+        self.reads.entries.add(entry_key)
+        if loc_id is not None:
+            self.reads.loc_ids.add(loc_id)
+
+
+@dataclass(frozen=True)
+class RenderContext:
+    # Language and root the fragments are rendered for, with a helper linking to each type of entry
+    renderer: FragmentRenderer
+    lang: str
+    root: str
+
+    def card(self, card_id: Any) -> Markup:
+        return self.renderer.link_to(self.lang, self.root, 'cards', card_id)
+
+    def event(self, event_id: Any) -> Markup:
+        return self.renderer.link_to(self.lang, self.root, 'events', event_id)
+
+    def loot(self, loot_id: Any) -> Markup:
+        return self.renderer.link_to(self.lang, self.root, 'loots', loot_id)
+
+    def ending(self, ending_id: Any) -> Markup:
+        return self.renderer.link_to(self.lang, self.root, 'endings', ending_id)
+
+    def rite(self, rite_id: Any) -> Markup:
+        return self.renderer.link_to(self.lang, self.root, 'rites', rite_id)
+
+    def tag(self, tag: Any) -> Markup:
+        return self.renderer.link_to(self.lang, self.root, 'tags', tag)
+
+    def upgrade(self, upgrade_id: Any) -> Markup:
+        return self.renderer.link_to(self.lang, self.root, 'upgrades', upgrade_id)
+
+    def trans(self, loc: Loc) -> str:
+        return self.renderer.translate(self.lang, loc)
+
+    def conditions(self, conds: Iterable[condition.Condition]) -> Markup:
+        return self.renderer.render('conditions', self.lang, self.root, conds, _render_conditions)
+
+    def condition(self, cond: condition.Condition) -> Markup:
+        return self.renderer.render('condition', self.lang, self.root, cond, _render_condition)
+
+    def effects(self, effs: Iterable[effect.Effect]) -> Markup:
+        return self.renderer.render('effects', self.lang, self.root, effs, _render_effects)
+
+    def effect(self, eff: effect.Effect) -> Markup:
+        return self.renderer.render('effect', self.lang, self.root, eff, _render_effect)
+
+    def formula(self, elements: Iterable[formula.FormulaElement]) -> Markup:
+        return Markup(''.join(_dispatch(element_renderers, 'element', self, element) for element in elements) + ' ')
+
+
+def _render_conditions(ctx: RenderContext, conds: Iterable[condition.Condition]) -> str:
+    items = ''.join(f' <li>{ctx.condition(cond)}</li>' for cond in conds)
+    return Markup(f' <ul class="conditions">{items} </ul> ')
+
+
+def _render_condition(ctx: RenderContext, cond: condition.Condition) -> str:
+    return _dispatch(condition_renderers, 'condition', ctx, cond)
+
+
+def _render_effects(ctx: RenderContext, effs: Iterable[effect.Effect]) -> str:
+    items = ''.join(f' <li>{ctx.effect(eff)}</li>' for eff in effs)
+    return Markup(f' <ul class="effects">{items} </ul> ')
+
+
+def _render_effect(ctx: RenderContext, eff: effect.Effect) -> str:
+    return _dispatch(effect_renderers, 'effect', ctx, eff)
+
+
+def _dispatch(renderers: dict[type[T], RenderFunc], kind: str, ctx: RenderContext, value: T) -> Markup:
+    render_func = renderers.get(type(value))
+    if render_func is None:
+        cls = type(value).__name__
+        logger.warning(f'Unknown {kind}: {cls}')
+        return Markup(f' <strong>Unknown {kind}:</strong> <code>{cls}</code> ')
+    return Markup(f' {render_func(ctx, value)} ')
+
+
+def _compare(comparator: Comparator, value: Any) -> Markup:
+    # The comparator of a condition directly followed by its value
+    return Markup(f'{escape(comparator.label)}{value}')
+
+
+def _join(values: Iterable[Any]) -> Markup:
+    return Markup(', ').join(values)
+
+
+@renderer(element_renderers, formula.OperatorFormulaElement)
+def _render_operator_element(ctx: RenderContext, element: formula.OperatorFormulaElement) -> str:
+    return escape(element.operator)
+
+
+@renderer(element_renderers, formula.CounterFormulaElement)
+def _render_counter_element(ctx: RenderContext, element: formula.CounterFormulaElement) -> str:
+    return Markup(f'Counter ({element.counter_id})')
+
+
+@renderer(element_renderers, formula.GlobalCounterFormulaElement)
+def _render_global_counter_element(ctx: RenderContext, element: formula.GlobalCounterFormulaElement) -> str:
+    return Markup(f'Global Counter ({element.counter_id})')
+
+
+@renderer(element_renderers, formula.LiteralFormulaElement)
+def _render_literal_element(ctx: RenderContext, element: formula.LiteralFormulaElement) -> str:
+    return escape(element.value)
+
+
+@renderer(element_renderers, formula.RarityFormulaElement)
+def _render_rarity_element(ctx: RenderContext, element: formula.RarityFormulaElement) -> str:
+    return 'Rarity'
+
+
+@renderer(element_renderers, formula.SlotRarityFormulaElement)
+def _render_slot_rarity_element(ctx: RenderContext, element: formula.SlotRarityFormulaElement) -> str:
+    return Markup(f'Slot #{element.slot} Rarity')
+
+
+@renderer(element_renderers, formula.SlotTagFormulaElement)
+def _render_slot_tag_element(ctx: RenderContext, element: formula.SlotTagFormulaElement) -> str:
+    return Markup(f'Slot #{element.slot} Tag Count ({ctx.tag(element.tag)})')
+
+
+@renderer(element_renderers, formula.TagFormulaElement)
+def _render_tag_element(ctx: RenderContext, element: formula.TagFormulaElement) -> str:
+    return Markup(f'Tag Count ({ctx.tag(element.tag)})')
+
+
+@renderer(element_renderers, formula.EnemyFormulaElement)
+def _render_enemy_element(ctx: RenderContext, element: formula.EnemyFormulaElement) -> str:
+    return Markup(f'Opposing ({ctx.formula(element.elements)})')
+
+
+@renderer(condition_renderers, condition.NotCondition)
+def _render_not_condition(ctx: RenderContext, cond: condition.NotCondition) -> str:
+    return Markup(f'Not: {ctx.condition(cond.condition)}')
+
+
+@renderer(condition_renderers, condition.AllCondition)
+def _render_all_condition(ctx: RenderContext, cond: condition.AllCondition) -> str:
+    return Markup(f'All: {ctx.conditions(cond.value)}')
+
+
+@renderer(condition_renderers, condition.AnyCondition)
+def _render_any_condition(ctx: RenderContext, cond: condition.AnyCondition) -> str:
+    return Markup(f'Any: {ctx.conditions(cond.value)}')
+
+
+@renderer(condition_renderers, condition.DifficultyCondition)
+def _render_difficulty_condition(ctx: RenderContext, cond: condition.DifficultyCondition) -> str:
+    return Markup(f'Difficulty: {cond.value}')
+
+
+@renderer(condition_renderers, condition.IsCondition)
+def _render_is_condition(ctx: RenderContext, cond: condition.IsCondition) -> str:
+    return Markup(f'Card: {ctx.card(cond.value)}')
+
+
+@renderer(condition_renderers, condition.IsRiteCondition)
+def _render_is_rite_condition(ctx: RenderContext, cond: condition.IsRiteCondition) -> str:
+    return Markup(f'Rite: {ctx.rite(cond.value)}')
+
+
+@renderer(condition_renderers, condition.LootCondition)
+def _render_loot_condition(ctx: RenderContext, cond: condition.LootCondition) -> str:
+    return Markup(f'Loot: {ctx.rite(cond.value)}')
+
+
+@renderer(condition_renderers, condition.RarityCondition)
+def _render_rarity_condition(ctx: RenderContext, cond: condition.RarityCondition) -> str:
+    return Markup(f'Rarity: {_compare(cond.comparator, escape(cond.value.label))}')
+
+
+@renderer(condition_renderers, condition.TypeCondition)
+def _render_type_condition(ctx: RenderContext, cond: condition.TypeCondition) -> str:
+    return Markup(f'Type: {escape(cond.value.label)}')
+
+
+@renderer(condition_renderers, condition.RoundCondition)
+def _render_round_condition(ctx: RenderContext, cond: condition.RoundCondition) -> str:
+    return Markup(f'Day: {_compare(cond.comparator, cond.value)}')
+
+
+@renderer(condition_renderers, condition.FormulaCondition)
+def _render_formula_condition(ctx: RenderContext, cond: condition.FormulaCondition) -> str:
+    return Markup(f'Formula: {ctx.formula(cond.elements)} {escape(cond.comparator.label)} {cond.value}')
+
+
+@renderer(condition_renderers, condition.RollCondition)
+def _render_roll_condition(ctx: RenderContext, cond: condition.RollCondition) -> str:
+    return Markup(f'Roll #{cond.roll}: {ctx.formula(cond.elements)} {escape(cond.comparator.label)} {cond.value}')
+
+
+@renderer(condition_renderers, condition.CardCostCondition)
+def _render_card_cost_condition(ctx: RenderContext, cond: condition.CardCostCondition) -> str:
+    if cond.is_multi_value and isinstance(cond.value, tuple):
+        value = Markup(f'one of {_join(cond.value)}')
+    else:
+        value = _compare(cond.comparator, cond.value)
+    return Markup(f'Card Cost ({ctx.card(cond.value)}): {value}')
+
+
+@renderer(condition_renderers, condition.CounterCondition)
+def _render_counter_condition(ctx: RenderContext, cond: condition.CounterCondition) -> str:
+    return Markup(f'Counter ({cond.counter_id}): {_compare(cond.comparator, cond.value)}')
+
+
+@renderer(condition_renderers, condition.GlobalCounterCondition)
+def _render_global_counter_condition(ctx: RenderContext, cond: condition.GlobalCounterCondition) -> str:
+    return Markup(f'Global Counter ({cond.counter_id}): {_compare(cond.comparator, cond.value)}')
+
+
+@renderer(condition_renderers, condition.HaveCardCondition)
+def _render_have_card_condition(ctx: RenderContext, cond: condition.HaveCardCondition) -> str:
+    return Markup(f'Have Card ({ctx.card(cond.card_id)}): {_compare(cond.comparator, cond.value)}')
+
+
+@renderer(condition_renderers, condition.HaveCardLifetimeCondition)
+def _render_have_card_lifetime_condition(ctx: RenderContext, cond: condition.HaveCardLifetimeCondition) -> str:
+    return Markup(f'Have Card ({ctx.card(cond.card_id)}) with Lifetime: ({escape(cond.comparator.label)}{cond.count})')
+
+
+@renderer(condition_renderers, condition.HaveCardTagCondition)
+def _render_have_card_tag_condition(ctx: RenderContext, cond: condition.HaveCardTagCondition) -> str:
+    return Markup(
+        f'Have Card ({ctx.card(cond.card_id)}) with Tag ({ctx.tag(cond.tag)}): {_compare(cond.comparator, cond.value)}'
+    )
+
+
+@renderer(condition_renderers, condition.HaveCharTagCondition)
+def _render_have_char_tag_condition(ctx: RenderContext, cond: condition.HaveCharTagCondition) -> str:
+    return Markup(f'Have Character with Tag ({ctx.tag(cond.tag)}): {_compare(cond.comparator, cond.value)}')
+
+
+@renderer(condition_renderers, condition.HaveSudanCondition)
+def _render_have_sudan_condition(ctx: RenderContext, cond: condition.HaveSudanCondition) -> str:
+    return Markup(f'Have Sultan Card: {_compare(cond.comparator, cond.value)}')
+
+
+@renderer(condition_renderers, condition.HaveSudanLifetimeCondition)
+def _render_have_sudan_lifetime_condition(ctx: RenderContext, cond: condition.HaveSudanLifetimeCondition) -> str:
+    return Markup(f'Have Sultan Card with Lifetime: ({escape(cond.comparator.label)}{cond.count})')
+
+
+@renderer(condition_renderers, condition.HaveTagCondition)
+def _render_have_tag_condition(ctx: RenderContext, cond: condition.HaveTagCondition) -> str:
+    return Markup(f'Have Tag ({ctx.tag(cond.tag)}): {_compare(cond.comparator, cond.value)}')
+
+
+@renderer(condition_renderers, condition.HaveTaggedTagCondition)
+def _render_have_tagged_tag_condition(ctx: RenderContext, cond: condition.HaveTaggedTagCondition) -> str:
+    return Markup(
+        f'Have Tag ({ctx.tag(cond.tag)}) with Tag ({ctx.tag(cond.tagged)}): {_compare(cond.comparator, cond.value)}'
+    )
+
+
+@renderer(condition_renderers, condition.HandHaveCardCondition)
+def _render_hand_have_card_condition(ctx: RenderContext, cond: condition.HandHaveCardCondition) -> str:
+    return Markup(f'Hand Has Card ({ctx.card(cond.card_id)}): {_compare(cond.comparator, cond.value)}')
+
+
+@renderer(condition_renderers, condition.HandHaveCardRarityCondition)
+def _render_hand_have_card_rarity_condition(ctx: RenderContext, cond: condition.HandHaveCardRarityCondition) -> str:
+    rarity = _compare(cond.comparator, escape(cond.value.label))
+    return Markup(f'Hand Has Card ({ctx.card(cond.card_id)}) with Rarity: {rarity}')
+
+
+@renderer(condition_renderers, condition.HandHaveCardWithTagCondition)
+def _render_hand_have_card_with_tag_condition(
+    ctx: RenderContext,
+    cond: condition.HandHaveCardWithTagCondition,
+) -> str:
+    return Markup(
+        f'Hand Has Card ({ctx.card(cond.card_id)}) with Tag ({ctx.tag(cond.tag)}): '
+        f'{_compare(cond.comparator, cond.value)}'
+    )
+
+
+@renderer(condition_renderers, condition.HandHaveSudanCondition)
+def _render_hand_have_sudan_condition(ctx: RenderContext, cond: condition.HandHaveSudanCondition) -> str:
+    return Markup(f'Hand Has Sultan Card: {_compare(cond.comparator, cond.value)}')
+
+
+@renderer(condition_renderers, condition.HandHaveTagCondition)
+def _render_hand_have_tag_condition(ctx: RenderContext, cond: condition.HandHaveTagCondition) -> str:
+    additional_tag = Markup(f' with {ctx.tag(cond.additional_tag)}') if cond.additional_tag else ''
+    return Markup(f'Hand Has Tag ({ctx.tag(cond.tag)}{additional_tag}): {_compare(cond.comparator, cond.value)}')
+
+
+@renderer(condition_renderers, condition.HandHaveTagRarityCondition)
+def _render_hand_have_tag_rarity_condition(ctx: RenderContext, cond: condition.HandHaveTagRarityCondition) -> str:
+    rarity = _compare(cond.comparator, escape(cond.value.label))
+    return Markup(f'Hand Has Tag ({ctx.tag(cond.tag)}) with Rarity: {rarity}')
+
+
+@renderer(condition_renderers, condition.HandHaveTaggedTagCondition)
+def _render_hand_have_tagged_tag_condition(ctx: RenderContext, cond: condition.HandHaveTaggedTagCondition) -> str:
+    return Markup(
+        f'Hand Has Tag ({ctx.tag(cond.tag)}) with Tag ({ctx.tag(cond.tagged)}): {_compare(cond.comparator, cond.value)}'
+    )
+
+
+@renderer(condition_renderers, condition.SudanPoolHaveCondition)
+def _render_sudan_pool_have_condition(ctx: RenderContext, cond: condition.SudanPoolHaveCondition) -> str:
+    return Markup(f'Sultan Card Pool Has: {_compare(cond.comparator, cond.value)}')
+
+
+@renderer(condition_renderers, condition.TableHaveCardCondition)
+def _render_table_have_card_condition(ctx: RenderContext, cond: condition.TableHaveCardCondition) -> str:
+    return Markup(f'Table Has Card ({ctx.card(cond.card_id)}): {_compare(cond.comparator, cond.value)}')
+
+
+@renderer(condition_renderers, condition.TableHaveCardTagCondition)
+def _render_table_have_card_tag_condition(ctx: RenderContext, cond: condition.TableHaveCardTagCondition) -> str:
+    return Markup(
+        f'Table Has Card ({ctx.card(cond.card_id)}) with Tag ({ctx.tag(cond.tag)}): '
+        f'{_compare(cond.comparator, cond.value)}'
+    )
+
+
+@renderer(condition_renderers, condition.TableHaveCharTagCondition)
+def _render_table_have_char_tag_condition(ctx: RenderContext, cond: condition.TableHaveCharTagCondition) -> str:
+    return Markup(f'Table Has Character with Tag ({ctx.tag(cond.tag)}): {_compare(cond.comparator, cond.value)}')
+
+
+@renderer(condition_renderers, condition.TableHaveSudanCondition)
+def _render_table_have_sudan_condition(ctx: RenderContext, cond: condition.TableHaveSudanCondition) -> str:
+    return Markup(f'Table Has Sultan Card: {_compare(cond.comparator, cond.value)}')
+
+
+@renderer(condition_renderers, condition.TableHaveTagCondition)
+def _render_table_have_tag_condition(ctx: RenderContext, cond: condition.TableHaveTagCondition) -> str:
+    return Markup(f'Table Has Tag ({ctx.tag(cond.tag)}): {_compare(cond.comparator, cond.value)}')
+
+
+@renderer(condition_renderers, condition.TableHaveTaggedTagCondition)
+def _render_table_have_tagged_tag_condition(ctx: RenderContext, cond: condition.TableHaveTaggedTagCondition) -> str:
+    return Markup(
+        f'Table Has Tag ({ctx.tag(cond.tag)}) with Tag ({ctx.tag(cond.tagged)}): '
+        f'{_compare(cond.comparator, cond.value)}'
+    )
+
+
+@renderer(condition_renderers, condition.TagTipsCondition)
+def _render_tag_tips_condition(ctx: RenderContext, cond: condition.TagTipsCondition) -> str:
+    return Markup(f'Tag Tips: {ctx.tag(cond.tag)}')
+
+
+@renderer(condition_renderers, condition.TagCostCondition)
+def _render_tag_cost_condition(ctx: RenderContext, cond: condition.TagCostCondition) -> str:
+    if cond.is_multi_value and isinstance(cond.value, tuple):
+        value = Markup(f'one of {_join(cond.value)}')
+    else:
+        value = _compare(cond.comparator, cond.value)
+    return Markup(f'Tag Cost ({ctx.tag(cond.tag)}): {value}')
+
+
+@renderer(condition_renderers, condition.SlotCondition)
+def _render_slot_condition(ctx: RenderContext, cond: condition.SlotCondition) -> str:
+    return Markup(f'Slot #{cond.slot}: {cond.value}')
+
+
+@renderer(condition_renderers, condition.SlotHasAnimalHandlingCondition)
+def _render_slot_has_animal_handling_condition(
+    ctx: RenderContext,
+    cond: condition.SlotHasAnimalHandlingCondition,
+) -> str:
+    return Markup(f'Slot Has Animal Handling: #{cond.slot}')
+
+
+@renderer(condition_renderers, condition.SlotIsCondition)
+def _render_slot_is_condition(ctx: RenderContext, cond: condition.SlotIsCondition) -> str:
+    return Markup(f'Slot #{cond.slot} Has Card: {ctx.card(cond.value)}')
+
+
+@renderer(condition_renderers, condition.SlotRarityCondition)
+def _render_slot_rarity_condition(ctx: RenderContext, cond: condition.SlotRarityCondition) -> str:
+    return Markup(f'Slot #{cond.slot} Has Rarity: {_compare(cond.comparator, escape(cond.value.label))}')
+
+
+@renderer(condition_renderers, condition.SlotTypeCondition)
+def _render_slot_type_condition(ctx: RenderContext, cond: condition.SlotTypeCondition) -> str:
+    return Markup(f'Slot #{cond.slot} Has Type: {escape(cond.value.label)}')
+
+
+@renderer(condition_renderers, condition.SlotTagCondition)
+def _render_slot_tag_condition(ctx: RenderContext, cond: condition.SlotTagCondition) -> str:
+    return Markup(f'Slot #{cond.slot} Has Tag ({ctx.tag(cond.tag)}): {_compare(cond.comparator, cond.value)}')
+
+
+@renderer(condition_renderers, condition.ParentTagCondition)
+def _render_parent_tag_condition(ctx: RenderContext, cond: condition.ParentTagCondition) -> str:
+    return Markup(f'Parent Has Tag ({ctx.tag(cond.tag)}): {cond.value}')
+
+
+@renderer(condition_renderers, condition.SelfTagCondition)
+def _render_self_tag_condition(ctx: RenderContext, cond: condition.SelfTagCondition) -> str:
+    return Markup(f'Self Has Tag ({ctx.tag(cond.tag)}): {cond.value}')
+
+
+@renderer(condition_renderers, condition.TagCondition)
+def _render_tag_condition(ctx: RenderContext, cond: condition.TagCondition) -> str:
+    return Markup(f'Tag ({ctx.tag(cond.tag)}): {_compare(cond.comparator, cond.value)}')
+
+
+@renderer(condition_renderers, condition.UpgradeUnlockedCondition)
+def _render_upgrade_unlocked_condition(ctx: RenderContext, cond: condition.UpgradeUnlockedCondition) -> str:
+    return Markup(f'Upgrade Unlocked: {ctx.upgrade(cond.value)}')
+
+
+@renderer(effect_renderers, effect.AdjustEquipCardTableEffect)
+def _render_adjust_equip_card_table_effect(ctx: RenderContext, eff: effect.AdjustEquipCardTableEffect) -> str:
+    return Markup(
+        f'Adjust Equipment of Table Card ({ctx.card(eff.card_id)}): {escape(eff.operator.label)} {ctx.card(eff.value)}'
+    )
+
+
+@renderer(effect_renderers, effect.AdjustEquipParentEffect)
+def _render_adjust_equip_parent_effect(ctx: RenderContext, eff: effect.AdjustEquipParentEffect) -> str:
+    return Markup(f'Adjust Equipment of Parent: {escape(eff.operator.label)} {ctx.card(eff.value)}')
+
+
+@renderer(effect_renderers, effect.AdjustEquipSlotEffect)
+def _render_adjust_equip_slot_effect(ctx: RenderContext, eff: effect.AdjustEquipSlotEffect) -> str:
+    equipment = ctx.card(eff.card_id) if eff.card_id is not None else ctx.tag(eff.tag)
+    return Markup(f'Adjust Equipment of Slot #{eff.slot}: {escape(eff.operator.label)} {equipment}')
+
+
+@renderer(effect_renderers, effect.AdjustEquipSlotSlottedEffect)
+def _render_adjust_equip_slot_slotted_effect(ctx: RenderContext, eff: effect.AdjustEquipSlotSlottedEffect) -> str:
+    return Markup(f'Adjust Equipment of Slot #{eff.slot}: {escape(eff.operator.label)} Slot #{eff.value}')
+
+
+@renderer(effect_renderers, effect.AdjustEquipTaggedTableEffect)
+def _render_adjust_equip_tagged_table_effect(ctx: RenderContext, eff: effect.AdjustEquipTaggedTableEffect) -> str:
+    equipment = ctx.card(eff.card_id) if eff.card_id is not None else ctx.tag(eff.tag)
+    return Markup(f'Adjust Equipment of Table Tagged ({ctx.tag(eff.tag)}): {escape(eff.operator.label)} {equipment}')
+
+
+@renderer(effect_renderers, effect.AdjustRarityCardEffect)
+def _render_adjust_rarity_card_effect(ctx: RenderContext, eff: effect.AdjustRarityCardEffect) -> str:
+    return Markup(f'Adjust Rarity of Card ({ctx.card(eff.card_id)}): {eff.value}')
+
+
+@renderer(effect_renderers, effect.AdjustRarityCardTableEffect)
+def _render_adjust_rarity_card_table_effect(ctx: RenderContext, eff: effect.AdjustRarityCardTableEffect) -> str:
+    return Markup(f'Adjust Rarity of Table Card ({ctx.card(eff.card_id)}): {eff.value}')
+
+
+@renderer(effect_renderers, effect.AdjustRaritySlotEffect)
+def _render_adjust_rarity_slot_effect(ctx: RenderContext, eff: effect.AdjustRaritySlotEffect) -> str:
+    return Markup(f'Adjust Rarity of Slot #{eff.slot}: {eff.value}')
+
+
+@renderer(effect_renderers, effect.AdjustRarityTaggedEffect)
+def _render_adjust_rarity_tagged_effect(ctx: RenderContext, eff: effect.AdjustRarityTaggedEffect) -> str:
+    return Markup(f'Adjust Rarity of Tagged ({ctx.tag(eff.tag)}): {eff.value}')
+
+
+@renderer(effect_renderers, effect.AdjustRarityTaggedTableEffect)
+def _render_adjust_rarity_tagged_table_effect(ctx: RenderContext, eff: effect.AdjustRarityTaggedTableEffect) -> str:
+    return Markup(f'Adjust Rarity of Table Tagged ({ctx.tag(eff.tag)}): {eff.value}')
+
+
+@renderer(effect_renderers, effect.AdjustTagCardEffect)
+def _render_adjust_tag_card_effect(ctx: RenderContext, eff: effect.AdjustTagCardEffect) -> str:
+    return Markup(
+        f'Adjust Tag ({ctx.tag(eff.tag)}) of Card ({ctx.card(eff.card_id)}): {escape(eff.operator.label)} {eff.value}'
+    )
+
+
+@renderer(effect_renderers, effect.AdjustTagCardTableEffect)
+def _render_adjust_tag_card_table_effect(ctx: RenderContext, eff: effect.AdjustTagCardTableEffect) -> str:
+    return Markup(
+        f'Adjust Tag ({ctx.tag(eff.tag)}) of Table Card ({ctx.card(eff.card_id)}): '
+        f'{escape(eff.operator.label)} {eff.value}'
+    )
+
+
+@renderer(effect_renderers, effect.AdjustTagCardTotalEffect)
+def _render_adjust_tag_card_total_effect(ctx: RenderContext, eff: effect.AdjustTagCardTotalEffect) -> str:
+    return Markup(
+        f'Adjust Tag ({ctx.tag(eff.tag)}) of Total Card ({ctx.card(eff.card_id)}): '
+        f'{escape(eff.operator.label)} {eff.value}'
+    )
+
+
+@renderer(effect_renderers, effect.AdjustTagParentEffect)
+def _render_adjust_tag_parent_effect(ctx: RenderContext, eff: effect.AdjustTagParentEffect) -> str:
+    return Markup(f'Adjust Tag ({ctx.tag(eff.tag)}) of Parent: {escape(eff.operator.label)} {eff.value}')
+
+
+@renderer(effect_renderers, effect.AdjustTagSelfEffect)
+def _render_adjust_tag_self_effect(ctx: RenderContext, eff: effect.AdjustTagSelfEffect) -> str:
+    return Markup(f'Adjust Tag ({ctx.tag(eff.tag)}) of Self: {escape(eff.operator.label)} {eff.value}')
+
+
+@renderer(effect_renderers, effect.AdjustTagSlotEffect)
+def _render_adjust_tag_slot_effect(ctx: RenderContext, eff: effect.AdjustTagSlotEffect) -> str:
+    return Markup(f'Adjust Tag ({ctx.tag(eff.tag)}) of Slot #{eff.slot}: {escape(eff.operator.label)} {eff.value}')
+
+
+@renderer(effect_renderers, effect.AdjustTagSudanTotalEffect)
+def _render_adjust_tag_sudan_total_effect(ctx: RenderContext, eff: effect.AdjustTagSudanTotalEffect) -> str:
+    return Markup(f'Adjust Tag ({ctx.tag(eff.tag)}) of Total Sultan Card: {escape(eff.operator.label)} {eff.value}')
+
+
+@renderer(effect_renderers, effect.AdjustTagTaggedEffect)
+def _render_adjust_tag_tagged_effect(ctx: RenderContext, eff: effect.AdjustTagTaggedEffect) -> str:
+    return Markup(
+        f'Adjust Tag ({ctx.tag(eff.tag)}) of Tagged ({ctx.tag(eff.tagged)}): {escape(eff.operator.label)} {eff.value}'
+    )
+
+
+@renderer(effect_renderers, effect.AdjustTagTaggedTableEffect)
+def _render_adjust_tag_tagged_table_effect(ctx: RenderContext, eff: effect.AdjustTagTaggedTableEffect) -> str:
+    return Markup(
+        f'Adjust Tag ({ctx.tag(eff.tag)}) of Table Tagged ({ctx.tag(eff.tagged)}): '
+        f'{escape(eff.operator.label)} {eff.value}'
+    )
+
+
+@renderer(effect_renderers, effect.AdjustTagTaggedTotalEffect)
+def _render_adjust_tag_tagged_total_effect(ctx: RenderContext, eff: effect.AdjustTagTaggedTotalEffect) -> str:
+    return Markup(
+        f'Adjust Tag ({ctx.tag(eff.tag)}) of Total Tagged ({ctx.tag(eff.tagged)}): '
+        f'{escape(eff.operator.label)} {eff.value}'
+    )
+
+
+@renderer(effect_renderers, effect.AllEffect)
+def _render_all_effect(ctx: RenderContext, eff: effect.AllEffect) -> str:
+    return Markup(f'All: {ctx.effects(eff.value)}')
+
+
+@renderer(effect_renderers, effect.BeginGuideEffect)
+def _render_begin_guide_effect(ctx: RenderContext, eff: effect.BeginGuideEffect) -> str:
+    return Markup(f'Begin Guide: <code>{escape(eff.type)}</code>')
+
+
+@renderer(effect_renderers, effect.CardEffect)
+def _render_card_effect(ctx: RenderContext, eff: effect.CardEffect) -> str:
+    if not eff.changes:
+        return Markup(f'Card ({ctx.card(eff.card_id)})')
+    changes = ''.join(f' <li>{_dispatch(change_renderers, 'change', ctx, change)} </li>' for change in eff.changes)
+    return Markup(f'Card ({ctx.card(eff.card_id)}): <ul>{changes} </ul>')
+
+
+@renderer(change_renderers, effect.CardCountChange)
+def _render_card_count_change(ctx: RenderContext, change: effect.CardCountChange) -> str:
+    return Markup(f'Count: {'+' if change.count >= 0 else ''}{change.count}')
+
+
+@renderer(change_renderers, effect.CardQuantityChange)
+def _render_card_quantity_change(ctx: RenderContext, change: effect.CardQuantityChange) -> str:
+    return Markup(f'Quantity: {'+' if change.quantity >= 0 else ''}{change.quantity}')
+
+
+@renderer(change_renderers, effect.CardTagChange)
+def _render_card_tag_change(ctx: RenderContext, change: effect.CardTagChange) -> str:
+    return Markup(f'Tag ({ctx.tag(change.tag)}): {escape(change.operator.value)}{change.value}')
+
+
+@renderer(effect_renderers, effect.CaseEffect)
+def _render_case_effect(ctx: RenderContext, eff: effect.CaseEffect) -> str:
+    return Markup(f'Case #{eff.option}: {ctx.effects(eff.value)}')
+
+
+@renderer(effect_renderers, effect.ChangeCardNameCardTableEffect)
+def _render_change_card_name_card_table_effect(
+    ctx: RenderContext,
+    eff: effect.ChangeCardNameCardTableEffect,
+) -> str:
+    return Markup(f'Change Table Card ({ctx.card(eff.card_id)}) Name: {escape(ctx.trans(eff.text))}')
+
+
+@renderer(effect_renderers, effect.ChangeCardNameCardTotalEffect)
+def _render_change_card_name_card_total_effect(
+    ctx: RenderContext,
+    eff: effect.ChangeCardNameCardTotalEffect,
+) -> str:
+    return Markup(f'Change Total Card ({ctx.card(eff.card_id)}) Name: {escape(ctx.trans(eff.text))}')
+
+
+@renderer(effect_renderers, effect.ChangeCardNameSlotEffect)
+def _render_change_card_name_slot_effect(ctx: RenderContext, eff: effect.ChangeCardNameSlotEffect) -> str:
+    return Markup(f'Change Slot #{eff.slot} Name: {escape(ctx.trans(eff.text))}')
+
+
+@renderer(effect_renderers, effect.ChangeCardTextCardTotalEffect)
+def _render_change_card_text_card_total_effect(
+    ctx: RenderContext,
+    eff: effect.ChangeCardTextCardTotalEffect,
+) -> str:
+    return Markup(f'Change Table Card ({ctx.card(eff.card_id)}) Text: {escape(ctx.trans(eff.text))}')
+
+
+@renderer(effect_renderers, effect.ChangeCardTextSlotEffect)
+def _render_change_card_text_slot_effect(ctx: RenderContext, eff: effect.ChangeCardTextSlotEffect) -> str:
+    return Markup(f'Change Slot #{eff.slot} Text: {escape(ctx.trans(eff.text))}')
+
+
+@renderer(effect_renderers, effect.ChangeNameEffect)
+def _render_change_name_effect(ctx: RenderContext, eff: effect.ChangeNameEffect) -> str:
+    return Markup(f'Change Card Name: {ctx.card(eff.value)}')
+
+
+@renderer(effect_renderers, effect.ChooseEffect)
+def _render_choose_effect(ctx: RenderContext, eff: effect.ChooseEffect) -> str:
+    return Markup(f'Choose: {ctx.effects(eff.value)}')
+
+
+@renderer(effect_renderers, effect.CleanCardEffect)
+def _render_clean_card_effect(ctx: RenderContext, eff: effect.CleanCardEffect) -> str:
+    return Markup(f'Clean Card: {ctx.card(eff.card_id)}')
+
+
+@renderer(effect_renderers, effect.CleanCardTableEffect)
+def _render_clean_card_table_effect(ctx: RenderContext, eff: effect.CleanCardTableEffect) -> str:
+    tag = Markup(f' Tagged ({ctx.tag(eff.tag)})') if eff.tag else ''
+    return Markup(f'Clean Card ({ctx.card(eff.card_id)}) On Table{tag}: {eff.value}')
+
+
+@renderer(effect_renderers, effect.CleanCharTableEffect)
+def _render_clean_char_table_effect(ctx: RenderContext, eff: effect.CleanCharTableEffect) -> str:
+    return Markup(f'Clean Character on Table not Tagged ({ctx.tag(eff.tag)}): {eff.value}')
+
+
+@renderer(effect_renderers, effect.CleanItemTableEffect)
+def _render_clean_item_table_effect(ctx: RenderContext, eff: effect.CleanItemTableEffect) -> str:
+    # The macro passed all the card IDs as one to the card link, which never resolves to an entry, so it is not looked up
+    return Markup(f'Clean Items (???): {eff.value}')
+
+
+@renderer(effect_renderers, effect.CleanRiteEffect)
+def _render_clean_rite_effect(ctx: RenderContext, eff: effect.CleanRiteEffect) -> str:
+    return Markup(f'Clean Rites: {_join(map(ctx.rite, eff.rite_ids))}')
+
+
+@renderer(effect_renderers, effect.CleanSelfEffect)
+def _render_clean_self_effect(ctx: RenderContext, eff: effect.CleanSelfEffect) -> str:
+    return 'Clean Self'
+
+
+@renderer(effect_renderers, effect.CleanSlotEffect)
+def _render_clean_slot_effect(ctx: RenderContext, eff: effect.CleanSlotEffect) -> str:
+    return Markup(f'Clean Slot #{eff.slot}: {eff.value}')
+
+
+@renderer(effect_renderers, effect.CleanTagEffect)
+def _render_clean_tag_effect(ctx: RenderContext, eff: effect.CleanTagEffect) -> str:
+    return Markup(f'Clean Tagged ({ctx.tag(eff.tag)})')
+
+
+@renderer(effect_renderers, effect.CleanTagTableEffect)
+def _render_clean_tag_table_effect(ctx: RenderContext, eff: effect.CleanTagTableEffect) -> str:
+    additional_tag = Markup(f' with {ctx.tag(eff.additional_tag)}') if eff.additional_tag else ''
+    rarity = Markup(f' with Rarity {escape(eff.rarity.label)}') if eff.rarity is not None else ''
+    return Markup(f'Clean Table Tagged ({ctx.tag(eff.tag)}{additional_tag}){rarity}: {eff.value}')
+
+
+@renderer(effect_renderers, effect.CloseBoxEffect)
+def _render_close_box_effect(ctx: RenderContext, eff: effect.CloseBoxEffect) -> str:
+    return 'Close Box'
+
+
+@renderer(effect_renderers, effect.CoinEffect)
+def _render_coin_effect(ctx: RenderContext, eff: effect.CoinEffect) -> str:
+    return Markup(f'Coins: {eff.value}')
+
+
+@renderer(effect_renderers, effect.ConfirmEffect)
+def _render_confirm_effect(ctx: RenderContext, eff: effect.ConfirmEffect) -> str:
+    return Markup(
+        f'Confirm: {escape(ctx.trans(eff.text_))} <ul> <li>Confirm: {escape(ctx.trans(eff.confirm_text_))}</li> '
+        f'<li>Cancel: {escape(ctx.trans(eff.cancel_text_))}</li> </ul>'
+    )
+
+
+@renderer(effect_renderers, effect.CounterEffect)
+def _render_counter_effect(ctx: RenderContext, eff: effect.CounterEffect) -> str:
+    return Markup(f'Counter ({eff.counter_id}): {escape(eff.operator.label)} {eff.value}')
+
+
+@renderer(effect_renderers, effect.CounterGlobalEffect)
+def _render_counter_global_effect(ctx: RenderContext, eff: effect.CounterGlobalEffect) -> str:
+    return Markup(f'Global Counter ({eff.counter_id}): {escape(eff.operator.label)} {eff.value}')
+
+
+@renderer(effect_renderers, effect.CopySlotEffect)
+def _render_copy_slot_effect(ctx: RenderContext, eff: effect.CopySlotEffect) -> str:
+    return Markup(f'Copy Slot #{eff.slot}')
+
+
+@renderer(effect_renderers, effect.DebugEffect)
+def _render_debug_effect(ctx: RenderContext, eff: effect.DebugEffect) -> str:
+    return Markup(f'Debug: {escape(eff.value)}')
+
+
+@renderer(effect_renderers, effect.DelayEffect)
+def _render_delay_effect(ctx: RenderContext, eff: effect.DelayEffect) -> str:
+    return Markup(f'Delay ({eff.round} days): {ctx.effects(eff.effects)}')
+
+
+@renderer(effect_renderers, effect.DelayOffEffect)
+def _render_delay_off_effect(ctx: RenderContext, eff: effect.DelayOffEffect) -> str:
+    return 'Delay Off'
+
+
+@renderer(effect_renderers, effect.DifficultyEffect)
+def _render_difficulty_effect(ctx: RenderContext, eff: effect.DifficultyEffect) -> str:
+    return Markup(f'Difficulty: {eff.value}')
+
+
+@renderer(effect_renderers, effect.EnableAutoGenSudanCardEffect)
+def _render_enable_auto_gen_sudan_card_effect(ctx: RenderContext, eff: effect.EnableAutoGenSudanCardEffect) -> str:
+    return ('Enable' if eff.value else 'Disable') + ' Auto-Gen Sultan Card'
+
+
+@renderer(effect_renderers, effect.EquipSlotAddSlotEffect)
+def _render_equip_slot_add_slot_effect(ctx: RenderContext, eff: effect.EquipSlotAddSlotEffect) -> str:
+    return Markup(f'Add Equipment Slot to Slot #{eff.slot}: {escape(eff.value.label)}')
+
+
+@renderer(effect_renderers, effect.EquipSlotSetSlotEffect)
+def _render_equip_slot_set_slot_effect(ctx: RenderContext, eff: effect.EquipSlotSetSlotEffect) -> str:
+    return Markup(f'Empty Equipment Slot of Slot #{eff.slot}: {escape(eff.equip_slot.label)}')
+
+
+@renderer(effect_renderers, effect.EventOnEffect)
+def _render_event_on_effect(ctx: RenderContext, eff: effect.EventOnEffect) -> str:
+    return Markup(f'Enable Event: {_join(map(ctx.event, eff.event_ids))}')
+
+
+@renderer(effect_renderers, effect.EventOffEffect)
+def _render_event_off_effect(ctx: RenderContext, eff: effect.EventOffEffect) -> str:
+    return Markup(f'Disable Event: {_join(map(ctx.event, eff.event_ids))}')
+
+
+@renderer(effect_renderers, effect.FailedEffect)
+def _render_failed_effect(ctx: RenderContext, eff: effect.FailedEffect) -> str:
+    return Markup(f'Failed: {ctx.effects(eff.value)}')
+
+
+@renderer(effect_renderers, effect.FocusRiteEffect)
+def _render_focus_rite_effect(ctx: RenderContext, eff: effect.FocusRiteEffect) -> str:
+    return Markup(f'Focus Rite ({ctx.rite(eff.value)}): {_join(eff.value)}')
+
+
+@renderer(effect_renderers, effect.HandCardRefreshEffect)
+def _render_hand_card_refresh_effect(ctx: RenderContext, eff: effect.HandCardRefreshEffect) -> str:
+    return 'Refresh Cards In Hand'
+
+
+@renderer(effect_renderers, effect.LootEffect)
+def _render_loot_effect(ctx: RenderContext, eff: effect.LootEffect) -> str:
+    return Markup(f'Loot: {_join(map(ctx.loot, eff.loot_ids))}')
+
+
+@renderer(effect_renderers, effect.LootTagEffect)
+def _render_loot_tag_effect(ctx: RenderContext, eff: effect.LootTagEffect) -> str:
+    exclude_tag = Markup(f' {ctx.tag(eff.exclude_tag)}') if eff.exclude_tag else ''
+    return Markup(f'Loot Tag ({ctx.tag(eff.tag)}{exclude_tag}): {_join(map(ctx.loot, eff.loot_ids))}')
+
+
+@renderer(effect_renderers, effect.MagicSudanEffect)
+def _render_magic_sudan_effect(ctx: RenderContext, eff: effect.MagicSudanEffect) -> str:
+    # The comment is kept from the macro, as the whitespace around it is still there once it has been minified away
+    return Markup(f'<!-- TODO --> Magic Sultan Card: {ctx.rite(eff.value) if eff.value != 1 else '???'}')
+
+
+@renderer(effect_renderers, effect.MakeFollowerCardTableEffect)
+def _render_make_follower_card_table_effect(ctx: RenderContext, eff: effect.MakeFollowerCardTableEffect) -> str:
+    return Markup(f'Make Table Card Follower: {ctx.card(eff.card_id)}')
+
+
+@renderer(effect_renderers, effect.MakeFollowerCardTotalEffect)
+def _render_make_follower_card_total_effect(ctx: RenderContext, eff: effect.MakeFollowerCardTotalEffect) -> str:
+    return Markup(f'Make Total Card Follower: {ctx.card(eff.card_id)}')
+
+
+@renderer(effect_renderers, effect.NoPromptEffect)
+def _render_no_prompt_effect(ctx: RenderContext, eff: effect.NoPromptEffect) -> str:
+    return Markup(f'No Prompt: {ctx.effects(eff.value)}')
+
+
+@renderer(effect_renderers, effect.NoShowEffect)
+def _render_no_show_effect(ctx: RenderContext, eff: effect.NoShowEffect) -> str:
+    return Markup(f'No Show: {ctx.effects(eff.value)}')
+
+
+@renderer(effect_renderers, effect.OptionEffect)
+def _render_option_effect(ctx: RenderContext, eff: effect.OptionEffect) -> str:
+    items = ''.join(
+        f' <li><code>{escape(item.tag)}</code>: {escape(ctx.trans(eff.get_item_text(i)))}</li>'
+        for i, item in enumerate(eff.items)
+    )
+    return Markup(f'Options: {escape(ctx.trans(eff.text_))} <ul>{items} </ul>')
+
+
+@renderer(effect_renderers, effect.OverEffect)
+def _render_over_effect(ctx: RenderContext, eff: effect.OverEffect) -> str:
+    return Markup(f'Ending: {ctx.ending(eff.value)}')
+
+
+@renderer(effect_renderers, effect.PopCardEffect)
+def _render_pop_card_effect(ctx: RenderContext, eff: effect.PopCardEffect) -> str:
+    return Markup(f'Card ({ctx.card(eff.card_id)}) Pops: {escape(ctx.trans(eff.text))}')
+
+
+@renderer(effect_renderers, effect.PopCardHandEffect)
+def _render_pop_card_hand_effect(ctx: RenderContext, eff: effect.PopCardHandEffect) -> str:
+    return Markup(f'Card in Hand ({ctx.card(eff.card_id)}) Pops: {escape(ctx.trans(eff.text))}')
+
+
+@renderer(effect_renderers, effect.PopCardRiteEffect)
+def _render_pop_card_rite_effect(ctx: RenderContext, eff: effect.PopCardRiteEffect) -> str:
+    return Markup(f'Card in Rite ({ctx.card(eff.card_id)}) Pops: {escape(ctx.trans(eff.text))}')
+
+
+@renderer(effect_renderers, effect.PopSelfEffect)
+def _render_pop_self_effect(ctx: RenderContext, eff: effect.PopSelfEffect) -> str:
+    return Markup(f'Self Pops: {escape(ctx.trans(eff.text))}')
+
+
+@renderer(effect_renderers, effect.PopSlotEffect)
+def _render_pop_slot_effect(ctx: RenderContext, eff: effect.PopSlotEffect) -> str:
+    return Markup(f'Slot #{eff.slot} Pops: {escape(ctx.trans(eff.text))}')
+
+
+@renderer(effect_renderers, effect.PopSudanHandEffect)
+def _render_pop_sudan_hand_effect(ctx: RenderContext, eff: effect.PopSudanHandEffect) -> str:
+    return Markup(f'Sultan Card in Hand Pops: {escape(ctx.trans(eff.text))}')
+
+
+@renderer(effect_renderers, effect.PopTaggedEffect)
+def _render_pop_tagged_effect(ctx: RenderContext, eff: effect.PopTaggedEffect) -> str:
+    return Markup(f'Tagged ({ctx.tag(eff.tag)}) Pops: {escape(ctx.trans(eff.text))}')
+
+
+@renderer(effect_renderers, effect.PopTaggedHandEffect)
+def _render_pop_tagged_hand_effect(ctx: RenderContext, eff: effect.PopTaggedHandEffect) -> str:
+    return Markup(f'Tagged In Hand ({ctx.tag(eff.tag)}) Pops: {escape(ctx.trans(eff.text))}')
+
+
+@renderer(effect_renderers, effect.PopThinkEffect)
+def _render_pop_think_effect(ctx: RenderContext, eff: effect.PopThinkEffect) -> str:
+    return Markup(f'Methinks Pops: {escape(ctx.trans(eff.text))}')
+
+
+@renderer(effect_renderers, effect.PromptEffect)
+def _render_prompt_effect(ctx: RenderContext, eff: effect.PromptEffect) -> str:
+    return Markup(f'Prompt: {escape(ctx.trans(eff.text_))}')
+
+
+@renderer(effect_renderers, effect.RebirthSlotEffect)
+def _render_rebirth_slot_effect(ctx: RenderContext, eff: effect.RebirthSlotEffect) -> str:
+    return Markup(f'Rebirth Slot #{eff.slot}')
+
+
+@renderer(effect_renderers, effect.RiteEffect)
+def _render_rite_effect(ctx: RenderContext, eff: effect.RiteEffect) -> str:
+    return Markup(f'Rite: {ctx.rite(eff.value)}')
+
+
+@renderer(effect_renderers, effect.SleepEffect)
+def _render_sleep_effect(ctx: RenderContext, eff: effect.SleepEffect) -> str:
+    return Markup(f'Sleep: {eff.value}')
+
+
+@renderer(effect_renderers, effect.SlideEffect)
+def _render_slide_effect(ctx: RenderContext, eff: effect.SlideEffect) -> str:
+    return Markup(f'Slide: <code>{escape(eff.value)}</code>')
+
+
+@renderer(effect_renderers, effect.SteamAchievementEffect)
+def _render_steam_achievement_effect(ctx: RenderContext, eff: effect.SteamAchievementEffect) -> str:
+    return Markup(f'Steam Achievement: <code>{escape(eff.value)}</code>')
+
+
+@renderer(effect_renderers, effect.SuccessEffect)
+def _render_success_effect(ctx: RenderContext, eff: effect.SuccessEffect) -> str:
+    return Markup(f'Success: {ctx.effects(eff.value)}')
+
+
+@renderer(effect_renderers, effect.SudanCardEffect)
+def _render_sudan_card_effect(ctx: RenderContext, eff: effect.SudanCardEffect) -> str:
+    return Markup(f'Sultan Cards: {_join(map(ctx.card, eff.value))}')
+
+
+@renderer(effect_renderers, effect.SudanPoolFreezeEffect)
+def _render_sudan_pool_freeze_effect(ctx: RenderContext, eff: effect.SudanPoolFreezeEffect) -> str:
+    return 'Freeze Sultan Cards Pool'
+
+
+@renderer(effect_renderers, effect.SudanPoolUnfreezeEffect)
+def _render_sudan_pool_unfreeze_effect(ctx: RenderContext, eff: effect.SudanPoolUnfreezeEffect) -> str:
+    return 'Unfreeze Sultan Cards Pool'
+
+
+@renderer(effect_renderers, effect.UpgradeCardEffect)
+def _render_upgrade_card_effect(ctx: RenderContext, eff: effect.UpgradeCardEffect) -> str:
+    tags = ''.join(f' <li>{ctx.tag(tag)}: {val}</li>' for tag, val in eff.tags.items())
+    return Markup(f'Upgrade Card ({ctx.card(eff.card_id)}): <ul>{tags} </ul>')
+
+
+@renderer(effect_renderers, effect.UpgradeCardAddTagEffect)
+def _render_upgrade_card_add_tag_effect(ctx: RenderContext, eff: effect.UpgradeCardAddTagEffect) -> str:
+    return Markup(f'Upgrade Card ({ctx.card(eff.card_id)}) with Tag {ctx.tag(eff.tag)}: {eff.value}')
+
+
+@renderer(effect_renderers, effect.UpgradeCardChangeEffect)
+def _render_upgrade_card_change_effect(ctx: RenderContext, eff: effect.UpgradeCardChangeEffect) -> str:
+    return Markup(f'Upgrade Card ({ctx.card(eff.card_id)}) to Card ({ctx.card(eff.new_card_id)})')
+
+
+@renderer(effect_renderers, effect.UpgradeCoinEffect)
+def _render_upgrade_coin_effect(ctx: RenderContext, eff: effect.UpgradeCoinEffect) -> str:
+    return Markup(f'Upgrade Starting Coins: {eff.value}')
+
+
+@renderer(effect_renderers, effect.UpgradeTagAddTagEffect)
+def _render_upgrade_tag_add_tag_effect(ctx: RenderContext, eff: effect.UpgradeTagAddTagEffect) -> str:
+    return Markup(f'Upgrade Tagged ({ctx.tag(eff.tagged)}) with Tag {ctx.tag(eff.tag)}: {eff.value}')
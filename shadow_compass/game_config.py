@@ -1,10 +1,13 @@
+import hashlib
+import logging
 import os
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Self, TypeVar, Any
+from typing import Self, TypeVar, Any, Callable, Iterator, Mapping, Generic, TYPE_CHECKING, cast
 
 from shadow_compass import sudanjson
-from shadow_compass.parser import parse_value
+from shadow_compass.parser import parse_value, parse_field, clear_interned, disable_interning
 from shadow_compass.schema.after_story import AfterStory
 from shadow_compass.schema.card import Card
 from shadow_compass.schema.event import Event
@@ -17,48 +20,308 @@ from shadow_compass.schema.rite_template import RiteTemplate, RiteTemplateMappin
 from shadow_compass.schema.tag import Tag
 from shadow_compass.schema.upgrade import Upgrade
 
+if TYPE_CHECKING:
+    from shadow_compass.cache import ParseCache
+
+logger = logging.getLogger(__name__)
+
 T = TypeVar('T')
 
 
 @dataclass(frozen=True)
 class GameConfig:
-    after_stories: dict[int, AfterStory]
-    cards: dict[int, Card]
-    events: dict[int, Event]
-    gallery_cards: dict[int, GalleryCard]
-    loots: dict[int, Loot]
-    overs: dict[int, Over]
-    quests: dict[int, Quest]
-    rites: dict[int, Rite]
-    rite_templates: dict[int, RiteTemplate]
-    rite_template_mappings: dict[int, RiteTemplateMapping]
-    tags: dict[str, Tag]
-    upgrades: dict[int, Upgrade]
+    after_stories: Mapping[int, AfterStory]
+    cards: Mapping[int, Card]
+    events: Mapping[int, Event]
+    gallery_cards: Mapping[int, GalleryCard]
+    loots: Mapping[int, Loot]
+    overs: Mapping[int, Over]
+    quests: Mapping[int, Quest]
+    rites: Mapping[int, Rite]
+    rite_templates: Mapping[int, RiteTemplate]
+    rite_template_mappings: Mapping[int, RiteTemplateMapping]
+    tags: Mapping[str, Tag]
+    upgrades: Mapping[int, Upgrade]
     localisations: dict[str, dict[str, str]]
 
     @classmethod
-    def from_directory(cls, path: Path) -> Self:
+    def from_directory(
+        cls,
+        path: Path,
+        workers: int = 1,
+        lazy: bool = False,
+        parse_cache: 'ParseCache | None' = None,
+    ) -> Self:
         config_path = path / 'config'
-        return cls(
-            after_stories=_load_entities_from_directory_files(config_path / 'after_story', AfterStory),
-            cards=_load_entities_from_file(config_path / 'cards.json', Card),
-            events=_load_entities_from_directory_files(config_path / 'event', Event),
-            gallery_cards=_load_entities_from_file(config_path / 'gallery_cards.json', GalleryCard),
-            loots=_load_entities_from_directory_files(config_path / 'loot', Loot),
-            overs=_load_entities_from_file(config_path / 'over.json', Over),
-            quests=_load_entities_from_file(config_path / 'quest.json', Quest),
-            rites=_load_entities_from_directory_files(config_path / 'rite', Rite),
-            rite_templates=_load_entities_from_directory_files(config_path / 'rite_template', RiteTemplate),
-            rite_template_mappings=_load_entities_from_file(config_path / 'rite_template_mappings.json', RiteTemplateMapping),
-            tags=_load_entities_from_file(config_path / 'tag.json', Tag, str),
-            upgrades=_load_entities_from_file(config_path / 'upgrade.json', Upgrade),
-            localisations=_load_localisations(path / 'i18n'),
+        with _create_executor(workers) as executor:
+            loader = _Loader(
+                executor,
+                chunks=workers * 4 if workers > 1 else 1,
+                lazy=lazy,
+                # Lazy collections hold decoded JSON rather than parsed entities, so there is nothing to cache
+                parse_cache=None if lazy else parse_cache,
+            )
+            after_stories = loader.load_directory_files(config_path / 'after_story', AfterStory)
+            cards = loader.load_file(config_path / 'cards.json', Card)
+            events = loader.load_directory_files(config_path / 'event', Event)
+            gallery_cards = loader.load_file(config_path / 'gallery_cards.json', GalleryCard)
+            loots = loader.load_directory_files(config_path / 'loot', Loot)
+            overs = loader.load_file(config_path / 'over.json', Over)
+            quests = loader.load_file(config_path / 'quest.json', Quest)
+            rites = loader.load_directory_files(config_path / 'rite', Rite)
+            rite_templates = loader.load_directory_files(config_path / 'rite_template', RiteTemplate)
+            rite_template_mappings = loader.load_file(
+                config_path / 'rite_template_mappings.json', RiteTemplateMapping
+            )
+            tags = loader.load_file(config_path / 'tag.json', Tag, str)
+            upgrades = loader.load_file(config_path / 'upgrade.json', Upgrade)
+            localisations = executor.submit(_load_localisations, path / 'i18n')
+            try:
+                return cls(
+                    after_stories=after_stories.result(),
+                    cards=cards.result(),
+                    events=events.result(),
+                    gallery_cards=gallery_cards.result(),
+                    loots=loots.result(),
+                    overs=overs.result(),
+                    quests=quests.result(),
+                    rites=rites.result(),
+                    rite_templates=rite_templates.result(),
+                    rite_template_mappings=rite_template_mappings.result(),
+                    tags=tags.result(),
+                    upgrades=upgrades.result(),
+                    localisations=localisations.result(),
+                )
+            finally:
+                # Only needed while loading, and would otherwise keep the parsed values alive
+                clear_interned()
+
+
+class LazyEntities(Mapping[Any, T]):
+    # Holds decoded JSON for each entity, which is only parsed the first time the entity is accessed
+    entity_cls: type[T]
+    raw: dict[Any, Any]
+    entities: dict[Any, T]
+
+    def __init__(self, entity_cls: type[T], raw: dict[Any, Any] | None = None) -> None:
+        self.entity_cls = entity_cls
+        self.raw = raw if raw is not None else {}
+        self.entities = {}
+
+    def __getitem__(self, key: Any) -> T:
+        entity = self.entities.get(key)
+        if entity is None:
+            # Loading has already cleared the intern table, which would otherwise only keep growing from here on
+            with disable_interning():
+                entity = self.entities[key] = parse_value(self.raw[key], self.entity_cls)
+        return entity
+
+    def __contains__(self, key: Any) -> bool:
+        return key in self.raw
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self.raw)
+
+    def __len__(self) -> int:
+        return len(self.raw)
+
+    def __repr__(self) -> str:
+        return f'<LazyEntities {self.entity_cls.__name__} parsed={len(self.entities)}/{len(self.raw)}>'
+
+    def update(self, other: 'LazyEntities[T]') -> None:
+        self.raw.update(other.raw)
+        self.entities.update(other.entities)
+
+
+class _SerialExecutor(Executor):
+    def submit(self, fn: Callable[..., T], /, *args: Any, **kwargs: Any) -> Future[T]:
+        future = Future()
+        future.set_result(fn(*args, **kwargs))
+        return future
+
+
+class _MergedResults(Generic[T]):
+    futures: list[Future]
+    merged: dict | LazyEntities
+
+    def __init__(self, futures: list[Future], merged: dict | LazyEntities) -> None:
+        self.futures = futures
+        self.merged = merged
+
+    def result(self) -> Mapping[Any, T]:
+        # Merged in submission order so that the result does not depend on the order in which workers finish
+        for future in self.futures:
+            self.merged.update(future.result())
+        self.futures = []
+        return self.merged
+
+
+class _DeferredResult(Generic[T]):
+    finish: Callable[[], T] | None
+    # Only set once finished
+    value: T
+
+    def __init__(self, finish: Callable[[], T]) -> None:
+        self.finish = finish
+
+    def result(self) -> T:
+        if self.finish is not None:
+            self.value = self.finish()
+            self.finish = None
+        return self.value
+
+
+class _Loader:
+    executor: Executor
+    chunks: int
+    lazy: bool
+    parse_cache: 'ParseCache | None'
+
+    def __init__(self, executor: Executor, chunks: int, lazy: bool, parse_cache: 'ParseCache | None' = None) -> None:
+        self.executor = executor
+        self.chunks = chunks
+        self.lazy = lazy
+        self.parse_cache = parse_cache
+
+    def load_directory_files(
+        self,
+        path: Path,
+        entity_cls: type[T],
+        id_field: str = 'id',
+    ) -> _MergedResults[T] | _DeferredResult[dict[Any, T]]:
+        file_names = os.listdir(path)
+        parse_cache = self.parse_cache
+        if parse_cache is not None:
+            return self._load_cached_directory_files(parse_cache, path, entity_cls, id_field, file_names)
+        chunk_size = self._get_chunk_size(file_names)
+        return _MergedResults(
+            [
+                self.executor.submit(
+                    _load_entities_from_directory_files,
+                    path,
+                    entity_cls,
+                    id_field,
+                    file_names[i:i + chunk_size],
+                    self.lazy,
+                )
+                for i in range(0, len(file_names), chunk_size)
+            ],
+            LazyEntities(entity_cls) if self.lazy else {},
         )
 
+    def load_file(
+        self,
+        path: Path,
+        entity_cls: type[T],
+        id_type: type = int,
+    ) -> Future[Mapping[Any, T]] | _DeferredResult[dict[Any, T]]:
+        parse_cache = self.parse_cache
+        if parse_cache is not None:
+            return self._load_cached_file(parse_cache, path, entity_cls, id_type)
+        future = self.executor.submit(_load_entities_from_file, path, entity_cls, id_type, self.lazy)
+        # The type checker cannot tie the entity type of the submitted loader back to the one given here
+        return cast(Future[Mapping[Any, T]], future)
+
+    def _get_chunk_size(self, file_names: list[str]) -> int:
+        return max(1, -(-len(file_names) // self.chunks))
+
+    def _load_cached_directory_files(
+        self,
+        parse_cache: 'ParseCache',
+        path: Path,
+        entity_cls: type[T],
+        id_field: str,
+        file_names: list[str],
+    ) -> _DeferredResult[dict[Any, T]]:
+        # Cached per file, so that only the files which were added or changed since the last load are parsed again
+        name = path.name
+        cached = parse_cache.load(name) or {}
+        stamps = {file_name: _get_file_stamp(path / file_name) for file_name in file_names}
+        stale = [
+            file_name
+            for file_name in file_names
+            if file_name not in cached or cached[file_name][0] != stamps[file_name]
+        ]
+        chunk_size = self._get_chunk_size(stale)
+        chunks = [
+            (chunk, self.executor.submit(_parse_directory_files, path, entity_cls, chunk))
+            for chunk in (stale[i:i + chunk_size] for i in range(0, len(stale), chunk_size))
+        ]
+
+        def finish() -> dict[Any, T]:
+            parsed = {}
+            for chunk, future in chunks:
+                parsed.update(zip(chunk, future.result()))
+            # Rebuilt from the current listing, which also drops the files which were removed
+            entries = {}
+            entities = {}
+            for file_name in file_names:
+                entity = parsed[file_name] if file_name in parsed else cached[file_name][1]
+                entries[file_name] = (stamps[file_name], entity)
+                entities[getattr(entity, id_field)] = entity
+            removed = len(cached.keys() - entries.keys())
+            logger.info(
+                f'Parse cache for {name}: {len(file_names) - len(stale)} hits, {len(stale)} misses, {removed} removed'
+            )
+            if stale or removed:
+                parse_cache.save(name, entries)
+            return entities
+
+        return _DeferredResult(finish)
+
+    def _load_cached_file(
+        self,
+        parse_cache: 'ParseCache',
+        path: Path,
+        entity_cls: type[T],
+        id_type: type,
+    ) -> _DeferredResult[dict[Any, T]]:
+        # Cached for the whole file, and per top-level key for when the file has changed
+        name = path.name
+        cached_stamp, cached_entries = parse_cache.load(name) or (None, {})
+        stamp = _get_file_stamp(path)
+        if stamp == cached_stamp:
+            logger.info(f'Parse cache for {name}: {len(cached_entries)} hits, 0 misses')
+            return _DeferredResult(
+                lambda: {id_type(key): entity for key, (_, entity) in cached_entries.items()}
+            )
+
+        # As with load_file, the entity type of the submitted parser is not tied back to the one given here
+        future = cast(
+            Future[tuple[dict[str, tuple[bytes, T]], int]],
+            self.executor.submit(_parse_file_entries, path, entity_cls, cached_entries),
+        )
+
+        def finish() -> dict[Any, T]:
+            entries, misses = future.result()
+            logger.info(f'Parse cache for {name}: {len(entries) - misses} hits, {misses} misses')
+            parse_cache.save(name, (stamp, entries))
+            return {id_type(key): entity for key, (_, entity) in entries.items()}
+
+        return _DeferredResult(finish)
+
+
+def _create_executor(workers: int) -> Executor:
+    return ProcessPoolExecutor(max_workers=workers) if workers > 1 else _SerialExecutor()
+
+
+def _load_entities_from_directory_files(
+    path: Path,
+    entity_cls: type[T],
+    id_field: str = 'id',
+    file_names: list[str] | None = None,
+    lazy: bool = False,
+) -> dict[Any, T] | LazyEntities[T]:
+    if lazy:
+        raw = {}
+        for file_name in os.listdir(path) if file_names is None else file_names:
+            with open(path / file_name, encoding='utf-8') as f:
+                data = sudanjson.load(f)
+                raw[parse_field(data, entity_cls, id_field)] = data
+        return LazyEntities(entity_cls, raw)
 
-def _load_entities_from_directory_files(path: Path, entity_cls: type[T], id_field: str = 'id') -> dict[Any, T]:
     entities = {}
-    for file_name in os.listdir(path):
+    for file_name in os.listdir(path) if file_names is None else file_names:
         with open(path / file_name, encoding='utf-8') as f:
             data = sudanjson.load(f)
             entity = parse_value(data, entity_cls)
@@ -66,16 +329,58 @@ def _load_entities_from_directory_files(path: Path, entity_cls: type[T], id_fiel
     return entities
 
 
-def _load_entities_from_file(path: Path, entity_cls: type[T], id_type: type = int) -> dict[Any, T]:
-    entities = {}
+def _load_entities_from_file(
+    path: Path,
+    entity_cls: type[T],
+    id_type: type = int,
+    lazy: bool = False,
+) -> Mapping[Any, T]:
     with open(path, encoding='utf-8') as f:
         data = sudanjson.load(f)
-        for key, value in data.items():
-            entity = parse_value(value, entity_cls)
-            entities[id_type(key)] = entity
+    if lazy:
+        return LazyEntities(entity_cls, {id_type(key): value for key, value in data.items()})
+
+    entities = {}
+    for key, value in data.items():
+        entity = parse_value(value, entity_cls)
+        entities[id_type(key)] = entity
+    return entities
+
+
+def _parse_directory_files(path: Path, entity_cls: type[T], file_names: list[str]) -> list[T]:
+    entities = []
+    for file_name in file_names:
+        with open(path / file_name, encoding='utf-8') as f:
+            entities.append(parse_value(sudanjson.load(f), entity_cls))
     return entities
 
 
+def _parse_file_entries(
+    path: Path,
+    entity_cls: type[T],
+    cached_entries: dict[str, tuple[bytes, T]],
+) -> tuple[dict[str, tuple[bytes, T]], int]:
+    with open(path, encoding='utf-8') as f:
+        data = sudanjson.load(f)
+    entries = {}
+    misses = 0
+    for key, value in data.items():
+        # The decoded value is compared through its repr, which also covers the order of duplicate keys
+        digest = hashlib.sha1(repr(value).encode()).digest()
+        cached = cached_entries.get(key)
+        if cached is not None and cached[0] == digest:
+            entries[key] = cached
+        else:
+            entries[key] = (digest, parse_value(value, entity_cls))
+            misses += 1
+    return entries, misses
+
+
+def _get_file_stamp(path: Path) -> tuple[int, int]:
+    stat = path.stat()
+    return stat.st_size, stat.st_mtime_ns
+
+
 def _load_localisations(path: Path) -> dict[str, dict[str, str]]:
     localisations = {}
     for sub_path in path.iterdir():
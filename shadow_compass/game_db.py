@@ -3,12 +3,18 @@ from __future__ import annotations
 import json
 import logging
 from abc import ABC, abstractmethod
-from dataclasses import dataclass, field
+from array import array
+from dataclasses import dataclass, field, fields, replace
+from functools import cached_property
 from pathlib import Path
-from typing import Self, Iterable, TypeVar, Any
+from typing import Self, Iterable, TypeVar, Any, Sequence, NamedTuple, cast
 
+from shadow_compass import card_table, snapshot
+from shadow_compass.card_table import CardTable
+from shadow_compass.collation import get_collation_key
 from shadow_compass.game_config import GameConfig
-from shadow_compass.loc import Loc
+from shadow_compass.loc import Loc, LocTable, cached_locs
+from shadow_compass.reference_graph import EntryView, ReferenceGraph, Relation
 from shadow_compass.resources import list_image_resources
 from shadow_compass.schema.card import Card
 from shadow_compass.schema.enums import CardDisplayType, CardRarity
@@ -34,18 +40,9 @@ def stub_default() -> Any:
 
 @dataclass(frozen=True)
 class Entry(ABC):
-    card_vanish_effects: list[CardEntry] = field(default_factory=list)
-    card_post_rite_conditions: list[CardEntry] = field(default_factory=list)
-    card_post_rite_effects: list[CardEntry] = field(default_factory=list)
-    ending_conditions: list[EndingEntry] = field(default_factory=list)
-    event_triggers: list[EventEntry] = field(default_factory=list)
-    event_conditions: list[EventEntry] = field(default_factory=list)
-    event_effects: list[EventEntry] = field(default_factory=list)
-    loot_items: list[LootEntry] = field(default_factory=list)
-    loot_conditions: list[LootEntry] = field(default_factory=list)
-    objective_conditions: list[ObjectiveEntry] = field(default_factory=list)
-    rite_conditions: list[RiteEntry] = field(default_factory=list)
-    rite_effects: list[RiteEntry] = field(default_factory=list)
+    # Left out of the saved links along with the lists of linked entries, which are set again once they are loaded
+    graph: ReferenceGraph = field(default_factory=stub_default, compare=False, metadata=snapshot.TRANSIENT)
+    node: int = field(default_factory=stub_default)
 
     @property
     @abstractmethod
@@ -61,6 +58,42 @@ class Entry(ABC):
     def sort_key(self) -> Loc:
         return self.label
 
+    @property
+    def card_vanish_effects(self) -> Sequence[CardEntry]: return self.graph.get_sources(Relation.CARD_VANISH_EFFECTS, self.node)
+
+    @property
+    def card_post_rite_conditions(self) -> Sequence[CardEntry]: return self.graph.get_sources(Relation.CARD_POST_RITE_CONDITIONS, self.node)
+
+    @property
+    def card_post_rite_effects(self) -> Sequence[CardEntry]: return self.graph.get_sources(Relation.CARD_POST_RITE_EFFECTS, self.node)
+
+    @property
+    def ending_conditions(self) -> Sequence[EndingEntry]: return self.graph.get_sources(Relation.ENDING_CONDITIONS, self.node)
+
+    @property
+    def event_triggers(self) -> Sequence[EventEntry]: return self.graph.get_sources(Relation.EVENT_TRIGGERS, self.node)
+
+    @property
+    def event_conditions(self) -> Sequence[EventEntry]: return self.graph.get_sources(Relation.EVENT_CONDITIONS, self.node)
+
+    @property
+    def event_effects(self) -> Sequence[EventEntry]: return self.graph.get_sources(Relation.EVENT_EFFECTS, self.node)
+
+    @property
+    def loot_items(self) -> Sequence[LootEntry]: return self.graph.get_sources(Relation.LOOT_ITEMS, self.node)
+
+    @property
+    def loot_conditions(self) -> Sequence[LootEntry]: return self.graph.get_sources(Relation.LOOT_CONDITIONS, self.node)
+
+    @property
+    def objective_conditions(self) -> Sequence[ObjectiveEntry]: return self.graph.get_sources(Relation.OBJECTIVE_CONDITIONS, self.node)
+
+    @property
+    def rite_conditions(self) -> Sequence[RiteEntry]: return self.graph.get_sources(Relation.RITE_CONDITIONS, self.node)
+
+    @property
+    def rite_effects(self) -> Sequence[RiteEntry]: return self.graph.get_sources(Relation.RITE_EFFECTS, self.node)
+
     def __repr__(self):
         return f'<{self.__class__.__name__} key={self.key}>'
 
@@ -72,13 +105,13 @@ E = TypeVar('E', bound=Entry)
 class CardEntry(Entry):
     card: Card = field(default_factory=stub_default)
     gallery_card: GalleryCard | None = None
-    tags: list[tuple[TagEntry, int]] = field(default_factory=list)
-    equips: list[TagEntry] = field(default_factory=list)
+    tags: list[tuple[TagEntry, int]] = field(default_factory=list, metadata=snapshot.TRANSIENT)
+    equips: list[TagEntry] = field(default_factory=list, metadata=snapshot.TRANSIENT)
 
     @property
     def key(self) -> str: return f'cards/{self.card.id}'
 
-    @property
+    @cached_property
     def label(self) -> Loc: return self.card.name_
 
     @property
@@ -103,24 +136,25 @@ class CardEntry(Entry):
 class EndingEntry(Entry):
     id: int = field(default_factory=stub_default)
     over: Over = field(default_factory=stub_default)
-    on_cards_vanish: list[CardEntry] = field(default_factory=list)
-    on_cards_post_rite: list[CardEntry] = field(default_factory=list)
+    on_cards_vanish: list[CardEntry] = field(default_factory=list, metadata=snapshot.TRANSIENT)
+    on_cards_post_rite: list[CardEntry] = field(default_factory=list, metadata=snapshot.TRANSIENT)
 
     @property
     def key(self) -> str: return f'endings/{self.id}'
 
-    @property
+    @cached_property
     def label(self) -> Loc: return self.name
 
-    @property
+    @cached_property
     def name(self) -> Loc: return Loc(self.over.name or '', f'over_{self.id}_name')
 
-    @property
+    @cached_property
     def sub_name(self) -> Loc: return Loc(self.over.sub_name or '', f'over_{self.id}_subname')
 
-    @property
+    @cached_property
     def text(self) -> Loc: return Loc(self.over.text, f'over_{self.id}')
 
+    @cached_locs
     def get_extra_text(self, idx: int) -> Loc:
         return Loc(self.over.text_extra[idx].result_text, f'over_{self.id}_extra_{idx}_text')
 
@@ -128,12 +162,12 @@ class EndingEntry(Entry):
 @dataclass(frozen=True, repr=False)
 class EventEntry(Entry):
     event: Event = field(default_factory=stub_default)
-    on_cards_vanish: list[CardEntry] = field(default_factory=list)
+    on_cards_vanish: list[CardEntry] = field(default_factory=list, metadata=snapshot.TRANSIENT)
 
     @property
     def key(self) -> str: return f'events/{self.event.id}'
 
-    @property
+    @cached_property
     def label(self) -> Loc: return self.event.text_
 
 
@@ -144,7 +178,7 @@ class LootEntry(Entry):
     @property
     def key(self) -> str: return f'loots/{self.loot.id}'
 
-    @property
+    @cached_property
     def label(self) -> Loc: return self.loot.name_
 
 
@@ -155,7 +189,7 @@ class ObjectiveEntry(Entry):
     @property
     def key(self) -> str: return f'objectives/{self.quest.id}'
 
-    @property
+    @cached_property
     def label(self) -> Loc: return self.quest.name_
 
 
@@ -166,21 +200,21 @@ class RiteEntry(Entry):
     @property
     def key(self) -> str: return f'rites/{self.rite.id}'
 
-    @property
+    @cached_property
     def label(self) -> Loc: return self.rite.name_
 
 
 @dataclass(frozen=True, repr=False)
 class TagEntry(Entry):
     tag: Tag = field(default_factory=stub_default)
-    cards: list[CardEntry] = field(default_factory=list)
-    card_equips: list[CardEntry] = field(default_factory=list)
-    rite_tips: list[RiteEntry] = field(default_factory=list)
+    cards: list[CardEntry] = field(default_factory=list, metadata=snapshot.TRANSIENT)
+    card_equips: list[CardEntry] = field(default_factory=list, metadata=snapshot.TRANSIENT)
+    rite_tips: list[RiteEntry] = field(default_factory=list, metadata=snapshot.TRANSIENT)
 
     @property
     def key(self) -> str: return f'tags/{self.tag.code}'
 
-    @property
+    @cached_property
     def label(self) -> Loc: return self.tag.name_
 
 
@@ -191,7 +225,7 @@ class UpgradeEntry(Entry):
     @property
     def key(self) -> str: return f'upgrades/{self.upgrade.id}'
 
-    @property
+    @cached_property
     def label(self) -> Loc: return self.upgrade.name_
 
 
@@ -206,41 +240,83 @@ class GameDb:
     rites: dict[int, RiteEntry]
     tags: dict[str, TagEntry]
     upgrades: dict[int, UpgradeEntry]
-    localisations: dict[str, dict[str, str]]
+    loc_table: LocTable
+    graph: ReferenceGraph
+    # Rank of each entry when sorted in each language, and the sorted reference lists for each language
+    _sort_ranks: dict[str, array] = field(default_factory=dict, init=False, repr=False, compare=False)
+    _sorted_views: dict[tuple[Relation, int, str], tuple[Entry, ...]] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+
+    @cached_property
+    def card_table(self) -> CardTable:
+        return CardTable.from_entries(self.cards.values())
 
     @property
     def cards_by_display_type(self) -> Iterable[tuple[CardDisplayType | None, list[CardEntry]]]:
         display_types = (*sorted(CardDisplayType, key=lambda cdt: cdt.label), None)
-        cards_by_display_type = {cdt: [] for cdt in display_types}
-        for card_entry in self.cards.values():
-            cards_by_display_type[card_entry.display_type].append(card_entry)
         for display_type in display_types:
-            yield display_type, cards_by_display_type[display_type]
+            card_ids = self.card_table.where(card_table.display_type == display_type)
+            yield display_type, [self.cards[card_id] for card_id in card_ids]
+
+    def __post_init__(self) -> None:
+        # Labels are translated for every link to an entry and every sort, so they are interned along with the database
+        for entry in self.graph.nodes:
+            self.loc_table.intern(entry.label)
 
     def trans(self, loc: Loc, lang: str) -> str:
-        text = self.localisations.get(lang, {}).get(loc.loc_id)
-        if text is None:
-            text = loc.text if lang == SOURCE_LANGUAGE or not loc.fallback else loc.fallback
-        return text
+        return self.loc_table.translate(loc, lang)
 
     def sort(self, entries: Iterable[E], lang: str) -> list[E]:
-        return sorted(entries, key=lambda entry: self.trans(entry.sort_key, lang))
+        if isinstance(entries, EntryView):
+            key = (entries.relation, entries.target, lang)
+            ordered = self._sorted_views.get(key)
+            if ordered is None:
+                ordered = self._sorted_views[key] = tuple(self._sort_by_rank(entries, lang))
+            # Views are keyed by their relation and target, which fix the type of entry they hold
+            return cast(list[E], list(ordered))
+        return self._sort_by_rank(entries, lang)
+
+    def _sort_by_rank(self, entries: Iterable[E], lang: str) -> list[E]:
+        ranks = self._sort_ranks.get(lang)
+        if ranks is None:
+            ranks = self._sort_ranks[lang] = self._rank_entries(lang)
+        return sorted(entries, key=lambda entry: ranks[entry.node])
+
+    def _rank_entries(self, lang: str) -> array:
+        # Every entry is translated and collated once per language, with equal keys sharing a rank so that sorting
+        # by rank keeps the same order as sorting by key
+        keys = [get_collation_key(self.trans(entry.sort_key, lang), lang) for entry in self.graph.nodes]
+        ranks = array('l', bytes(len(keys) * array('l').itemsize))
+        previous = None
+        rank = 0
+        for i, node in enumerate(sorted(range(len(keys)), key=keys.__getitem__)):
+            if keys[node] != previous:
+                previous = keys[node]
+                rank = i
+            ranks[node] = rank
+        return ranks
+
+    @property
+    def entries(self) -> Iterable[Entry]:
+        for collection in (
+            self.cards,
+            self.endings,
+            self.events,
+            self.loots,
+            self.objectives,
+            self.rites,
+            self.tags,
+            self.upgrades,
+        ):
+            yield from collection.values()
 
     @classmethod
     def from_config(cls, config: GameConfig, additional_localisations_path: Path) -> Self:
         logger.info('Building game database')
 
-        cards = {
-            card_id: CardEntry(card=card, gallery_card=config.gallery_cards.get(card_id))
-            for card_id, card in config.cards.items()
-        }
-        endings = {over_id: EndingEntry(id=over_id, over=over) for over_id, over in config.overs.items()}
-        events = {event_id: EventEntry(event=event) for event_id, event in config.events.items()}
-        loots = {loot_id: LootEntry(loot=loot) for loot_id, loot in config.loots.items()}
-        objectives = {quest_id: ObjectiveEntry(quest=quest) for quest_id, quest in config.quests.items()}
-        rites = {rite_id: RiteEntry(rite=rite) for rite_id, rite in config.rites.items()}
-        tags = {tag.name: TagEntry(tag=tag) for tag in config.tags.values()}
-        upgrades = {upgrade_id: UpgradeEntry(upgrade=upgrade) for upgrade_id, upgrade in config.upgrades.items()}
+        graph = ReferenceGraph()
+        cards, endings, events, loots, objectives, rites, tags, upgrades = _create_entries(config, graph)
 
         for card in cards.values():
             for tag_name, value in card.card.tag.items():
@@ -258,53 +334,41 @@ class GameDb:
                     logger.warning(f'Failed to locate tag: {tag_name}')
             card.equips.sort(key=lambda t: t.tag.code)
 
-            for references, attr_name in (
-                (card.card.vanish_effect_references(), 'card_vanish_effects'),
-                (card.card.post_rite_condition_references(), 'card_post_rite_conditions'),
-                (card.card.post_rite_effect_references(), 'card_post_rite_effects'),
-            ):
-                _apply_references(card, references, attr_name, cards, endings, events, loots, rites, tags, upgrades)
+            _apply_references(card, card.card.collected_references, cards, endings, events, loots, rites, tags, upgrades)
 
         for rite in rites.values():
-            for tag_tip_reference in rite.rite.tag_tips_references():
-                if tag_tip_reference.id in tags:
-                    tags[tag_tip_reference.id].rite_tips.append(rite)
+            for relation_name, reference in rite.rite.collected_references:
+                if relation_name != 'tag_tips' or not isinstance(reference, TagReference):
+                    continue
+                if reference.id in tags:
+                    tags[reference.id].rite_tips.append(rite)
                 else:
-                    logger.warning(f'Failed to locate tag: {tag_tip_reference.id}')
-
-            for references, attr_name in (
-                (rite.rite.condition_references(), 'rite_conditions'),
-                (rite.rite.effect_references(), 'rite_effects'),
-            ):
-                _apply_references(rite, references, attr_name, cards, endings, events, loots, rites, tags, upgrades)
+                    logger.warning(f'Failed to locate tag: {reference.id}')
+            _apply_references(rite, rite.rite.collected_references, cards, endings, events, loots, rites, tags, upgrades)
 
         for ending in endings.values():
-            _apply_references(ending, ending.over.condition_references(), 'ending_conditions',  cards, endings, events, loots, rites, tags, upgrades)
+            _apply_references(ending, ending.over.collected_references, cards, endings, events, loots, rites, tags, upgrades)
 
         for event in events.values():
-            for references, attr_name in (
-                (event.event.event_on_references(), 'event_triggers'),
-                (event.event.condition_references(), 'event_conditions'),
-                (event.event.effect_references(), 'event_effects'),
-            ):
-                _apply_references(event, references, attr_name, cards, endings, events, loots, rites, tags, upgrades)
+            _apply_references(event, event.event.collected_references, cards, endings, events, loots, rites, tags, upgrades)
 
         for loot in loots.values():
-            for references, attr_name in (
-                (loot.loot.item_references(), 'loot_items'),
-                (loot.loot.condition_references(), 'loot_conditions'),
-            ):
-                _apply_references(loot, references, attr_name, cards, endings, events, loots, rites, tags, upgrades)
+            _apply_references(loot, loot.loot.collected_references, cards, endings, events, loots, rites, tags, upgrades)
 
         for objective in objectives.values():
-            _apply_references(objective, objective.quest.condition_references(), 'objective_conditions', cards, endings, events, loots, rites, tags, upgrades)
+            _apply_references(
+                objective, objective.quest.collected_references, cards, endings, events, loots, rites, tags, upgrades
+            )
 
         localisations = json.load(additional_localisations_path.open(encoding='utf-8'))
         for lang, lang_localisations in config.localisations.items():
             localisations[lang].update(lang_localisations)
 
+        graph.freeze()
         return cls(
             image_resources=list_image_resources(),
+            loc_table=LocTable.from_localisations(localisations, SOURCE_LANGUAGE),
+            graph=graph,
             cards=cards,
             endings=endings,
             events=events,
@@ -313,17 +377,147 @@ class GameDb:
             rites=rites,
             tags=tags,
             upgrades=upgrades,
-            localisations=localisations,
         )
 
+    @classmethod
+    def from_links(cls, links: dict[str, Any]) -> Self:
+        # Rebuilds the database saved by get_links, whose entries only need their graph and linked entries set again
+        logger.info('Building game database from links')
+
+        graph = ReferenceGraph()
+        nodes: list[Entry] = links['nodes']
+        list_names: dict[type[Entry], list[str]] = {}
+        for entry in nodes:
+            names = list_names.get(type(entry))
+            if names is None:
+                names = list_names[type(entry)] = [
+                    f.name for f in fields(entry) if snapshot.is_transient(f) and f.name != 'graph'
+                ]
+            for name in names:
+                # Entries are frozen, so the lists are set the same way as their own __init__ does
+                object.__setattr__(entry, name, [])
+            graph.restore(entry)
+        for node, entry_links in links['links'].items():
+            entry = nodes[node]
+            for attr_name, linked_nodes in entry_links.items():
+                if attr_name.upper() in Relation.__members__:
+                    relation = Relation[attr_name.upper()]
+                    for n in linked_nodes:
+                        graph.add_edge(relation, node, n)
+                else:
+                    getattr(entry, attr_name).extend(
+                        (nodes[n[0]], n[1]) if type(n) is tuple else nodes[n]
+                        for n in linked_nodes
+                    )
+
+        graph.freeze()
+        collections = links['collections']
+        return cls(
+            image_resources=set(links['image_resources']),
+            loc_table=links['loc_table'],
+            graph=graph,
+            cards=collections['cards'],
+            endings=collections['endings'],
+            events=collections['events'],
+            loots=collections['loots'],
+            objectives=collections['objectives'],
+            rites=collections['rites'],
+            tags=collections['tags'],
+            upgrades=collections['upgrades'],
+        )
+
+    def get_links(self) -> dict[str, Any]:
+        # The entries, saved without their graph and their lists of linked entries, along with every list of linked
+        # entries with the entries replaced by their nodes, the image resources and the localisation table
+        links = {}
+        for entry in self.entries:
+            entry_links = {}
+            for relation in Relation:
+                sources = entry.graph.get_sources(relation, entry.node)
+                if sources:
+                    entry_links[relation.name.lower()] = [e.node for e in sources]
+            for f in fields(entry):
+                value = getattr(entry, f.name)
+                if type(value) is list and value:
+                    entry_links[f.name] = [
+                        (e[0].node, e[1]) if type(e) is tuple else e.node
+                        for e in value
+                    ]
+            if entry_links:
+                links[entry.node] = entry_links
+        return {
+            'nodes': self.graph.nodes,
+            'collections': {
+                'cards': self.cards,
+                'endings': self.endings,
+                'events': self.events,
+                'loots': self.loots,
+                'objectives': self.objectives,
+                'rites': self.rites,
+                'tags': self.tags,
+                'upgrades': self.upgrades,
+            },
+            'links': links,
+            'image_resources': sorted(self.image_resources),
+            # Saved without the Locs interned so far, which are interned again by the entries they belong to
+            'loc_table': replace(self.loc_table, locs=[], loc_handles={}, strings={}),
+        }
+
     def __repr__(self):
         return f'<GameDb {id(self)}>'
 
 
+# Relations of the references collected from the entity of each type of entry, to the lists of the entries they target
+_RELATIONS: dict[type[Entry], dict[str, Relation]] = {
+    CardEntry: {
+        'vanish_effects': Relation.CARD_VANISH_EFFECTS,
+        'conditions': Relation.CARD_POST_RITE_CONDITIONS,
+        'effects': Relation.CARD_POST_RITE_EFFECTS,
+    },
+    EndingEntry: {'conditions': Relation.ENDING_CONDITIONS},
+    EventEntry: {
+        'triggers': Relation.EVENT_TRIGGERS,
+        'conditions': Relation.EVENT_CONDITIONS,
+        'effects': Relation.EVENT_EFFECTS,
+    },
+    LootEntry: {'items': Relation.LOOT_ITEMS, 'conditions': Relation.LOOT_CONDITIONS},
+    ObjectiveEntry: {'conditions': Relation.OBJECTIVE_CONDITIONS},
+    RiteEntry: {'conditions': Relation.RITE_CONDITIONS, 'effects': Relation.RITE_EFFECTS},
+}
+
+
+class _Entries(NamedTuple):
+    cards: dict[int, CardEntry]
+    endings: dict[int, EndingEntry]
+    events: dict[int, EventEntry]
+    loots: dict[int, LootEntry]
+    objectives: dict[int, ObjectiveEntry]
+    rites: dict[int, RiteEntry]
+    tags: dict[str, TagEntry]
+    upgrades: dict[int, UpgradeEntry]
+
+
+def _create_entries(config: GameConfig, graph: ReferenceGraph) -> _Entries:
+    return _Entries(
+        cards={
+            card_id: graph.add(CardEntry, card=card, gallery_card=config.gallery_cards.get(card_id))
+            for card_id, card in config.cards.items()
+        },
+        endings={over_id: graph.add(EndingEntry, id=over_id, over=over) for over_id, over in config.overs.items()},
+        events={event_id: graph.add(EventEntry, event=event) for event_id, event in config.events.items()},
+        loots={loot_id: graph.add(LootEntry, loot=loot) for loot_id, loot in config.loots.items()},
+        objectives={quest_id: graph.add(ObjectiveEntry, quest=quest) for quest_id, quest in config.quests.items()},
+        rites={rite_id: graph.add(RiteEntry, rite=rite) for rite_id, rite in config.rites.items()},
+        tags={tag.name: graph.add(TagEntry, tag=tag) for tag in config.tags.values()},
+        upgrades={
+            upgrade_id: graph.add(UpgradeEntry, upgrade=upgrade) for upgrade_id, upgrade in config.upgrades.items()
+        },
+    )
+
+
 def _apply_references(
     entry: Entry,
-    references: Iterable[Reference],
-    attr_name: str,
+    references: Iterable[tuple[str, Reference]],
     cards: dict[int, CardEntry],
     endings: dict[int, EndingEntry],
     events: dict[int, EventEntry],
@@ -332,7 +526,12 @@ def _apply_references(
     tags: dict[str, TagEntry],
     upgrades: dict[int, UpgradeEntry],
 ) -> None:
-    for ref in references:
+    # Only the relations which are listed for the type of the entry are linked
+    relations = _RELATIONS[type(entry)]
+    for relation_name, ref in references:
+        relation = relations.get(relation_name)
+        if relation is None:
+            continue
         target = None
         match ref:
             case CardReference():
@@ -373,6 +572,4 @@ def _apply_references(
             case _:
                 raise ValueError(f'Unknown reference type: {ref}')
         if target is not None:
-            attr = getattr(target, attr_name)
-            if not any(e for e in attr if e.key == entry.key):
-                attr.append(entry)
+            entry.graph.add_edge(relation, target.node, entry.node)
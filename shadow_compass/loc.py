@@ -1,4 +1,9 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from functools import wraps
+from typing import Any, Callable, Self, TypeVar
+
+S = TypeVar('S')
+K = TypeVar('K')
 
 
 @dataclass(frozen=True)
@@ -6,3 +11,92 @@ class Loc:
     text: str
     loc_id: str
     fallback: str | None = None
+    # Index of the Loc's strings in the LocTable which last interned it, which only that table's Loc at the same index
+    # confirms, since a Loc may be translated through more than one table
+    handle: int = field(default=-1, compare=False, repr=False)
+
+
+@dataclass(frozen=True)
+class LocTable:
+    # Localised strings of every language, held in a list per language indexed by the integer handle of each loc ID
+    # rather than in a dict per language keyed by the loc IDs themselves. Loc IDs which a language does not translate
+    # are None.
+    #
+    # Each Loc translated through the table is interned once, and given a handle of its own into a list per language
+    # of its strings, with the fallbacks of those which are not translated already resolved. Locs are made once per
+    # entity, so translating one again only indexes a list.
+    source_language: str
+    handles: dict[str, int]
+    translations: dict[str, list[str | None]]
+    locs: list[Loc] = field(default_factory=list)
+    loc_handles: dict[Loc, int] = field(default_factory=dict)
+    strings: dict[str, list[str]] = field(default_factory=dict)
+
+    @classmethod
+    def from_localisations(cls, localisations: dict[str, dict[str, str]], source_language: str) -> Self:
+        handles: dict[str, int] = {}
+        for lang_localisations in localisations.values():
+            for loc_id in lang_localisations:
+                if loc_id not in handles:
+                    handles[loc_id] = len(handles)
+        # Texts which are identical between languages, such as untranslated ones, are only held once
+        texts: dict[str, str] = {}
+        translations = {}
+        for lang, lang_localisations in localisations.items():
+            lang_translations: list[str | None] = [None] * len(handles)
+            for loc_id, text in lang_localisations.items():
+                lang_translations[handles[loc_id]] = texts.setdefault(text, text)
+            translations[lang] = lang_translations
+        return cls(
+            source_language=source_language,
+            handles=handles,
+            translations=translations,
+        )
+
+    def get(self, loc_id: str, lang: str) -> str | None:
+        handle = self.handles.get(loc_id)
+        lang_translations = self.translations.get(lang)
+        return lang_translations[handle] if handle is not None and lang_translations is not None else None
+
+    def translate(self, loc: Loc, lang: str) -> str:
+        handle = loc.handle
+        locs = self.locs
+        if not (0 <= handle < len(locs) and locs[handle] is loc):
+            handle = self.intern(loc)
+        return self.strings[lang][handle]
+
+    def intern(self, loc: Loc) -> int:
+        handle = self.loc_handles.get(loc)
+        if handle is None:
+            handle = self.loc_handles[loc] = len(self.locs)
+            self.locs.append(loc)
+            translation_handle = self.handles.get(loc.loc_id)
+            for lang, lang_translations in self.translations.items():
+                text = lang_translations[translation_handle] if translation_handle is not None else None
+                if text is None:
+                    text = loc.text if lang == self.source_language or not loc.fallback else loc.fallback
+                self.strings.setdefault(lang, []).append(text)
+        # Locs are frozen, so the handle is set the same way as their own __init__ does
+        object.__setattr__(loc, 'handle', handle)
+        return handle
+
+    def __repr__(self) -> str:
+        return f'<LocTable ids={len(self.handles)} locs={len(self.locs)} languages={",".join(self.translations)}>'
+
+
+def cached_locs(getter: Callable[[S, K], Loc]) -> Callable[[S, K], Loc]:
+    # Makes the Loc of each key once per instance, and keeps it on the instance the same way as cached_property does,
+    # so that it keeps the handle it is interned with
+    @wraps(getter)
+    def cached_getter(self: S, key: K) -> Loc:
+        instance_dict: dict[str, Any] = vars(self)
+        locs = instance_dict.get(cache_name)
+        if locs is None:
+            locs = instance_dict[cache_name] = {}
+        loc = locs.get(key)
+        if loc is None:
+            loc = locs[key] = getter(self, key)
+        return loc
+
+    cache_name = f'_{cached_getter.__name__}_locs'
+    return cached_getter
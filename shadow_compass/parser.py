@@ -1,14 +1,15 @@
 import logging
-import re
+from collections import Counter
+from contextlib import contextmanager
 from dataclasses import is_dataclass, fields
 from enum import Enum, IntEnum
 from types import NoneType, UnionType, GenericAlias
-from typing import Any, TypeVar
+from typing import Any, TypeVar, Callable, Generator, Iterable
 
 from shadow_compass.prop import get_prop_metadata
 from shadow_compass.schema.common import CustomSchema
-from shadow_compass.schema.condition import Condition, list_conditions
-from shadow_compass.schema.effect import Effect, list_effects
+from shadow_compass.schema.condition import Condition, match_condition
+from shadow_compass.schema.effect import Effect, match_effect
 from shadow_compass.schema.formula import FormulaElement, parse_formula
 from shadow_compass.sudanjson import MultiDict
 
@@ -21,44 +22,199 @@ class UnsupportedPropType(RuntimeError):
     pass
 
 
+Parser = Callable[[Any], Any]
+
+_parsers: dict[tuple[Any, bool], Parser] = {}
+_interned: dict[Any, Any] = {}
+_interning = True
+
+# Counts union arms skipped by type dispatch, and arms that were still tried and failed
+parse_stats: Counter[str] = Counter()
+
+
 def parse_value(data: Any, type_: type | str | Any, ignore_parse_method: bool = False) -> Any:
+    return _get_parser(type_, ignore_parse_method)(data)
+
+
+def parse_field(data: dict[str, Any], entity_cls: type, field_name: str) -> Any:
+    # Parses a single field of an entity's data the same way as when parsing the whole entity
+    prop_name, field_parser = next(
+        (prop_name, field_parser) for name, prop_name, field_parser, _ in _compile_plan(entity_cls) if name == field_name
+    )
+    return field_parser(data[prop_name])
+
+
+def clear_interned() -> None:
+    _interned.clear()
+
+
+@contextmanager
+def disable_interning() -> Generator[None, None, None]:
+    # Values parsed within are left as-is rather than being added to the intern table
+    global _interning
+    previous = _interning
+    _interning = False
+    try:
+        yield
+    finally:
+        _interning = previous
+
+
+def _intern(value: T) -> T:
+    # Structurally equal values resolve to a single shared instance
+    if not _interning:
+        return value
+    try:
+        return _interned.setdefault(value, value)
+    except TypeError:
+        # Values holding a dict are unhashable, and are left as-is
+        return value
+
+
+def _get_parser(type_: type | str | Any, ignore_parse_method: bool = False) -> Parser:
+    return _parsers.get((type_, ignore_parse_method)) or _compile(type_, ignore_parse_method)
+
+
+def _compile(type_: type | str | Any, ignore_parse_method: bool) -> Parser:
+    # Builds a parser specialised for a type once, so that parsing does not need to rediscover the type's shape
     assert isinstance(type_, (type, GenericAlias, UnionType))
 
-    if data is None and type_ == NoneType:
-        return None
-    elif isinstance(data, (dict, MultiDict)) and is_dataclass(type_):
+    def unsupported(data: Any) -> Any:
+        raise UnsupportedPropType(f'Invalid type {type_} for data: {data}')
+
+    parser: Parser
+    if type_ == NoneType:
+        def parser(data: Any) -> Any:
+            return None if data is None else unsupported(data)
+    elif is_dataclass(type_):
+        assert isinstance(type_, type)
         if issubclass(type_, CustomSchema) and not ignore_parse_method:
-            return type_.parse(data, parse_value)
+            parse_method = type_.parse
+
+            def parser(data: Any) -> Any:
+                return parse_method(data, parse_value) if isinstance(data, (dict, MultiDict)) else unsupported(data)
         else:
-            return _parse_entity(data, type_)
-    elif isinstance(data, (int, str)) and isinstance(type_, type) and issubclass(type_, Enum):
-        return type_(int(data) if issubclass(type_, IntEnum) else data)
-    elif isinstance(data, (bool, float, int, str)) and type_ in (bool, float, int, str):
-        return type_(data)
+            plan: list[tuple[str, str, Parser, Any]] = []
+            prop_names: set[str] = set()
+            parse_entity = _compile_entity(type_, plan, prop_names)
+
+            def parser(data: Any) -> Any:
+                return parse_entity(data) if isinstance(data, (dict, MultiDict)) else unsupported(data)
+            # Registered before the plan is filled in, so that recursive schemas resolve to this parser
+            _parsers[(type_, ignore_parse_method)] = parser
+            plan.extend(_compile_plan(type_))
+            prop_names.update(prop_name for _, prop_name, _, _ in plan)
+    elif isinstance(type_, type) and issubclass(type_, Enum):
+        enum_cls = type_
+        is_int_enum = issubclass(type_, IntEnum)
+
+        def parser(data: Any) -> Any:
+            if isinstance(data, (int, str)):
+                return enum_cls(int(data) if is_int_enum else data)
+            return unsupported(data)
+    elif type_ in (bool, float, int, str):
+        basic_cls = type_
+
+        def parser(data: Any) -> Any:
+            return basic_cls(data) if isinstance(data, (bool, float, int, str)) else unsupported(data)
     elif isinstance(type_, UnionType):
-        args = type_.__args__
-        for arg in args:
-            try:
-                return parse_value(data, arg)
-            except UnsupportedPropType:
-                pass
+        parser = _compile_union(type_, unsupported)
     elif isinstance(type_, GenericAlias):
-        args = type_.__args__
-        if isinstance(data, str):
-            if _is_tuple_of(type_, FormulaElement):
-                return parse_formula(data)[0]
+        parser = _compile_generic(type_, unsupported)
+    else:
+        parser = unsupported
+
+    _parsers[(type_, ignore_parse_method)] = parser
+    return parser
+
+
+def _compile_generic(type_: GenericAlias, unsupported: Parser) -> Parser:
+    args = type_.__args__
+    from_str: Parser = unsupported
+    from_list: Parser = unsupported
+    from_dict: Parser = unsupported
+    if _is_tuple_of(type_, FormulaElement):
+        def from_str(data: str) -> Any:
+            return _intern(parse_formula(data)[0])
+    if _is_tuple(type_):
+        item_type = args[0]
+
+        def from_list(data: list) -> Any:
+            return tuple(parse_value(d, item_type) for d in data)
+    if _is_tuple_of(type_, Condition):
+        from_dict = _parse_conditions
+    elif _is_tuple_of(type_, Effect):
+        from_dict = _parse_effects
+    elif type_.__origin__ is dict and len(args) == 2:
+        key_type, value_type = args
+
+        def from_dict(data: dict[str, Any] | MultiDict[str, Any]) -> Any:
+            return {parse_value(k, key_type): parse_value(v, value_type) for k, v in data.items()}
+
+    handlers: dict[type, Parser] = {str: from_str, list: from_list, dict: from_dict, MultiDict: from_dict}
+
+    def parser(data: Any) -> Any:
+        handler = handlers.get(type(data))
+        if handler is not None:
+            return handler(data)
+        elif isinstance(data, str):
+            return from_str(data)
         elif isinstance(data, list):
-            if _is_tuple(type_):
-                return tuple(parse_value(d, args[0]) for d in data)
+            return from_list(data)
         elif isinstance(data, (dict, MultiDict)):
-            if _is_tuple_of(type_, Condition):
-                return _parse_conditions(data)
-            if _is_tuple_of(type_, Effect):
-                return _parse_effects(data)
-            if type_.__origin__ is dict and len(args) == 2:
-                return {parse_value(k, args[0]): parse_value(v, args[1]) for k, v in data.items()}
+            return from_dict(data)
+        return unsupported(data)
+    return parser
+
+
+def _compile_union(type_: UnionType, unsupported: Parser) -> Parser:
+    arm_types = type_.__args__
+    # Candidate arms for each type of JSON value, and the number of arms which are never tried for it
+    dispatch_table: dict[type, tuple[tuple[Parser, ...], int]] = {}
 
-    raise UnsupportedPropType(f'Invalid type {type_} for data: {data}')
+    def dispatch(data_type: type) -> tuple[tuple[Parser, ...], int]:
+        candidates = [arm_type for arm_type in arm_types if _accepts(arm_type, data_type)]
+        skipped = len(arm_types) - len(candidates)
+        dispatch_table[data_type] = tuple(_get_parser(arm_type) for arm_type in candidates), skipped
+        return dispatch_table[data_type]
+
+    def parser(data: Any) -> Any:
+        arm_parsers, skipped = dispatch_table.get(type(data)) or dispatch(type(data))
+        if skipped:
+            parse_stats['union_arms_skipped'] += skipped
+        for arm_parser in arm_parsers:
+            try:
+                return arm_parser(data)
+            except UnsupportedPropType:
+                parse_stats['union_fallbacks'] += 1
+        return unsupported(data)
+    return parser
+
+
+def _accepts(type_: type | Any, data_type: type) -> bool:
+    # Whether a parser for the type could accept the JSON value's type, mirroring the checks made by the parsers
+    if type_ == NoneType:
+        return data_type is NoneType
+    elif is_dataclass(type_):
+        return issubclass(data_type, (dict, MultiDict))
+    elif isinstance(type_, type) and issubclass(type_, Enum):
+        return issubclass(data_type, (int, str))
+    elif type_ in (bool, float, int, str):
+        return issubclass(data_type, (bool, float, int, str))
+    elif isinstance(type_, UnionType):
+        return any(_accepts(arm_type, data_type) for arm_type in type_.__args__)
+    elif isinstance(type_, GenericAlias):
+        if issubclass(data_type, str):
+            return _is_tuple_of(type_, FormulaElement)
+        elif issubclass(data_type, list):
+            return _is_tuple(type_)
+        elif issubclass(data_type, (dict, MultiDict)):
+            return (
+                _is_tuple_of(type_, Condition)
+                or _is_tuple_of(type_, Effect)
+                or (type_.__origin__ is dict and len(type_.__args__) == 2)
+            )
+    return False
 
 
 def _is_tuple_of(tuple_: GenericAlias, of: type) -> bool:
@@ -69,61 +225,69 @@ def _is_tuple(tuple_: GenericAlias) -> bool:
     return tuple_.__origin__ is tuple and len(tuple_.__args__) == 2 and tuple_.__args__[1] is Ellipsis
 
 
-def _parse_entity(data: dict[str, Any] | MultiDict[str, Any], entity_cls: Any) -> Any:
-    assert is_dataclass(entity_cls) and isinstance(entity_cls, type)
-
-    entity_kwargs = {}
-    props = set(data.keys())
+def _compile_plan(entity_cls: Any) -> Iterable[tuple[str, str, Parser, Any]]:
     for entity_field in fields(entity_cls):
         metadata = get_prop_metadata(entity_field)
-        prop_name = entity_field.name
-        if metadata and metadata.name:
-            prop_name = metadata.name
-        if prop_name in data:
-            entity_kwargs[entity_field.name] = (
-                metadata.parser(data[prop_name]) if metadata and metadata.parser
-                else parse_value(data[prop_name], entity_field.type)
-            )
-            if metadata and metadata.assert_equals is not None:
-                if entity_kwargs[entity_field.name] != metadata.assert_equals:
-                    raise ValueError(f'Unexpected value for {entity_field.name}: {entity_kwargs[entity_field.name]}')
-            props.remove(prop_name)
-    if props:
-        raise ValueError(f'Unexpected JSON properties for {entity_cls}: {props}')
-    return entity_cls(**entity_kwargs)
+        if metadata and metadata.computed:
+            continue
+        prop_name = metadata.name if metadata and metadata.name else entity_field.name
+        if metadata and metadata.parser:
+            field_parser = metadata.parser
+        else:
+            field_parser = _get_parser(entity_field.type)
+        yield entity_field.name, prop_name, field_parser, metadata.assert_equals if metadata else None
+
+
+def _compile_entity(entity_cls: Any, plan: list[tuple[str, str, Parser, Any]], prop_names: set[str]) -> Parser:
+    computed = [
+        (entity_field.name, metadata.computed)
+        for entity_field in fields(entity_cls)
+        if (metadata := get_prop_metadata(entity_field)) and metadata.computed
+    ]
+
+    def parse_entity(data: dict[str, Any] | MultiDict[str, Any]) -> Any:
+        entity_kwargs = {}
+        for field_name, prop_name, field_parser, assert_equals in plan:
+            if prop_name in data:
+                value = field_parser(data[prop_name])
+                if assert_equals is not None and value != assert_equals:
+                    raise ValueError(f'Unexpected value for {field_name}: {value}')
+                entity_kwargs[field_name] = value
+        if not prop_names.issuperset(data.keys()):
+            raise ValueError(f'Unexpected JSON properties for {entity_cls}: {set(data.keys()) - prop_names}')
+        entity = entity_cls(**entity_kwargs)
+        for field_name, compute in computed:
+            # Entities are frozen, so this is set the same way as their own __init__ does
+            object.__setattr__(entity, field_name, compute(entity))
+        return entity
+    return parse_entity
 
 
 def _parse_conditions(data: dict[str, Any] | MultiDict[str, Any]) -> tuple[Condition, ...]:
-    return tuple(c for key, value in data.items() if (c := _parse_condition(key, value)))
+    return _intern(tuple(c for key, value in data.items() if (c := _parse_condition(key, value))))
 
 
 def _parse_condition(key: str, value: Any) -> Condition | None:
-    matches = []
-    for (pattern, condition_cls) in list_conditions():
-        if match := re.match(rf'^{pattern}$', key):
-            matches.append(parse_value({'value': value, **match.groupdict()}, condition_cls))
+    matches = [parse_value({'value': value, **groups}, condition_cls) for condition_cls, groups in match_condition(key)]
     if not matches:
         logger.warning(f'Invalid condition {key}: {value}')
         return None
     if len(matches) > 1:
         logger.warning(f'Ambiguous condition {key}, matches: {", ".join(str(m) for m in matches)}')
         return None
-    return matches[0]
+    return _intern(matches[0])
 
 
 def _parse_effects(data: dict[str, Any] | MultiDict[str, Any]) -> tuple[Effect, ...]:
-    return tuple(e for key, value in data.items() if (e := _parse_effect(key, value)))
+    return _intern(tuple(e for key, value in data.items() if (e := _parse_effect(key, value))))
 
 
 def _parse_effect(key: str, value: Any) -> Effect | None:
-    matches = []
-    for (pattern, effect_cls) in list_effects():
-        if match := re.match(rf'^{pattern}$', key):
-            matches.append(parse_value({'value': value, **match.groupdict()}, effect_cls))
+    matches = [parse_value({'value': value, **groups}, effect_cls) for effect_cls, groups in match_effect(key)]
     if not matches:
         logger.warning(f'Invalid effect {key}: {value}')
         return None
     if len(matches) > 1:
         logger.warning(f'Ambiguous effect key {key}, matches: {", ".join(str(m) for m in matches)}')
         return None
-    return matches[0]
+    return _intern(matches[0])
@@ -1,5 +1,5 @@
 from dataclasses import field, MISSING, dataclass, Field
-from typing import Any, Callable
+from typing import Any, Callable, TYPE_CHECKING, TypeVar, dataclass_transform, overload
 
 METADATA_KEY = '_prop'
 
@@ -9,6 +9,13 @@ class PropMetadata:
     name: str | None
     parser: Callable[[Any], Any] | None = None
     assert_equals: Any | None = None
+    # Relation of the references found within the prop, and how to turn its raw IDs into references
+    relation: str | None = None
+    reference: Callable[[Any], Any] | None = None
+    # Left out of the reference walk, along with everything nested within it
+    skip_references: bool = False
+    # Computed from the entity once it has been parsed, rather than being read from the JSON
+    computed: Callable[[Any], Any] | None = None
 
 
 def prop(
@@ -17,13 +24,45 @@ def prop(
     assert_equals: Any | None = None,
     default: Any = MISSING,
     default_factory: Any = MISSING,
+    relation: str | None = None,
+    reference: Callable[[Any], Any] | None = None,
+    skip_references: bool = False,
+    computed: Callable[[Any], Any] | None = None,
 ) -> Any:
     return field(
         default=default,
         default_factory=default_factory,
-        metadata={METADATA_KEY: PropMetadata(name=name, parser=parser, assert_equals=assert_equals)},
+        metadata={
+            METADATA_KEY: PropMetadata(
+                name=name,
+                parser=parser,
+                assert_equals=assert_equals,
+                relation=relation,
+                reference=reference,
+                skip_references=skip_references,
+                computed=computed,
+            ),
+        },
     )
 
 
 def get_prop_metadata(f: Field) -> PropMetadata | None:
     return f.metadata.get(METADATA_KEY)
+
+
+if TYPE_CHECKING:
+    T = TypeVar('T')
+
+    # Type checkers only take dataclasses.field() as a field specifier of the stdlib decorator, so a prop() without a
+    # default would look like a default to them. Schema classes are declared through this one, which also takes prop().
+    @overload
+    @dataclass_transform(field_specifiers=(field, prop))
+    def schema_dataclass(cls: type[T], /) -> type[T]: ...
+
+    @overload
+    @dataclass_transform(field_specifiers=(field, prop))
+    def schema_dataclass(*, frozen: bool = False) -> Callable[[type[T]], type[T]]: ...
+
+    def schema_dataclass(*args: Any, **kwargs: Any) -> Any: ...
+else:
+    schema_dataclass = dataclass
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+from array import array
+from enum import IntEnum
+from typing import Any, Iterator, Sequence, TYPE_CHECKING, TypeVar, cast, overload
+
+if TYPE_CHECKING:
+    from shadow_compass.game_db import Entry
+
+# Back-references between the entries of a game database, such as the rites whose effects refer to a card.
+#
+# Each entry is a node, numbered in the order in which it was added. While the database is being built, the edges of
+# each relation are held in a dict per target, which skips duplicate sources in constant time while keeping them in the
+# order in which they were first added. Once frozen, each relation is packed into two arrays: the sources of every
+# target one after the other, along with where the sources of each target start.
+
+
+class Relation(IntEnum):
+    # Named after the attributes of the entries which list the sources of each relation
+    CARD_VANISH_EFFECTS = 0
+    CARD_POST_RITE_CONDITIONS = 1
+    CARD_POST_RITE_EFFECTS = 2
+    ENDING_CONDITIONS = 3
+    EVENT_TRIGGERS = 4
+    EVENT_CONDITIONS = 5
+    EVENT_EFFECTS = 6
+    LOOT_ITEMS = 7
+    LOOT_CONDITIONS = 8
+    OBJECTIVE_CONDITIONS = 9
+    RITE_CONDITIONS = 10
+    RITE_EFFECTS = 11
+
+
+E = TypeVar('E', bound='Entry')
+
+
+class ReferenceGraph:
+    nodes: list[Entry]
+    _edges: dict[tuple[int, int], dict[int, None]] | None
+    _offsets: list[array]
+    _sources: list[array]
+
+    def __init__(self) -> None:
+        self.nodes = []
+        self._edges = {}
+        self._offsets = []
+        self._sources = []
+
+    def add(self, entry_cls: type[E], **kwargs: Any) -> E:
+        entry = entry_cls(graph=self, node=len(self.nodes), **kwargs)
+        self.nodes.append(entry)
+        return entry
+
+    def restore(self, entry: E) -> E:
+        # Adds an entry which was saved along with its node, but without the graph it belonged to
+        if entry.node != len(self.nodes):
+            raise ValueError(f'Entry {entry.key} was saved as node {entry.node}, not {len(self.nodes)}')
+        # Entries are frozen, so the graph is set the same way as their own __init__ does
+        object.__setattr__(entry, 'graph', self)
+        self.nodes.append(entry)
+        return entry
+
+    def add_edge(self, relation: Relation, target: int, source: int) -> None:
+        if self._edges is None:
+            raise RuntimeError('Cannot add edges to a frozen reference graph')
+        self._edges.setdefault((relation, target), {})[source] = None
+
+    def freeze(self) -> None:
+        edges = self._edges
+        if edges is None:
+            return
+        for relation in Relation:
+            offsets = array('l', (0,))
+            sources = array('l')
+            for target in range(len(self.nodes)):
+                target_sources = edges.get((relation, target))
+                if target_sources:
+                    sources.extend(target_sources)
+                offsets.append(len(sources))
+            self._offsets.append(offsets)
+            self._sources.append(sources)
+        self._edges = None
+
+    def get_sources(self, relation: Relation, target: int) -> EntryView:
+        if self._edges is not None:
+            raise RuntimeError('Reference graph must be frozen before being read')
+        offsets = self._offsets[relation]
+        return EntryView(relation, target, self.nodes, self._sources[relation], offsets[target], offsets[target + 1])
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def __repr__(self) -> str:
+        edges = sum(map(len, self._sources)) if self._edges is None else sum(map(len, self._edges.values()))
+        return f'<ReferenceGraph nodes={len(self)} edges={edges}>'
+
+
+class EntryView(Sequence[Any]):
+    # Read-only list of the entries referring to a single target through a single relation
+    __slots__ = ('relation', 'target', '_nodes', '_sources', '_start', '_stop')
+
+    relation: Relation
+    target: int
+
+    def __init__(
+        self,
+        relation: Relation,
+        target: int,
+        nodes: list[Entry],
+        sources: array,
+        start: int,
+        stop: int,
+    ) -> None:
+        self.relation = relation
+        self.target = target
+        self._nodes = nodes
+        self._sources = sources
+        self._start = start
+        self._stop = stop
+
+    @overload
+    def __getitem__(self, index: int) -> Entry: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[Entry]: ...
+
+    def __getitem__(self, index: int | slice) -> Entry | list[Entry]:
+        if isinstance(index, slice):
+            return list(self)[index]
+        length = self._stop - self._start
+        if index < 0:
+            index += length
+        if not 0 <= index < length:
+            raise IndexError('entry view index out of range')
+        return self._nodes[self._sources[self._start + index]]
+
+    def __iter__(self) -> Iterator[Entry]:
+        # Only ever indexed by position, which the type checker cannot tell from slicing through the bound method
+        return cast('Iterator[Entry]', map(self._nodes.__getitem__, self._sources[self._start:self._stop]))
+
+    def __len__(self) -> int:
+        return self._stop - self._start
+
+    def __repr__(self) -> str:
+        return f'<EntryView {list(self)!r}>'
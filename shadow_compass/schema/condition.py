@@ -1,8 +1,8 @@
 from abc import ABC
-from dataclasses import dataclass
 from typing import Any, Self, TypeVar, Callable, Iterable
 
-from shadow_compass.prop import prop
+from shadow_compass.dispatch import KeyDispatcher
+from shadow_compass.prop import prop, schema_dataclass as dataclass
 from shadow_compass.schema.common import CustomSchema, ParseFunc, COMPARATOR, COUNTER_ID, CARD_ID, TAG, SLOT
 from shadow_compass.schema.enums import CardType, CardRarity, Comparator
 from shadow_compass.schema.formula import FormulaElement
@@ -17,18 +17,17 @@ class Condition(ABC):
     def cls(self) -> str:
         return self.__class__.__name__
 
-    def references(self) -> Iterable[Reference]:
-        yield from []
-
 
 T = TypeVar('T', bound=Condition)
 
 conditions: list[tuple[str, type[Condition]]] = []
+condition_dispatcher: KeyDispatcher[type[Condition]] = KeyDispatcher()
 
 
 def condition(pattern: str) -> Callable[[type[T]], type[T]]:
     def decorator(cls: type[T]) -> type[T]:
         conditions.append((pattern, cls))
+        condition_dispatcher.register(pattern, cls)
         return cls
     return decorator
 
@@ -42,9 +41,6 @@ def _parse_comparator(data: Any) -> Comparator:
 class NotCondition(Condition, CustomSchema):
     condition: Condition
 
-    def references(self) -> Iterable[Reference]:
-        yield from self.condition.references()
-
     @classmethod
     def parse(cls, data: dict[str, Any]|MultiDict[str, Any], parse_func: ParseFunc) -> Self | None:
         conds = parse_func({data['condition']: data['value']}, tuple[Condition, ...], False)
@@ -56,20 +52,12 @@ class NotCondition(Condition, CustomSchema):
 class AllCondition(Condition):
     value: tuple[Condition, ...]
 
-    def references(self) -> Iterable[Reference]:
-        for cond in self.value:
-            yield from cond.references()
-
 
 @condition(r'any')
 @dataclass(frozen=True)
 class AnyCondition(Condition):
     value: tuple[Condition, ...]
 
-    def references(self) -> Iterable[Reference]:
-        for cond in self.value:
-            yield from cond.references()
-
 
 @condition(r'difficulty')
 @dataclass(frozen=True)
@@ -131,10 +119,6 @@ class FormulaCondition(Condition):
     value: int
     comparator: Comparator = prop(parser=_parse_comparator)
 
-    def references(self) -> Iterable[Reference]:
-        for element in self.elements:
-            yield from element.references()
-
 
 @condition(fr'r(?P<roll>\d+):(?P<elements>[\w()./*+-]+) *({COMPARATOR})')
 @dataclass(frozen=True)
@@ -144,10 +128,6 @@ class RollCondition(Condition):
     value: tuple[int, ...] | int
     comparator: Comparator = prop(parser=_parse_comparator)
 
-    def references(self) -> Iterable[Reference]:
-        for element in self.elements:
-            yield from element.references()
-
 
 @condition(fr'cost\.{CARD_ID}{COMPARATOR}')
 @dataclass(frozen=True)
@@ -538,3 +518,7 @@ class UpgradeUnlockedCondition(Condition):
 
 def list_conditions() -> list[tuple[str, type[Condition]]]:
     return conditions
+
+
+def match_condition(key: str) -> tuple[tuple[type[Condition], dict[str, Any]], ...]:
+    return condition_dispatcher.match(key)
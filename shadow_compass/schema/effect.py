@@ -1,10 +1,11 @@
 import re
 from abc import ABC
-from dataclasses import dataclass
+from functools import cached_property
 from typing import Any, Self, Callable, TypeVar, Iterable
 
-from shadow_compass.loc import Loc
-from shadow_compass.prop import prop
+from shadow_compass.dispatch import KeyDispatcher
+from shadow_compass.loc import Loc, cached_locs
+from shadow_compass.prop import prop, schema_dataclass as dataclass
 from shadow_compass.schema.common import CustomSchema, ParseFunc, OPERATOR, TAG, CARD_ID, SLOT, RITE_ID, COUNTER_ID, \
     TEXT_ID
 from shadow_compass.schema.enums import Operator, CardRarity, Slot
@@ -18,18 +19,17 @@ class Effect(ABC):
     def cls(self) -> str:
         return self.__class__.__name__
 
-    def references(self) -> Iterable[Reference]:
-        yield from []
-
 
 T = TypeVar('T', bound=Effect)
 
 effects: list[tuple[str, type[Effect]]] = []
+effect_dispatcher: KeyDispatcher[type[Effect]] = KeyDispatcher()
 
 
 def effect(pattern: str) -> Callable[[type[T]], type[T]]:
     def decorator(cls: type[T]) -> type[T]:
         effects.append((pattern, cls))
+        effect_dispatcher.register(pattern, cls)
         return cls
     return decorator
 
@@ -40,9 +40,6 @@ class CardChange(ABC):
     def cls(self) -> str:
         return self.__class__.__name__
 
-    def references(self) -> Iterable[Reference]:
-        yield from []
-
 
 @dataclass(frozen=True)
 class CardQuantityChange(CardChange):
@@ -261,10 +258,6 @@ class AdjustTagTaggedTotalEffect(Effect):
 class AllEffect(Effect):
     value: tuple[Effect, ...]
 
-    def references(self) -> Iterable[Reference]:
-        for eff in self.value:
-            yield from eff.references()
-
 
 @effect(r'begin_guide')
 @dataclass(frozen=True)
@@ -312,8 +305,6 @@ class CardEffect(Effect, CustomSchema):
 
     def references(self) -> Iterable[Reference]:
         yield CardReference(self.card_id)
-        for change in self.changes:
-            yield from change.references()
 
 
 @effect(r'case:(op)?(?P<option>\d+)')
@@ -322,10 +313,6 @@ class CaseEffect(Effect):
     option: int
     value: tuple[Effect, ...]
 
-    def references(self) -> Iterable[Reference]:
-        for eff in self.value:
-            yield from eff.references()
-
 
 @effect(fr'table\.change_card_name\.{TEXT_ID}\.{CARD_ID}')
 @dataclass(frozen=True)
@@ -334,7 +321,7 @@ class ChangeCardNameCardTableEffect(Effect):
     card_id: int
     value: str
 
-    @property
+    @cached_property
     def text(self) -> Loc:
         return Loc(self.value, f'change_card_name_{self.text_id}')
 
@@ -346,7 +333,7 @@ class ChangeCardNameCardTotalEffect(Effect):
     card_id: int
     value: str
 
-    @property
+    @cached_property
     def text(self) -> Loc:
         return Loc(self.value, f'change_card_name_{self.text_id}')
 
@@ -358,7 +345,7 @@ class ChangeCardNameSlotEffect(Effect):
     slot: int
     value: str
 
-    @property
+    @cached_property
     def text(self) -> Loc:
         return Loc(self.value, f'change_card_name_{self.text_id}')
 
@@ -370,7 +357,7 @@ class ChangeCardTextCardTotalEffect(Effect):
     card_id: int
     value: str
 
-    @property
+    @cached_property
     def text(self) -> Loc:
         return Loc(self.value, f'change_card_text_{self.text_id}')
 
@@ -382,7 +369,7 @@ class ChangeCardTextSlotEffect(Effect):
     slot: int
     value: str
 
-    @property
+    @cached_property
     def text(self) -> Loc:
         return Loc(self.value, f'change_card_text_{self.text_id}')
 
@@ -398,10 +385,6 @@ class ChangeNameEffect(Effect):
 class ChooseEffect(Effect):
     value: tuple[Effect, ...]
 
-    def references(self) -> Iterable[Reference]:
-        for eff in self.value:
-            yield from eff.references()
-
 
 @effect(fr'clean\.{CARD_ID}')
 @dataclass(frozen=True)
@@ -492,15 +475,15 @@ class ConfirmEffect(Effect, CustomSchema):
     confirm_text: str
     cancel_text: str
 
-    @property
+    @cached_property
     def text_(self) -> Loc:
         return Loc(self.text, f'CONFIRM_{self.id}_TEXT')
 
-    @property
+    @cached_property
     def confirm_text_(self) -> Loc:
         return Loc(self.confirm_text, f'CONFIRM_{self.id}_CONFIRM_TEXT')
 
-    @property
+    @cached_property
     def cancel_text_(self) -> Loc:
         return Loc(self.cancel_text, f'CONFIRM_{self.id}_CANCEL_TEXT')
 
@@ -545,10 +528,6 @@ class DelayEffect(Effect, CustomSchema):
     round: int
     effects: tuple[Effect, ...]
 
-    def references(self) -> Iterable[Reference]:
-        for eff in self.effects:
-            yield from eff.references()
-
     @classmethod
     def parse(cls, data: dict[str, Any]|MultiDict[str, Any], parse_func: ParseFunc) -> Self | None:
         return parse_func(
@@ -626,10 +605,6 @@ class EventOffEffect(Effect):
 class FailedEffect(Effect):
     value: tuple[Effect, ...]
 
-    def references(self) -> Iterable[Reference]:
-        for eff in self.value:
-            yield from eff.references()
-
 
 @effect(fr'focus\.{RITE_ID}')
 @dataclass(frozen=True)
@@ -691,20 +666,12 @@ class MakeFollowerCardTotalEffect(Effect):
 class NoPromptEffect(Effect):
     value: tuple[Effect, ...]
 
-    def references(self) -> Iterable[Reference]:
-        for eff in self.value:
-            yield from eff.references()
-
 
 @effect(r'no_show')
 @dataclass(frozen=True)
 class NoShowEffect(Effect):
     value: tuple[Effect, ...]
 
-    def references(self) -> Iterable[Reference]:
-        for eff in self.value:
-            yield from eff.references()
-
 
 @effect(r'option')
 @dataclass(frozen=True)
@@ -714,10 +681,11 @@ class OptionEffect(Effect, CustomSchema):
     items: tuple[OptionItem, ...]
     icon: tuple[str | None, ...] | str | None = None
 
-    @property
+    @cached_property
     def text_(self) -> Loc:
         return Loc(self.text, f'OPTION_{self.id}_TEXT')
 
+    @cached_locs
     def get_item_text(self, idx: int) -> Loc:
         return Loc(self.items[idx].text, f'OPTION_{self.id}_ITEM_{idx+1}_TEXT')
 
@@ -742,7 +710,7 @@ class PopCardEffect(Effect):
     card_id: int
     value: str
 
-    @property
+    @cached_property
     def text(self) -> Loc:
         return Loc(self.value, f'POP_{self.text_id}_TEXT_1')
 
@@ -754,7 +722,7 @@ class PopCardHandEffect(Effect):
     card_id: int
     value: str
 
-    @property
+    @cached_property
     def text(self) -> Loc:
         return Loc(self.value, f'POP_{self.text_id}_TEXT_1')
 
@@ -766,7 +734,7 @@ class PopCardRiteEffect(Effect):
     card_id: int
     value: str
 
-    @property
+    @cached_property
     def text(self) -> Loc:
         return Loc(self.value, f'POP_{self.text_id}_TEXT_1')
 
@@ -777,7 +745,7 @@ class PopSelfEffect(Effect):
     text_id: str
     value: str
 
-    @property
+    @cached_property
     def text(self) -> Loc:
         return Loc(self.value, f'POP_{self.text_id}_TEXT_1')
 
@@ -789,7 +757,7 @@ class PopSlotEffect(Effect):
     slot: int
     value: str
 
-    @property
+    @cached_property
     def text(self) -> Loc:
         return Loc(self.value, f'POP_{self.text_id}_TEXT_1')
 
@@ -800,7 +768,7 @@ class PopSudanHandEffect(Effect):
     text_id: str
     value: str
 
-    @property
+    @cached_property
     def text(self) -> Loc:
         return Loc(self.value, f'POP_{self.text_id}_TEXT_1')
 
@@ -812,7 +780,7 @@ class PopTaggedEffect(Effect):
     tag: str
     value: str
 
-    @property
+    @cached_property
     def text(self) -> Loc:
         return Loc(self.value, f'POP_{self.text_id}_TEXT_1')
 
@@ -824,7 +792,7 @@ class PopTaggedHandEffect(Effect):
     tag: str
     value: str
 
-    @property
+    @cached_property
     def text(self) -> Loc:
         return Loc(self.value, f'POP_{self.text_id}_TEXT_1')
 
@@ -835,7 +803,7 @@ class PopThinkEffect(Effect):
     text_id: str
     value: str
 
-    @property
+    @cached_property
     def text(self) -> Loc:
         return Loc(self.value, f'POP_{self.text_id}_TEXT_1')
 
@@ -847,7 +815,7 @@ class PromptEffect(Effect, CustomSchema):
     text: str
     icon: tuple[tuple[int, ...]|str|None, ...] | str | None = None
 
-    @property
+    @cached_property
     def text_(self) -> Loc:
         return Loc(self.text, f'PROMPT_{self.id}_TEXT')
 
@@ -892,10 +860,6 @@ class SteamAchievementEffect(Effect):
 class SuccessEffect(Effect):
     value: tuple[Effect, ...]
 
-    def references(self) -> Iterable[Reference]:
-        for eff in self.value:
-            yield from eff.references()
-
 
 @effect(r'sudan_card')
 @dataclass(frozen=True)
@@ -973,3 +937,7 @@ class UpgradeTagAddTagEffect(Effect):
 
 def list_effects() -> list[tuple[str, type[Effect]]]:
     return effects
+
+
+def match_effect(key: str) -> tuple[tuple[type[Effect], dict[str, Any]], ...]:
+    return effect_dispatcher.match(key)
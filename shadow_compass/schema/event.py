@@ -1,11 +1,12 @@
-from dataclasses import dataclass
+from functools import cached_property
 from typing import Any, Iterable
 
-from shadow_compass.loc import Loc
-from shadow_compass.prop import prop
+from shadow_compass.loc import Loc, cached_locs
+from shadow_compass.prop import prop, schema_dataclass as dataclass
 from shadow_compass.schema.condition import Condition
 from shadow_compass.schema.effect import Effect
-from shadow_compass.schema.reference import Reference, CardReference, EndingReference, RiteReference
+from shadow_compass.schema.reference import Reference, CardReference, EndingReference, RiteReference, \
+    collect_references
 
 
 @dataclass(frozen=True)
@@ -78,14 +79,10 @@ class EventOn:
 
 @dataclass(frozen=True)
 class EventSettlement:
-    action: tuple[Effect, ...] = ()
+    action: tuple[Effect, ...] = prop(relation='effects', default=())
     tips_resource: str | None = None # Unused
     tips_text: str | None = None # Unused
 
-    def effect_references(self) -> Iterable[Reference]:
-        for action  in self.action:
-            yield from action.references()
-
 
 def _parse_auto_start_init(value: Any) -> bool | None:
     if value == [1]:
@@ -104,29 +101,20 @@ class Event:
     text: str
     is_replay: bool
     start_trigger: bool
-    on: EventOn
+    on: EventOn = prop(relation='triggers')
     settlement: tuple[EventSettlement, ...]
-    condition: tuple[Condition, ...]
+    condition: tuple[Condition, ...] = prop(relation='conditions')
     auto_start: bool = prop(default=True)
     auto_start_init: bool | None = prop(parser=_parse_auto_start_init, default=None)
+    collected_references: tuple[tuple[str, Reference], ...] = prop(computed=collect_references, default=())
 
-    @property
+    @cached_property
     def text_(self) -> Loc:
         return Loc(self.text, f'event_{self.id}_text')
 
+    @cached_locs
     def get_settlement_tips_text(self, idx: int) -> Loc:
         return Loc(self.settlement[idx].tips_text or '', f'event_{self.id}_settlement_{idx}_tips_text')
 
-    def event_on_references(self) -> Iterable[Reference]:
-        yield from self.on.references()
-
-    def condition_references(self) -> Iterable[Reference]:
-        for condition in self.condition:
-            yield from condition.references()
-
-    def effect_references(self) -> Iterable[Reference]:
-        for settlement in self.settlement:
-            yield from settlement.effect_references()
-
     def __repr__(self) -> str:
         return f'<Event id={self.id}>'
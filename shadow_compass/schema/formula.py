@@ -1,6 +1,7 @@
 import re
 from abc import ABC
 from dataclasses import dataclass
+from functools import lru_cache
 from typing import Iterable
 
 from shadow_compass.schema.common import SLOT, TAG, COUNTER_ID
@@ -13,9 +14,6 @@ class FormulaElement(ABC):
     def cls(self) -> str:
         return self.__class__.__name__
 
-    def references(self) -> Iterable[Reference]:
-        yield from []
-
 
 @dataclass(frozen=True)
 class OperatorFormulaElement(FormulaElement):
@@ -68,47 +66,59 @@ class TagFormulaElement(FormulaElement):
 class EnemyFormulaElement(FormulaElement):
     elements: tuple[FormulaElement, ...]
 
-    def references(self) -> Iterable[Reference]:
-        for element in self.elements:
-            yield from element.references()
+
+FORMULA_TOKEN_PATTERN = re.compile(
+    r'(?P<close>\))'
+    r'|(?P<operator>[+\-*/])'
+    r'|(?P<enemy>e\()'
+    r'|(?P<literal>[\d.]+)'
+    fr'|(?P<rarity>(?:{SLOT.replace('slot', 'rarity_slot')}\.)?rare)'
+    fr'|(?P<counter>counter\.{COUNTER_ID})'
+    fr'|(?P<global_counter>global_counter\.{COUNTER_ID.replace('counter_id', 'global_counter_id')})'
+    fr'|(?P<slot_tag>{SLOT}\.{TAG.replace('tag', 'slot_tag_tag')})'
+    fr'|(?P<tag>{TAG.replace('tag', 'tag_tag')})'
+)
 
 
+@lru_cache(maxsize=4096)
 def parse_formula(formula: str) -> tuple[tuple[FormulaElement, ...], int]:
     i = 0
     n = len(formula)
     elements = []
+    # Elements of the enclosing formulas, while parsing the inside of an EnemyElement
+    parents = []
     while i < n:
-        if formula[i] == ')':
-            # Assume we are closing out an EnemyElement
-            i += 1
-            break
-        if formula[i] in ('+', '-', '*', '/'):
-            elements.append(OperatorFormulaElement(formula[i]))
-            i += 1
-        elif formula[i:i + 2] == 'e(':
-            i += 2
-            enemy_elements, enemy_i = parse_formula(formula[i:])
-            elements.append(EnemyFormulaElement(enemy_elements))
-            i += enemy_i
-        elif match := re.match(r'(?P<value>[\d.]+)', formula[i:]):
-            elements.append(LiteralFormulaElement(float(match.group('value'))))
-            i += match.end()
-        elif match := re.match(fr'(?:{SLOT}\.)?rare', formula[i:]):
-            slot = match.group('slot')
-            elements.append(SlotRarityFormulaElement(int(slot)) if slot else RarityFormulaElement())
-            i += match.end()
-        elif match := re.match(fr'^counter\.{COUNTER_ID}', formula[i:]):
-            elements.append(CounterFormulaElement(int(match.group('counter_id'))))
-            i += match.end()
-        elif match := re.match(fr'^global_counter\.{COUNTER_ID}', formula[i:]):
-            elements.append(GlobalCounterFormulaElement(int(match.group('counter_id'))))
-            i += match.end()
-        elif match := re.match(fr'^{SLOT}\.{TAG}', formula[i:]):
-            elements.append(SlotTagFormulaElement(int(match.group('slot')), match.group('tag')))
-            i += match.end()
-        elif match := re.match(TAG, formula[i:]):
-            elements.append(TagFormulaElement(match.group('tag')))
-            i += match.end()
-        else:
+        if not (token := FORMULA_TOKEN_PATTERN.match(formula, i)):
             raise ValueError(f'Failed to parse formula: {formula}')
+        i = token.end()
+        match token.lastgroup:
+            case 'close':
+                if not parents:
+                    break
+                enemy_elements = tuple(elements)
+                elements = parents.pop()
+                elements.append(EnemyFormulaElement(enemy_elements))
+            case 'operator':
+                elements.append(OperatorFormulaElement(token.group('operator')))
+            case 'enemy':
+                parents.append(elements)
+                elements = []
+            case 'literal':
+                elements.append(LiteralFormulaElement(float(token.group('literal'))))
+            case 'rarity':
+                slot = token.group('rarity_slot')
+                elements.append(SlotRarityFormulaElement(int(slot)) if slot else RarityFormulaElement())
+            case 'counter':
+                elements.append(CounterFormulaElement(int(token.group('counter_id'))))
+            case 'global_counter':
+                elements.append(GlobalCounterFormulaElement(int(token.group('global_counter_id'))))
+            case 'slot_tag':
+                elements.append(SlotTagFormulaElement(int(token.group('slot')), token.group('slot_tag_tag')))
+            case 'tag':
+                elements.append(TagFormulaElement(token.group('tag_tag')))
+    # Unclosed EnemyElements end with the formula
+    while parents:
+        enemy_elements = tuple(elements)
+        elements = parents.pop()
+        elements.append(EnemyFormulaElement(enemy_elements))
     return tuple(elements), i
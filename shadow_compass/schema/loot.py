@@ -1,10 +1,12 @@
-from dataclasses import dataclass
+from functools import cached_property
 from typing import Iterable
 
 from shadow_compass.loc import Loc
+from shadow_compass.prop import prop, schema_dataclass as dataclass
 from shadow_compass.schema.condition import Condition
 from shadow_compass.schema.enums import LootType, LootItemType
-from shadow_compass.schema.reference import Reference, CardReference, EventReference, LootReference, RiteReference
+from shadow_compass.schema.reference import Reference, CardReference, EventReference, LootReference, RiteReference, \
+    collect_references
 
 
 @dataclass(frozen=True)
@@ -13,9 +15,9 @@ class LootItem:
     id: int
     type: LootItemType
     weight: int
-    condition: tuple[Condition, ...] = ()
+    condition: tuple[Condition, ...] = prop(relation='conditions', default=())
 
-    def item_references(self) -> Iterable[Reference]:
+    def references(self) -> Iterable[Reference]:
         match self.type:
             case LootItemType.CARD:
                 yield CardReference(self.id)
@@ -26,10 +28,6 @@ class LootItem:
             case LootItemType.RITE:
                 yield RiteReference(self.id)
 
-    def condition_references(self) -> Iterable[Reference]:
-        for condition in self.condition:
-            yield from condition.references()
-
 
 @dataclass(frozen=True)
 class Loot:
@@ -37,19 +35,12 @@ class Loot:
     name: str
     repeat: int
     type: LootType
-    item: tuple[LootItem, ...]
+    item: tuple[LootItem, ...] = prop(relation='items')
+    collected_references: tuple[tuple[str, Reference], ...] = prop(computed=collect_references, default=())
 
-    @property
+    @cached_property
     def name_(self) -> Loc:
         return Loc(self.name, f'loot_{self.id}_name')
 
-    def item_references(self) -> Iterable[Reference]:
-        for item in self.item:
-            yield from item.item_references()
-
-    def condition_references(self) -> Iterable[Reference]:
-        for item in self.item:
-            yield from item.condition_references()
-
     def __repr__(self) -> str:
         return f'<Loot id={self.id} name={self.name}>'
\ No newline at end of file
@@ -1,20 +1,14 @@
-from dataclasses import dataclass
-from typing import Iterable
-
+from shadow_compass.prop import prop, schema_dataclass as dataclass
 from shadow_compass.schema.condition import Condition
 from shadow_compass.schema.enums import EndingOutcome
-from shadow_compass.schema.reference import Reference
+from shadow_compass.schema.reference import Reference, collect_references
 
 
 @dataclass(frozen=True)
 class OverTextExtra:
-    condition: tuple[Condition, ...]
+    condition: tuple[Condition, ...] = prop(relation='conditions')
     result_text: str
 
-    def condition_references(self) -> Iterable[Reference]:
-        for condition in self.condition:
-            yield from condition.references()
-
 
 @dataclass(frozen=True)
 class Over:
@@ -28,6 +22,7 @@ class Over:
     open_after_story: bool = False
     manual_prompt: bool = False
     text_extra: tuple[OverTextExtra, ...] = ()
+    collected_references: tuple[tuple[str, Reference], ...] = prop(computed=collect_references, default=())
 
     @property
     def extra_text(self) -> tuple[tuple[int, OverTextExtra], ...]:
@@ -37,10 +32,5 @@ class Over:
             if over_text_extra.condition or over_text_extra.result_text
         )
 
-    def condition_references(self) -> Iterable[Reference]:
-        for text_extra in self.text_extra:
-            yield from text_extra.condition_references()
-
-
     def __repr__(self) -> str:
         return f'<Over {id(self)}>'
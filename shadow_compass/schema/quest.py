@@ -1,20 +1,16 @@
-from dataclasses import dataclass
-from typing import Iterable
+from functools import cached_property
 
-from shadow_compass.loc import Loc
+from shadow_compass.loc import Loc, cached_locs
+from shadow_compass.prop import prop, schema_dataclass as dataclass
 from shadow_compass.schema.condition import Condition
-from shadow_compass.schema.reference import Reference
+from shadow_compass.schema.reference import Reference, collect_references
 
 
 @dataclass(frozen=True)
 class QuestTarget:
     text: str
     show_counter: str  # TODO Support counter reference
-    condition: tuple[Condition, ...]
-
-    def condition_references(self) -> Iterable[Reference]:
-        for condition in self.condition:
-            yield from condition.references()
+    condition: tuple[Condition, ...] = prop(relation='conditions')
 
 
 @dataclass(frozen=True)
@@ -27,23 +23,21 @@ class Quest:
     pre: int
     target: tuple[QuestTarget, ...]
     icon: str
+    collected_references: tuple[tuple[str, Reference], ...] = prop(computed=collect_references, default=())
 
-    @property
+    @cached_property
     def name_(self) -> Loc:
         return Loc(self.name, f'quest_{self.id}_name')
 
-    @property
+    @cached_property
     def text_(self) -> Loc:
         return Loc(self.text, f'quest_{self.id}_text')
 
-    @property
+    @cached_property
     def favour_text_(self) -> Loc:
         return Loc(self.favour_text, f'quest_{self.id}_favour_text')
 
-    def condition_references(self) -> Iterable[Reference]:
-        for target in self.target:
-            yield from target.condition_references()
-
+    @cached_locs
     def get_target_text(self, idx: int) -> Loc:
         return Loc(self.target[idx].text, f'quest_{self.id}_target_{idx+1}')
 
@@ -1,4 +1,7 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, fields, is_dataclass
+from typing import Any, Callable, Iterable, get_args
+
+from shadow_compass.prop import get_prop_metadata
 
 
 @dataclass(frozen=True)
@@ -39,3 +42,74 @@ class TagReference(Reference):
 @dataclass(frozen=True)
 class UpgradeReference(Reference):
     id: int
+
+
+# How each node of a type yields its own references, along with the name, relation and reference of each of its fields
+_FieldPlan = tuple[str, str | None, Callable[[Any], Reference] | None]
+_Plan = tuple[Callable[[Any], Iterable[Reference]] | None, tuple[_FieldPlan, ...]]
+
+_plans: dict[type, _Plan | None] = {}
+
+
+def collect_references(value: Any) -> tuple[tuple[str, Reference], ...]:
+    # Walks the dataclass tree of a value, collecting the references of every node along with the relation declared by
+    # the innermost prop holding them. Nodes only yield references to their own fields, as the nested ones are reached
+    # by the walk itself, and references outside of any relation are left out.
+    references: list[tuple[str, Reference]] = []
+    _collect(value, None, references)
+    return tuple(references)
+
+
+def _collect(value: Any, relation: str | None, references: list[tuple[str, Reference]]) -> None:
+    value_type = type(value)
+    if value_type is tuple:
+        for item in value:
+            _collect(item, relation, references)
+        return
+    if value_type is dict:
+        for item in value.values():
+            _collect(item, relation, references)
+        return
+
+    plan = _plans[value_type] if value_type in _plans else _compile_plan(value_type)
+    if plan is None:
+        return
+    get_references, field_plans = plan
+    if get_references is not None and relation is not None:
+        references.extend((relation, reference) for reference in get_references(value))
+    for field_name, field_relation, make_reference in field_plans:
+        field_value = getattr(value, field_name)
+        value_relation = field_relation or relation
+        if make_reference is None:
+            _collect(field_value, value_relation, references)
+        elif field_value is not None and value_relation is not None:
+            ids = field_value if type(field_value) is tuple else (field_value,)
+            references.extend((value_relation, make_reference(i)) for i in ids)
+
+
+def _compile_plan(value_type: type) -> _Plan | None:
+    # Fields which cannot hold any dataclass or which opt out of the walk are skipped, as are the types left with
+    # nothing to collect or walk
+    plan = None
+    if is_dataclass(value_type):
+        get_references = getattr(value_type, 'references', None)
+        field_plans = []
+        for f in fields(value_type):
+            metadata = get_prop_metadata(f)
+            if metadata is not None and (metadata.computed is not None or metadata.skip_references):
+                continue
+            if metadata is not None and metadata.reference is not None:
+                field_plans.append((f.name, metadata.relation, metadata.reference))
+            elif _may_hold_dataclasses(f.type):
+                field_plans.append((f.name, metadata.relation if metadata else None, None))
+        if callable(get_references) or field_plans:
+            plan = (get_references if callable(get_references) else None, tuple(field_plans))
+    _plans[value_type] = plan
+    return plan
+
+
+def _may_hold_dataclasses(type_: Any) -> bool:
+    args = get_args(type_)
+    if args:
+        return any(_may_hold_dataclasses(arg) for arg in args)
+    return is_dataclass(type_)
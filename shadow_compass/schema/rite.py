@@ -1,13 +1,12 @@
-from dataclasses import dataclass
-from typing import Iterable
+from functools import cached_property
 
-from shadow_compass.loc import Loc
-from shadow_compass.prop import prop
+from shadow_compass.loc import Loc, cached_locs
+from shadow_compass.prop import prop, schema_dataclass as dataclass
 from shadow_compass.schema.condition import Condition
 from shadow_compass.schema.effect import Effect
 from shadow_compass.schema.enums import RiteResult, RiteType
 from shadow_compass.schema.outcome import Outcome
-from shadow_compass.schema.reference import Reference, TagReference
+from shadow_compass.schema.reference import Reference, TagReference, collect_references
 
 
 @dataclass(frozen=True)
@@ -21,20 +20,20 @@ class RandomTextUp:
 
 @dataclass(frozen=True)
 class TagTipsUp:
-    tips: tuple[str, ...] | None = None
+    tips: tuple[str, ...] | None = prop(relation='tag_tips', reference=TagReference, default=None)
     type: RiteResult | None = None
 
 
 @dataclass(frozen=True)
 class RiteCardSlotPop:
-    condition: tuple[Condition, ...]
-    action: tuple[Effect, ...]
+    condition: tuple[Condition, ...] = prop(relation='conditions')
+    action: tuple[Effect, ...] = prop(skip_references=True)
 
 
 @dataclass(frozen=True)
 class RiteCardSlot:
     guid: str
-    condition: tuple[Condition, ...]
+    condition: tuple[Condition, ...] = prop(relation='conditions')
     open_adsorb: bool
     is_key: bool
     is_empty: bool
@@ -58,13 +57,9 @@ class RitePin:
 
 @dataclass(frozen=True)
 class RiteOpenCondition:
-    condition: tuple[Condition, ...]
+    condition: tuple[Condition, ...] = prop(relation='conditions')
     tips: str
 
-    def condition_references(self) -> Iterable[Reference]:
-        for cond in self.condition:
-            yield from cond.references()
-
 
 @dataclass(frozen=True)
 class Rite:
@@ -75,12 +70,12 @@ class Rite:
     once_new: int
     round_number: int
     waiting_round: int
-    waiting_round_end_action: tuple[Outcome, ...]
+    waiting_round_end_action: tuple[Outcome, ...] = prop(skip_references=True)
     auto_begin: bool
     auto_result: bool
     location: str
     icon: str
-    tag_tips: tuple[str, ...]
+    tag_tips: tuple[str, ...] = prop(relation='tag_tips', reference=TagReference)
     tips_text: tuple[str, ...]
     open_conditions: tuple[RiteOpenCondition, ...]
     random_text: dict[str, str]
@@ -97,76 +92,65 @@ class Rite:
     cards_slot: dict[str, RiteCardSlot] = prop(default_factory=dict)
     method_settlement: str = '' # Unused
     random_effect: tuple[Effect, ...] = ()  # Unused
+    collected_references: tuple[tuple[str, Reference], ...] = prop(computed=collect_references, default=())
 
-    @property
+    @cached_property
     def name_(self) -> Loc:
         return Loc(self.name, f'rite_{self.id}_name')
 
-    @property
+    @cached_property
     def text_(self) -> Loc:
         return Loc(self.text, f'rite_{self.id}_text')
 
-    def tag_tips_references(self) -> Iterable[TagReference]:
-        for tag_tip in self.tag_tips:
-            yield TagReference(tag_tip)
-        if self.tag_tips_up and self.tag_tips_up.tips:
-            for tag_tip in self.tag_tips_up.tips:
-                yield TagReference(tag_tip)
-
-    def condition_references(self) -> Iterable[Reference]:
-        for open_condition in self.open_conditions:
-            yield from open_condition.condition_references()
-        for settlement_group in (self.settlement, self.settlement_prior, self.settlement_extre):
-            for settlement in settlement_group:
-                yield from settlement.condition_references()
-        for card_slot in self.cards_slot.values():
-            for cond in card_slot.condition:
-                yield from cond.references()
-            for pop in card_slot.pops:
-                for cond in pop.condition:
-                    yield from cond.references()
-
-    def effect_references(self) -> Iterable[Reference]:
-        for settlement_group in (self.settlement, self.settlement_prior, self.settlement_extre):
-            for settlement in settlement_group:
-                yield from settlement.effect_references()
-
+    @cached_locs
     def get_tips_text(self, idx: int) -> Loc:
         return Loc(self.tips_text[idx], f'rite_{self.id}_tips_text_{idx}')
 
+    @cached_locs
     def get_open_conditions_tips(self, idx: int) -> Loc:
         return Loc(self.open_conditions[idx].tips, f'rite_{self.id}_open_conditions_tips_{idx}')
 
+    @cached_locs
     def get_random_text_text(self, key: str) -> Loc:
         return Loc(self.random_text[key], f'rite_{self.id}_random_text_{key}_text')
 
+    @cached_locs
     def get_random_text_up_text(self, key: str) -> Loc:
         return Loc(self.random_text_up[key].text, f'rite_{self.id}_random_text_{key}_text')
 
+    @cached_locs
     def get_random_text_up_type_tips(self, key: str) -> Loc:
         return Loc(self.random_text_up[key].type_tips, f'rite_{self.id}_random_text_{key}_type_tips')
 
+    @cached_locs
     def get_random_text_up_low_target_tips(self, key: str) -> Loc:
         return Loc(self.random_text_up[key].low_target_tips, f'rite_{self.id}_random_text_{key}_low_target_tips')
 
+    @cached_locs
     def get_settlement_prior_title(self, idx: int) -> Loc:
         return Loc(self.settlement_prior[idx].result_title or '', f'rite_{self.id}_prior_settlement_{idx}_title')
 
+    @cached_locs
     def get_settlement_prior_text(self, idx: int) -> Loc:
         return Loc(self.settlement_prior[idx].result_text or '', f'rite_{self.id}_prior_settlement_{idx}_text')
 
+    @cached_locs
     def get_settlement_title(self, idx: int) -> Loc:
         return Loc(self.settlement[idx].result_title or '', f'rite_{self.id}_settlement_{idx}_title')
 
+    @cached_locs
     def get_settlement_text(self, idx: int) -> Loc:
         return Loc(self.settlement[idx].result_text or '', f'rite_{self.id}_settlement_{idx}_text')
 
+    @cached_locs
     def get_settlement_extre_title(self, idx: int) -> Loc:
         return Loc(self.settlement_extre[idx].result_title or '', f'rite_{self.id}_settlement_extre_{idx}_title')
 
+    @cached_locs
     def get_settlement_extre_text(self, idx: int) -> Loc:
         return Loc(self.settlement_extre[idx].result_text or '', f'rite_{self.id}_settlement_extre_{idx}_text')
 
+    @cached_locs
     def get_card_slot_text(self, key: str) -> Loc:
         return Loc(self.cards_slot[key].text, f'rite_{self.id}_cards_slot_{key}_text')
 
@@ -1,4 +1,5 @@
 from dataclasses import dataclass
+from functools import cached_property
 
 from shadow_compass.loc import Loc
 from shadow_compass.schema.enums import TagType
@@ -23,11 +24,11 @@ class Tag:
     tag_vanishing: int  # Unused
     fail_tag: tuple[str, ...]  # Unused
 
-    @property
+    @cached_property
     def name_(self) -> Loc:
         return Loc(self.name, f'tag_{self.code}_name', self.code)
 
-    @property
+    @cached_property
     def text_(self) -> Loc:
         return Loc(self.text, f'tag_{self.code}_text')
 
@@ -1,4 +1,5 @@
 from dataclasses import dataclass
+from functools import cached_property
 
 from shadow_compass.loc import Loc
 from shadow_compass.schema.condition import Condition
@@ -17,11 +18,11 @@ class Upgrade:
     effect: tuple[Effect, ...]
     incompatible: int
 
-    @property
+    @cached_property
     def name_(self) -> Loc:
         return Loc(self.name, f'upgrade_{self.id}_name')
 
-    @property
+    @cached_property
     def text_(self) -> Loc:
         return Loc(self.text, f'upgrade_{self.id}_text')
 
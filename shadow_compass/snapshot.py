@@ -0,0 +1,372 @@
+import gc
+import importlib
+import lzma
+import struct
+import zlib
+from array import array
+from collections import deque
+from dataclasses import Field, fields, is_dataclass
+from enum import Enum
+from itertools import accumulate, islice, repeat
+from types import MappingProxyType
+from typing import Any, Callable, Literal
+
+# Binary snapshot of parsed game data, which loads faster and is smaller than the equivalent pickle.
+#
+# Every distinct value is numbered, starting with the constants and followed by the containers and objects, which are
+# stored in groups of the same kind and class. Groups are ordered so that the items of a value always come from earlier
+# groups, which lets each group be rebuilt in bulk rather than by walking the values one by one. Shared values, such as
+# interned conditions, are therefore stored once and stay shared after loading.
+#
+# Dataclass fields whose metadata marks them as transient are left out, and are left unset when loading for whatever
+# loads the value to set again.
+#
+# After the header come these tables:
+# - classes: the dataclasses and enums used, along with the names of the fields of each dataclass
+# - constants: strings, enum members (as the index of the member), integers and floats
+# - groups: the kind, class and number of values of each group
+# - lengths: the length of each container, in the order of the groups
+# - items: the numbers of the fields and items of each value, in the order of the groups
+
+MAGIC = b'SCSNAP'
+VERSION = 1
+
+Compression = Literal['zlib', 'lzma'] | None
+_COMPRESSIONS: dict[int, tuple[Compression, Callable[[bytes], bytes], Callable[[bytes], bytes]]] = {
+    0: (None, bytes, bytes),
+    1: ('zlib', zlib.compress, zlib.decompress),
+    2: ('lzma', lzma.compress, lzma.decompress),
+}
+_HEADER = struct.Struct('<6sBB')
+_COUNTS = struct.Struct('<11I')
+
+# Group kinds
+_OBJECT = 0
+_TUPLE = 1
+_LIST = 2
+_DICT = 3
+
+# Constants that every snapshot starts with
+_SPECIAL_CONSTANTS = (None, False, True)
+_LEAF_TYPES = frozenset((type(None), bool, int, float, str))
+
+# Metadata of the dataclass fields which are left out of snapshots
+TRANSIENT = MappingProxyType({'snapshot_transient': True})
+
+
+class SnapshotError(ValueError):
+    pass
+
+
+def dumps(value: Any, compression: Compression = None) -> bytes:
+    encoder = _Encoder()
+    root = encoder.add(value)
+    body = encoder.build(root)
+    flag, compress = next((flag, c) for flag, (name, c, _) in _COMPRESSIONS.items() if name == compression)
+    return _HEADER.pack(MAGIC, VERSION, flag) + compress(body)
+
+
+def loads(data: bytes) -> Any:
+    if len(data) < _HEADER.size:
+        raise SnapshotError('Snapshot is truncated')
+    magic, version, flag = _HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise SnapshotError('Not a snapshot')
+    if version != VERSION:
+        raise SnapshotError(f'Unsupported snapshot version {version}')
+    if flag not in _COMPRESSIONS:
+        raise SnapshotError(f'Unsupported snapshot compression {flag}')
+    # None of the rebuilt values can be garbage, so collections while rebuilding them would only slow it down
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return _decode(memoryview(_COMPRESSIONS[flag][2](data[_HEADER.size:])))
+    except SnapshotError:
+        raise
+    except (IndexError, ValueError, struct.error, zlib.error, lzma.LZMAError, ImportError, AttributeError) as e:
+        raise SnapshotError('Snapshot is corrupt') from e
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+
+class _Node:
+    value: Any
+    kind: int
+    class_index: int
+    items: list[Any]
+    level: int
+    index: int
+
+    def __init__(self, value: Any, kind: int, class_index: int, items: list[Any], level: int) -> None:
+        self.value = value
+        self.kind = kind
+        self.class_index = class_index
+        self.items = items
+        self.level = level
+        self.index = -1
+
+
+class _Encoder:
+    classes: dict[type, int]
+    strings: dict[str, int]
+    enums: dict[Enum, int]
+    ints: dict[int, int]
+    floats: dict[bytes, int]
+    nodes: dict[int, _Node]
+
+    def __init__(self) -> None:
+        self.classes = {}
+        self.strings = {}
+        self.enums = {}
+        self.ints = {}
+        # Keyed by their bytes, since equal floats can still differ (such as 0.0 and -0.0)
+        self.floats = {}
+        self.nodes = {}
+
+    def add(self, value: Any) -> _Node | tuple[str, int]:
+        # Returns the table and index of a constant, or the node of any other value, which is only created once per
+        # value so that shared values stay shared
+        if type(value) in _LEAF_TYPES or isinstance(value, Enum):
+            return self._add_constant(value)
+        node = self.nodes.get(id(value))
+        if node is not None:
+            return node
+
+        if type(value) is tuple:
+            kind, class_index, items = _TUPLE, 0, value
+        elif type(value) is list:
+            kind, class_index, items = _LIST, 0, value
+        elif type(value) is dict:
+            kind, class_index, items = _DICT, 0, [item for pair in value.items() for item in pair]
+        elif is_dataclass(value) and not isinstance(value, type):
+            cls = type(value)
+            kind, class_index = _OBJECT, self._add_class(cls)
+            items = [getattr(value, name) for name in _get_field_names(cls)]
+        else:
+            raise TypeError(f'Cannot snapshot value of type {type(value).__name__}')
+
+        items = [self.add(item) for item in items]
+        level = 1 + max((item.level for item in items if type(item) is _Node), default=0)
+        node = self.nodes[id(value)] = _Node(value, kind, class_index, items, level)
+        return node
+
+    def build(self, root: _Node | tuple[str, int]) -> bytes:
+        offsets = {'': 0, 's': len(_SPECIAL_CONSTANTS)}
+        offsets['e'] = offsets['s'] + len(self.strings)
+        offsets['i'] = offsets['e'] + len(self.enums)
+        offsets['f'] = offsets['i'] + len(self.ints)
+        next_index = offsets['f'] + len(self.floats)
+
+        # Grouped by level first, so that the items of each value are numbered before it
+        groups: dict[tuple[int, int, int], list[_Node]] = {}
+        for node in self.nodes.values():
+            groups.setdefault((node.level, node.kind, node.class_index), []).append(node)
+        group_data = array('I')
+        lengths = array('I')
+        items = array('I')
+        for (_, kind, class_index), nodes in sorted(groups.items(), key=lambda group: group[0]):
+            group_data.extend((kind, class_index, len(nodes)))
+            for node in nodes:
+                node.index = next_index
+                next_index += 1
+                if kind == _DICT:
+                    lengths.append(len(node.items) // 2)
+                elif kind != _OBJECT:
+                    lengths.append(len(node.items))
+                items.extend(
+                    item.index if type(item) is _Node else offsets[item[0]] + item[1]
+                    for item in node.items
+                )
+
+        class_names = '\0'.join(f'{cls.__module__}:{cls.__qualname__}' for cls in self.classes).encode()
+        layouts = array('I')
+        for cls in self.classes:
+            names = _get_field_names(cls) if is_dataclass(cls) else ()
+            layouts.append(len(names))
+            layouts.extend(self.strings[name] for name in names)
+        text = ''.join(self.strings).encode('utf-8', 'surrogatepass')
+        string_lengths = array('I', (len(s) for s in self.strings))
+        enums = array('I', (self.classes[type(member)] for member in self.enums))
+        enums.extend(list(type(member)).index(member) for member in self.enums)
+        ints = array('q', self.ints)
+        floats = array('d')
+        floats.frombytes(b''.join(self.floats))
+        counts = _COUNTS.pack(
+            len(class_names),
+            len(layouts),
+            len(string_lengths),
+            len(text),
+            len(self.enums),
+            len(ints),
+            len(floats),
+            len(group_data),
+            len(lengths),
+            len(items),
+            root.index if isinstance(root, _Node) else offsets[root[0]] + root[1],
+        )
+        return b''.join((
+            counts,
+            class_names,
+            layouts.tobytes(),
+            string_lengths.tobytes(),
+            text,
+            enums.tobytes(),
+            ints.tobytes(),
+            floats.tobytes(),
+            group_data.tobytes(),
+            lengths.tobytes(),
+            items.tobytes(),
+        ))
+
+    def _add_constant(self, value: Any) -> tuple[str, int]:
+        if value is None or value is True or value is False:
+            return '', _SPECIAL_CONSTANTS.index(value)
+        if type(value) is str:
+            return 's', self._add(self.strings, value)
+        if type(value) is int:
+            return 'i', self._add(self.ints, value)
+        if type(value) is float:
+            return 'f', self._add(self.floats, struct.pack('<d', value))
+        self._add_class(type(value))
+        return 'e', self._add(self.enums, value)
+
+    def _add_class(self, cls: type) -> int:
+        index = self.classes.get(cls)
+        if index is None:
+            index = self.classes[cls] = len(self.classes)
+            # Added now, since the string table must be complete by the time the values are numbered
+            for name in _get_field_names(cls) if is_dataclass(cls) else ():
+                self._add(self.strings, name)
+        return index
+
+    @staticmethod
+    def _add(table: dict[Any, int], value: Any) -> int:
+        index = table.get(value)
+        if index is None:
+            index = table[value] = len(table)
+        return index
+
+
+def _decode(body: memoryview) -> Any:
+    (
+        class_names_size,
+        layouts_count,
+        strings_count,
+        text_size,
+        enums_count,
+        ints_count,
+        floats_count,
+        groups_size,
+        lengths_count,
+        items_count,
+        root,
+    ) = _COUNTS.unpack_from(body)
+    position = _COUNTS.size
+
+    def read(typecode: str, count: int) -> array:
+        nonlocal position
+        values = array(typecode)
+        size = count * values.itemsize
+        if position + size > len(body):
+            raise SnapshotError('Snapshot is truncated')
+        values.frombytes(body[position:position + size])
+        position += size
+        return values
+
+    def read_text(size: int) -> str:
+        nonlocal position
+        if position + size > len(body):
+            raise SnapshotError('Snapshot is truncated')
+        value = str(body[position:position + size], 'utf-8', 'surrogatepass')
+        position += size
+        return value
+
+    class_names = read_text(class_names_size).split('\0') if class_names_size else []
+    layouts = read('I', layouts_count)
+    string_lengths = read('I', strings_count)
+    text = read_text(text_size)
+    ends = list(accumulate(string_lengths))
+    strings = list(map(text.__getitem__, map(slice, [0, *ends], ends)))
+
+    classes = []
+    class_fields = []
+    layout_position = 0
+    for class_name in class_names:
+        length = layouts[layout_position]
+        classes.append(_resolve_class(class_name))
+        class_fields.append(tuple(strings[i] for i in layouts[layout_position + 1:layout_position + 1 + length]))
+        layout_position += length + 1
+
+    enum_data = read('I', enums_count * 2)
+    enums = [list(classes[c])[m] for c, m in zip(enum_data[:enums_count], enum_data[enums_count:])]
+    values = [*_SPECIAL_CONSTANTS, *strings, *enums, *read('q', ints_count), *read('d', floats_count)]
+    group_data = read('I', groups_size)
+    length_data = read('I', lengths_count)
+    item_data = read('I', items_count)
+    if position != len(body):
+        raise SnapshotError('Snapshot has trailing data')
+    # Checked up front, since a group running out of items would otherwise build shorter values without failing
+    if len(group_data) % 3 or _count_items(group_data, length_data, class_fields) != len(item_data):
+        raise SnapshotError('Snapshot has inconsistent groups')
+    lengths = iter(length_data)
+
+    # Looked up lazily, since the items of each group refer to values which are only added by earlier groups
+    items = map(values.__getitem__, item_data)
+    new_object = object.__new__
+
+    def build_dict(length: int) -> dict:
+        pairs = islice(items, length * 2)
+        return dict(zip(pairs, pairs))
+
+    for i in range(0, len(group_data), 3):
+        kind, class_index, count = group_data[i:i + 3]
+        if kind == _OBJECT:
+            cls = classes[class_index]
+            names = class_fields[class_index]
+            objects = list(map(new_object, repeat(cls, count)))
+            # Each zip stops at the last field name, so that the next one picks up the items where it left off.
+            # Fields are updated on the instance dictionary, since frozen dataclasses reject attribute assignment.
+            deque(map(dict.update, map(vars, objects), map(zip, repeat(names, count), repeat(items))), 0)
+            values += objects
+        elif kind == _TUPLE:
+            values += map(tuple, map(islice, repeat(items), islice(lengths, count)))
+        elif kind == _LIST:
+            values += map(list, map(islice, repeat(items), islice(lengths, count)))
+        elif kind == _DICT:
+            values += map(build_dict, islice(lengths, count))
+        else:
+            raise SnapshotError(f'Invalid group kind {kind}')
+    return values[root]
+
+
+def _count_items(group_data: array, length_data: array, class_fields: list[tuple[str, ...]]) -> int:
+    count = 0
+    length_position = 0
+    for i in range(0, len(group_data), 3):
+        kind, class_index, group_count = group_data[i:i + 3]
+        if kind == _OBJECT:
+            count += group_count * len(class_fields[class_index])
+            continue
+        length = sum(length_data[length_position:length_position + group_count])
+        count += length * 2 if kind == _DICT else length
+        length_position += group_count
+    if length_position != len(length_data):
+        raise SnapshotError('Snapshot has inconsistent lengths')
+    return count
+
+
+def _resolve_class(name: str) -> type:
+    module_name, _, qualname = name.partition(':')
+    value: Any = importlib.import_module(module_name)
+    for part in qualname.split('.'):
+        value = getattr(value, part)
+    return value
+
+
+def is_transient(f: Field) -> bool:
+    return bool(f.metadata.get('snapshot_transient'))
+
+
+def _get_field_names(cls: Any) -> tuple[str, ...]:
+    return tuple(f.name for f in fields(cls) if not is_transient(f))
@@ -0,0 +1,236 @@
+import mmap
+import os
+import pickle
+import struct
+from array import array
+from bisect import bisect_left
+from contextlib import ExitStack
+from dataclasses import fields
+from pathlib import Path
+from typing import Any, BinaryIO, Iterator, Mapping, Self
+
+from shadow_compass.game_config import GameConfig
+
+# Read-only store of the entities of a game config, which can be opened without loading any of them.
+#
+# Each entity is pickled on its own, followed by an index of each collection:
+# - offsets: where each record starts, along with where the last one ends
+# - keys: the key of each record, either as 64-bit integers or as UTF-8 text with the encoded length of each key
+# - for integer keys, the keys in sorted order along with the record of each, which are searched without being loaded
+# Every part of the index is aligned on 8 bytes, so that it can be read in place from the memory map.
+
+MAGIC = b'SCSTORE\0'
+VERSION = 1
+
+_HEADER = struct.Struct('<8sIIQ')
+_COLLECTION = struct.Struct('<HBxI')
+_INT_KEYS = 0
+_STR_KEYS = 1
+_ALIGNMENT = 8
+
+
+class StoreError(ValueError):
+    pass
+
+
+def write_store(config: GameConfig, path: Path) -> None:
+    collections = [(f.name, getattr(config, f.name)) for f in fields(GameConfig)]
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, len(collections), 0))
+        indexes = []
+        for name, entities in collections:
+            offsets = array('Q')
+            for entity in entities.values():
+                offsets.append(f.tell())
+                pickle.dump(entity, f, pickle.HIGHEST_PROTOCOL)
+            offsets.append(f.tell())
+            indexes.append((name, list(entities), offsets))
+        _write_padding(f)
+        index_offset = f.tell()
+        for name, keys, offsets in indexes:
+            _write_index(f, name, keys, offsets)
+        f.seek(0)
+        f.write(_HEADER.pack(MAGIC, VERSION, len(collections), index_offset))
+    os.replace(tmp_path, path)
+
+
+class StoredEntities(Mapping[Any, Any]):
+    # Entities of a single collection, each of which is unpickled every time it is accessed
+    name: str
+    buffer: memoryview
+    offsets: memoryview
+    # Named so as not to hide the keys method of the mapping
+    entity_keys: memoryview | list[str]
+    sorted_keys: memoryview | None
+    positions: memoryview | None
+    key_positions: dict[Any, int] | None
+
+    def __init__(
+        self,
+        name: str,
+        buffer: memoryview,
+        offsets: memoryview,
+        entity_keys: memoryview | list[str],
+        sorted_keys: memoryview | None = None,
+        positions: memoryview | None = None,
+    ) -> None:
+        self.name = name
+        self.buffer = buffer
+        self.offsets = offsets
+        self.entity_keys = entity_keys
+        self.sorted_keys = sorted_keys
+        self.positions = positions
+        self.key_positions = (
+            {key: position for position, key in enumerate(entity_keys)} if sorted_keys is None else None
+        )
+
+    def __getitem__(self, key: Any) -> Any:
+        position = self._find(key)
+        if position is None:
+            raise KeyError(key)
+        return pickle.loads(self.buffer[self.offsets[position]:self.offsets[position + 1]])
+
+    def __contains__(self, key: Any) -> bool:
+        return self._find(key) is not None
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self.entity_keys)
+
+    def __len__(self) -> int:
+        return len(self.entity_keys)
+
+    def __repr__(self) -> str:
+        return f'<StoredEntities {self.name} count={len(self)}>'
+
+    def release(self) -> None:
+        for view in (self.offsets, self.entity_keys, self.sorted_keys, self.positions):
+            if isinstance(view, memoryview):
+                view.release()
+
+    def _find(self, key: Any) -> int | None:
+        if self.key_positions is not None:
+            return self.key_positions.get(key)
+        sorted_keys, positions = self.sorted_keys, self.positions
+        if type(key) is not int or sorted_keys is None or positions is None:
+            return None
+        i = bisect_left(sorted_keys, key)
+        if i < len(sorted_keys) and sorted_keys[i] == key:
+            return positions[i]
+        return None
+
+
+class EntityStore:
+    # Opens a store written by write_store, whose collections are available under the names of the config fields
+    path: Path
+    collections: dict[str, StoredEntities]
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        with ExitStack() as stack:
+            # The file is closed again if anything below fails, and is otherwise left open until close()
+            self._file = stack.enter_context(open(path, 'rb'))
+            try:
+                self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError as e:
+                raise StoreError(f'Store {path} is empty') from e
+            self._buffer = memoryview(self._mmap)
+            self.collections = {}
+            try:
+                self._read_index()
+            except (StoreError, struct.error, ValueError, TypeError) as e:
+                self.close()
+                raise e if isinstance(e, StoreError) else StoreError(f'Store {path} is corrupt') from e
+            stack.pop_all()
+
+    def __getattr__(self, name: str) -> StoredEntities:
+        collections = self.__dict__.get('collections', {})
+        if name in collections:
+            return collections[name]
+        raise AttributeError(f'{self.__class__.__name__!r} object has no attribute {name!r}')
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
+
+    def __repr__(self) -> str:
+        return f'<EntityStore {self.path}>'
+
+    def close(self) -> None:
+        # The views into the memory map must all be released before it can be closed
+        for collection in self.collections.values():
+            collection.release()
+        self.collections = {}
+        self._buffer.release()
+        self._mmap.close()
+        self._file.close()
+
+    def _read_index(self) -> None:
+        magic, version, count, position = _HEADER.unpack_from(self._buffer)
+        if magic != MAGIC:
+            raise StoreError(f'{self.path} is not a store')
+        if version != VERSION:
+            raise StoreError(f'Unsupported store version {version}')
+
+        def read(size: int) -> memoryview:
+            nonlocal position
+            if position + size > len(self._buffer):
+                raise StoreError(f'Store {self.path} is truncated')
+            view = self._buffer[position:position + size]
+            position += size + -size % _ALIGNMENT
+            return view
+
+        for _ in range(count):
+            name_size, key_kind, key_count = _COLLECTION.unpack(read(_COLLECTION.size))
+            name = str(read(name_size), 'utf-8')
+            offsets = read((key_count + 1) * 8).cast('Q')
+            if key_kind == _INT_KEYS:
+                keys = read(key_count * 8).cast('q')
+                sorted_keys = read(key_count * 8).cast('q')
+                positions = read(key_count * 8).cast('q')
+                collection = StoredEntities(name, self._buffer, offsets, keys, sorted_keys, positions)
+            elif key_kind == _STR_KEYS:
+                lengths = read(key_count * 8).cast('q')
+                data = bytes(read(sum(lengths)))
+                keys = []
+                start = 0
+                for length in lengths:
+                    keys.append(data[start:start + length].decode())
+                    start += length
+                lengths.release()
+                collection = StoredEntities(name, self._buffer, offsets, keys)
+            else:
+                raise StoreError(f'Unsupported key kind {key_kind} for {name}')
+            self.collections[name] = collection
+
+
+def _write_index(f: BinaryIO, name: str, keys: list[Any], offsets: array) -> None:
+    encoded_name = name.encode()
+    if all(type(key) is int for key in keys):
+        f.write(_COLLECTION.pack(len(encoded_name), _INT_KEYS, len(keys)))
+        _write_aligned(f, encoded_name)
+        _write_aligned(f, offsets.tobytes())
+        order = sorted(range(len(keys)), key=keys.__getitem__)
+        _write_aligned(f, array('q', keys).tobytes())
+        _write_aligned(f, array('q', (keys[i] for i in order)).tobytes())
+        _write_aligned(f, array('q', order).tobytes())
+    elif all(type(key) is str for key in keys):
+        f.write(_COLLECTION.pack(len(encoded_name), _STR_KEYS, len(keys)))
+        _write_aligned(f, encoded_name)
+        _write_aligned(f, offsets.tobytes())
+        encoded_keys = [key.encode() for key in keys]
+        _write_aligned(f, array('q', map(len, encoded_keys)).tobytes())
+        _write_aligned(f, b''.join(encoded_keys))
+    else:
+        raise TypeError(f'Cannot store {name}, whose keys are neither all integers nor all strings')
+
+
+def _write_aligned(f: BinaryIO, data: bytes) -> None:
+    f.write(data)
+    _write_padding(f)
+
+
+def _write_padding(f: BinaryIO) -> None:
+    f.write(b'\0' * (-f.tell() % _ALIGNMENT))
@@ -1,3 +1,5 @@
+import json
+import re
 from typing import TextIO, Any, Generic, TypeVar, Iterable
 
 import jsonc
@@ -7,21 +9,32 @@ K = TypeVar('K')
 V = TypeVar('V')
 D = TypeVar('D')
 
+# Strips comments and trailing commas in one pass, leaving string literals untouched
+_JSONC_PATTERN = re.compile(
+    r'''
+    ("(?:\\.|[^\\"])*")
+    | /\*.*?\*/
+    | //[^\r\n]*
+    | ,(?=(?:\s|/\*.*?\*/|//[^\r\n]*)*[\]}])
+    ''',
+    re.DOTALL | re.VERBOSE,
+)
+
 
 class MultiDict(Generic[K, V]):
     data: tuple[tuple[K, V], ...]
+    index: dict[K, V]
 
     def __init__(self, data: Iterable[tuple[K, V]]) -> None:
         self.data = tuple(data)
+        # Built from the end so that the first occurrence of a duplicate key wins
+        self.index = dict(reversed(self.data))
 
     def __len__(self) -> int:
         return len(self.data)
 
     def __getitem__(self, key: K) -> V:
-        for k, v in self.data:
-            if k == key:
-                return v
-        raise KeyError(key)
+        return self.index[key]
 
     def __setitem__(self, key, item) -> None:
         raise NotImplementedError('Cannot set items on a multi-dict')
@@ -34,10 +47,7 @@ class MultiDict(Generic[K, V]):
             yield k
 
     def __contains__(self, key) -> bool:
-        for k, _ in self.data:
-            if k == key:
-                return True
-        return False
+        return key in self.index
 
     def __repr__(self) -> str:
         return f"{self.__class__.__name__}{self.data}"
@@ -47,9 +57,7 @@ class MultiDict(Generic[K, V]):
         key: K,
         default: D = None,  # type: ignore[invalid-parameter-default]
     ) -> V|D:
-        if key in self:
-            return self[key]
-        return default
+        return self.index.get(key, default)
 
     def keys(self) -> Iterable[K]:
         return self.__iter__()
@@ -62,5 +70,23 @@ class MultiDict(Generic[K, V]):
             yield value
 
 
-def load(f: TextIO, use_multi_dict: bool = True) -> Any:
-    return jsonc.loads(f.read().lstrip('\ufeff'), object_pairs_hook=MultiDict if use_multi_dict else None)
\ No newline at end of file
+def _multi_dict_or_dict(pairs: list[tuple[K, V]]) -> dict[K, V] | MultiDict[K, V]:
+    # Only objects with duplicate keys need to pay for a multi-dict
+    d = dict(pairs)
+    return d if len(d) == len(pairs) else MultiDict(pairs)
+
+
+def load(f: TextIO, use_multi_dict: bool = True, fast: bool = True) -> Any:
+    return loads(f.read(), use_multi_dict, fast)
+
+
+def loads(s: str, use_multi_dict: bool = True, fast: bool = True) -> Any:
+    s = s.lstrip('\ufeff')
+    object_pairs_hook = _multi_dict_or_dict if use_multi_dict else None
+    if fast:
+        try:
+            return json.loads(_JSONC_PATTERN.sub(r'\1', s), object_pairs_hook=object_pairs_hook)
+        except json.JSONDecodeError:
+            # Leave anything unusual to the reference implementation
+            pass
+    return jsonc.loads(s, object_pairs_hook=object_pairs_hook)